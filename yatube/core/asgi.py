@@ -0,0 +1,174 @@
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_THREADS = 16
+# Ключ environ, по которому Django узнаёт, что запрос пришёл через
+# ThreadPoolASGIHandler и долгий ответ не займёт поток пула.
+ASGI_ENVIRON_KEY = 'yatube.asgi'
+
+
+class ThreadPoolASGIHandler:
+    """ASGI-приложение, выполняющее Django WSGI-обработчик в пуле потоков.
+
+    Django 2.2 не поддерживает асинхронные представления, поэтому каждый
+    запрос целиком обрабатывается в отдельном потоке: медленный запрос
+    занимает один поток пула, а не весь процесс.
+    """
+
+    def __init__(self, wsgi_application, threads=DEFAULT_THREADS):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(
+                f'Неподдерживаемый тип соединения: {scope["type"]}'
+            )
+        body = await self.read_body(receive)
+        loop = asyncio.get_running_loop()
+        stream = await loop.run_in_executor(
+            self.executor, self.run_wsgi, scope, body, send, loop
+        )
+        if stream is not None:
+            await self.run_stream(stream, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def read_body(self, receive):
+        body = io.BytesIO()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body.write(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body.seek(0)
+        return body
+
+    def run_wsgi(self, scope, body, send, loop):
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        state = {}
+
+        def start_response(status, headers, exc_info=None):
+            state['status'] = int(status.split(' ', 1)[0])
+            state['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        def send_start():
+            if not state.get('started'):
+                state['started'] = True
+                send_sync({
+                    'type': 'http.response.start',
+                    'status': state['status'],
+                    'headers': state['headers'],
+                })
+
+        response = self.wsgi_application(
+            build_environ(scope, body), start_response
+        )
+        if hasattr(response, 'async_content'):
+            send_start()
+            return response
+        try:
+            for chunk in response:
+                if chunk:
+                    send_start()
+                    send_sync({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            send_start()
+            send_sync({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+
+    async def run_stream(self, response, receive, send):
+        """Отдаёт долгий поток ответа из цикла событий до отключения клиента.
+
+        Так открытые соединения, например потоки событий, не занимают
+        потоки пула.
+        """
+        content = response.async_content()
+
+        async def forward():
+            async for chunk in content:
+                await send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body', 'body': b''})
+
+        async def wait_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+
+        streaming = asyncio.ensure_future(forward())
+        disconnect = asyncio.ensure_future(wait_disconnect())
+        try:
+            await asyncio.wait(
+                (streaming, disconnect), return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            for task in (streaming, disconnect):
+                task.cancel()
+            await asyncio.gather(streaming, disconnect, return_exceptions=True)
+            await content.aclose()
+            response.close()
+        if not streaming.cancelled() and streaming.exception():
+            raise streaming.exception()
+
+
+def build_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        ASGI_ENVIRON_KEY: True,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            # Повторные Cookie склеиваются через '; ', остальные - через ','.
+            separator = '; ' if name == 'HTTP_COOKIE' else ','
+            value = f'{environ[name]}{separator}{value}'
+        environ[name] = value
+    return environ
@@ -0,0 +1,237 @@
+import hashlib
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files import locks
+from django.db import DatabaseError
+from django.http import HttpResponse
+from django.utils.cache import patch_response_headers
+
+from .metrics import CACHE_REQUESTS, VIEW_CACHE
+
+logger = logging.getLogger(__name__)
+
+VIEW_CACHE_KEY = 'views.decorators.cache.cache_'
+MISSING = object()
+WAIT_STEP = 0.05
+
+_recomputing = set()
+_recomputing_lock = threading.Lock()
+
+
+def get_key_prefix(key):
+    """Префикс ключа: key_prefix для cache_page, иначе начало ключа."""
+    if key.startswith(VIEW_CACHE_KEY):
+        return key.split('.')[4] or 'cache_page'
+    return re.split(r'[:|.]', key, maxsplit=1)[0]
+
+
+class InstrumentedCacheMixin:
+    def counted_get(self, key, version):
+        value = super().get(key, MISSING, version)
+        CACHE_REQUESTS.inc(
+            get_key_prefix(key), 'miss' if value is MISSING else 'hit'
+        )
+        return value
+
+    def get(self, key, default=None, version=None):
+        value = self.counted_get(key, version)
+        return default if value is MISSING else value
+
+    def get_many(self, keys, version=None):
+        """Как BaseCache.get_many; каждый ключ учитывается ровно один раз."""
+        found = {}
+        for key in keys:
+            value = self.counted_get(key, version)
+            if value is not MISSING and value is not None:
+                found[key] = value
+        return found
+
+
+class LockedFileBasedCache(FileBasedCache):
+    """FileBasedCache, у которого add и incr атомарны между процессами.
+
+    Обе операции выполняются под исключительной блокировкой файла
+    (flock) из LOCK_STRIPES общих файлов в каталоге кеша, выбранного
+    по имени файла ключа. Блокировка работает между процессами одной
+    машины; без поддержки блокировок в ОС atomic_add ложен, и проверка
+    выдаёт core.W009.
+    """
+    LOCK_STRIPES = 64
+    atomic_add = bool(locks.LOCK_EX)
+
+    @contextmanager
+    def _key_lock(self, key, version):
+        fname = os.path.basename(self._key_to_file(key, version))
+        stripe = int(fname[:8], 16) % self.LOCK_STRIPES
+        self._createdir()
+        path = os.path.join(self._dir, f'stripe-{stripe}.lock')
+        with open(path, 'ab') as lock_file:
+            locks.lock(lock_file, locks.LOCK_EX)
+            try:
+                yield
+            finally:
+                locks.unlock(lock_file)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self._key_lock(key, version):
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self._key_lock(key, version):
+            return super().incr(key, delta, version)
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    pass
+
+
+class InstrumentedFileBasedCache(InstrumentedCacheMixin, LockedFileBasedCache):
+    pass
+
+
+def view_cache_key(request, key_prefix):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{key_prefix}:{request.user.pk or 0}:{path}'
+
+
+def build_response(entry):
+    response = HttpResponse(entry['content'], status=entry['status'])
+    for name, value in entry['headers']:
+        response[name] = value
+    return response
+
+
+def is_fresh(entry, now):
+    """XFetch: срок сдвигается на случайную долю времени пересчёта."""
+    early = entry['delta'] * settings.VIEW_CACHE['BETA'] * math.log(
+        1 - random.random()
+    )
+    return now - early < entry['expires']
+
+
+def store_response(key, response, timeout, started):
+    patch_response_headers(response, timeout)
+    finished = time.time()
+    cache.set(key, {
+        'content': response.content,
+        'status': response.status_code,
+        'headers': [
+            (name, value) for name, value in response.items()
+            if name.lower() != 'set-cookie'
+        ],
+        'expires': finished + timeout,
+        'delta': finished - started,
+    }, timeout + settings.VIEW_CACHE['STALE'])
+
+
+def wait_for_entry(key, wait):
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        time.sleep(WAIT_STEP)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def fallback_entry(key, entry, now):
+    """Копия для запроса, который не взял блокировку, и её метка."""
+    if entry is not None:
+        return entry, 'early' if now < entry['expires'] else 'stale'
+    return wait_for_entry(key, settings.VIEW_CACHE['WAIT']), 'wait'
+
+
+def acquire_lock(key):
+    """Берёт блокировку пересчёта страницы; False, если она занята.
+
+    Сначала берётся блокировка процесса, затем cache.add. Между
+    процессами single-flight надёжен только с атомарным add (memcached,
+    redis, LockedFileBasedCache). Обычный FileBasedCache делает
+    has_key+set, и с ним страницу может одновременно пересчитать
+    по одному запросу на процесс (core.W009).
+    """
+    with _recomputing_lock:
+        if key in _recomputing:
+            return False
+        _recomputing.add(key)
+    if cache.add(f'{key}:lock', True, settings.VIEW_CACHE['LOCK_TIMEOUT']):
+        return True
+    release_lock(key, shared=False)
+    return False
+
+
+def release_lock(key, shared=True):
+    if shared:
+        cache.delete(f'{key}:lock')
+    with _recomputing_lock:
+        _recomputing.discard(key)
+
+
+def recompute(view, request, args, kwargs, key, timeout):
+    started = time.time()
+    response = view(request, *args, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code == 200 and not response.streaming:
+        store_response(key, response, timeout, started)
+    return response
+
+
+def cache_page_swr(timeout, key_prefix):
+    """cache_page с защитой от одновременного пересчёта.
+
+    Страницу пересчитывает один запрос, захвативший блокировку в кеше;
+    остальные получают устаревшую копию или ждут до VIEW_CACHE['WAIT']
+    секунд, если копии нет. Пересчёт начинается заранее с вероятностью,
+    растущей к концу срока и со временем пересчёта (XFetch). Если база
+    недоступна, отдаётся копия не старше VIEW_CACHE['STALE'] секунд.
+    Блокировка общая для процессов только при атомарном cache.add,
+    см. acquire_lock.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = view_cache_key(request, key_prefix)
+            entry = cache.get(key)
+            now = time.time()
+            if entry is not None and is_fresh(entry, now):
+                VIEW_CACHE.inc(key_prefix, 'hit')
+                return build_response(entry)
+            locked = acquire_lock(key)
+            if not locked:
+                copy, result = fallback_entry(key, entry, now)
+                if copy is not None:
+                    VIEW_CACHE.inc(key_prefix, result)
+                    return build_response(copy)
+            try:
+                response = recompute(
+                    view, request, args, kwargs, key, timeout
+                )
+            except DatabaseError:
+                if entry is None:
+                    raise
+                logger.exception('Отдана устаревшая копия %s', key)
+                VIEW_CACHE.inc(key_prefix, 'stale_error')
+                return build_response(entry)
+            finally:
+                if locked:
+                    release_lock(key)
+            VIEW_CACHE.inc(key_prefix, 'miss')
+            return response
+        return wrapper
+    return decorator
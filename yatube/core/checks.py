@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestFilesMixin
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.checks import Warning, register
+from django.utils.module_loading import import_string
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+COMPRESSION_MIDDLEWARE = (
+    'core.middleware.CompressionMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
+)
+CONDITIONAL_MIDDLEWARE = 'django.middleware.http.ConditionalGetMiddleware'
+DEV_ONLY_APPS = ('debug_toolbar',)
+PERFORMANCE = 'performance'
+
+
+def uses_cached_loader(options):
+    loaders = options.get('loaders')
+    if loaders is None:
+        return not settings.DEBUG
+    return any(
+        isinstance(loader, (list, tuple)) and loader[0] == CACHED_LOADER
+        for loader in loaders
+    )
+
+
+@register(PERFORMANCE, deploy=True)
+def check_debug(app_configs, **kwargs):
+    """Проверки производительности запускаются так:
+
+    python manage.py check --deploy --tag performance
+    """
+    errors = []
+    if settings.DEBUG:
+        errors.append(Warning(
+            'DEBUG включён: SQL-запросы копятся в памяти, '
+            'шаблоны не кешируются.',
+            hint='Используйте DJANGO_ENV=prod.',
+            id='core.W001',
+        ))
+    for app in DEV_ONLY_APPS:
+        if app in settings.INSTALLED_APPS:
+            errors.append(Warning(
+                f'Приложение {app} предназначено только для разработки.',
+                id='core.W002',
+            ))
+    return errors
+
+
+@register(PERFORMANCE, deploy=True)
+def check_templates(app_configs, **kwargs):
+    return [
+        Warning(
+            f'Шаблонизатор {template["BACKEND"]} не использует '
+            'cached.Loader: шаблоны разбираются на каждом запросе.',
+            id='core.W003',
+        )
+        for template in settings.TEMPLATES
+        if not uses_cached_loader(template.get('OPTIONS', {}))
+    ]
+
+
+@register(PERFORMANCE, deploy=True)
+def check_storages(app_configs, **kwargs):
+    errors = [
+        Warning(
+            f'База {alias}: соединение открывается на каждый запрос.',
+            hint='Задайте CONN_MAX_AGE.',
+            id='core.W004',
+        )
+        for alias, database in settings.DATABASES.items()
+        if not database.get('CONN_MAX_AGE')
+    ]
+    errors.extend(
+        Warning(
+            f'Кеш {alias} хранится в памяти каждого процесса и не '
+            'разделяется между воркерами.',
+            hint='Задайте CACHE_BACKEND и CACHE_LOCATION.',
+            id='core.W005',
+        )
+        for alias, cache in settings.CACHES.items()
+        if issubclass(import_string(cache['BACKEND']), LocMemCache)
+    )
+    storage = import_string(settings.STATICFILES_STORAGE)
+    if not issubclass(storage, ManifestFilesMixin):
+        errors.append(Warning(
+            'Имена статических файлов не содержат хеш, поэтому браузеры '
+            'не могут кешировать их надолго.',
+            hint='Используйте ManifestStaticFilesStorage.',
+            id='core.W006',
+        ))
+    return errors
+
+
+@register(PERFORMANCE, deploy=True)
+def check_middleware(app_configs, **kwargs):
+    errors = []
+    if not any(
+        middleware in settings.MIDDLEWARE
+        for middleware in COMPRESSION_MIDDLEWARE
+    ):
+        errors.append(Warning(
+            'Ответы отдаются без сжатия.',
+            id='core.W007',
+        ))
+    if CONDITIONAL_MIDDLEWARE not in settings.MIDDLEWARE:
+        errors.append(Warning(
+            'Не подключён ConditionalGetMiddleware: повторные запросы '
+            'не получают 304 Not Modified.',
+            id='core.W008',
+        ))
+    return errors
+
+
+def has_atomic_add(backend):
+    """Атомарны ли add и incr бэкенда кеша между процессами.
+
+    Бэкенд может сам объявить это атрибутом atomic_add.
+    """
+    if 'redis' in backend.lower():
+        return True
+    backend_class = import_string(backend)
+    return getattr(backend_class, 'atomic_add', False) or issubclass(
+        backend_class, (BaseMemcachedCache, LocMemCache)
+    )
+
+
+@register(PERFORMANCE, deploy=True)
+def check_cache_atomicity(app_configs, **kwargs):
+    """Блокировка cache_page_swr и счётчики ratelimit опираются на
+    атомарные add и incr; кеш в памяти процесса проверяет core.W005."""
+    return [
+        Warning(
+            f'Кеш {alias}: add и incr не атомарны между процессами, '
+            'поэтому страницу может одновременно пересчитать каждый '
+            'воркер, а лимиты запросов могут пропускать лишнее.',
+            hint=(
+                'Используйте memcached, redis или '
+                'core.cache.InstrumentedFileBasedCache в CACHE_BACKEND.'
+            ),
+            id='core.W009',
+        )
+        for alias, cache in settings.CACHES.items()
+        if not has_atomic_add(cache['BACKEND'])
+    ]
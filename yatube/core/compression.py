@@ -0,0 +1,59 @@
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.html', '.txt', '.json', '.xml', '.ico', '.map'
+)
+MIN_COMPRESS_SIZE = 200
+PROTECTED_BLOCK = re.compile(
+    r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.DOTALL | re.IGNORECASE
+)
+WHITESPACE = re.compile(r'\s+')
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli else ('gzip',)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data)
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def accepted_encodings(accept_encoding):
+    """Кодировки из Accept-Encoding в порядке предпочтения сервера."""
+    accepted = {
+        item.split(';')[0].strip().lower()
+        for item in re.split(r',\s*', accept_encoding or '')
+        if not re.search(r';\s*q=0(\.0*)?$', item)
+    }
+    return [
+        encoding for encoding in available_encodings()
+        if encoding in accepted
+    ]
+
+
+def collapse_whitespace(match):
+    return '\n' if '\n' in match.group() else ' '
+
+
+def minify_html(html):
+    """Сжимает пробельные символы вне pre, textarea, script и style.
+
+    Последовательность пробелов заменяется одним пробелом или переводом
+    строки, поэтому отображение строчных элементов не меняется.
+    """
+    parts = PROTECTED_BLOCK.split(html)
+    result = []
+    for i in range(0, len(parts), 3):
+        result.append(WHITESPACE.sub(collapse_whitespace, parts[i]))
+        if i + 1 < len(parts):
+            result.append(parts[i + 1])
+    return ''.join(result)
@@ -0,0 +1,312 @@
+import asyncio
+import itertools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .asgi import ASGI_ENVIRON_KEY
+from .models import Event
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE = b': keepalive\n\n'
+CLEANUP_PROBABILITY = 0.01
+
+
+def format_event(event):
+    data = json.dumps(event['data'], ensure_ascii=False)
+    return (
+        f'id: {event["id"]}\nevent: {event["kind"]}\ndata: {data}\n\n'
+    ).encode()
+
+
+def pack_channels(channels):
+    return f' {" ".join(sorted(channels))} '
+
+
+def to_event(row):
+    return {
+        'id': row.pk,
+        'kind': row.kind,
+        'channels': row.channels.split(),
+        'data': json.loads(row.data),
+    }
+
+
+class Subscription:
+    """Очередь событий одного соединения по набору каналов.
+
+    При переполнении очереди новые события теряются: клиент медленный,
+    а после переподключения догонит их по Last-Event-ID.
+    """
+
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(maxsize=settings.EVENTS['QUEUE_SIZE'])
+        self.waker = None
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            return
+        if self.waker is not None:
+            self.waker()
+
+    def drain(self):
+        events = []
+        while True:
+            try:
+                events.append(self.queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def wait(self, timeout):
+        try:
+            first = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return []
+        return [first] + self.drain()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """Публикация и раздача событий подписчикам процесса.
+
+    С бэкендом local события раздаются только внутри процесса. С
+    database они пишутся в таблицу Event, а фоновый поток каждого
+    процесса забирает новые строки и раздаёт их своим подписчикам.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+        self.counter = itertools.count(1)
+        self.poller = None
+        self.last_id = 0
+
+    @property
+    def uses_database(self):
+        return settings.EVENTS['BACKEND'] == 'database'
+
+    def subscribe(self, channels):
+        subscription = Subscription(self, channels)
+        with self.lock:
+            for channel in subscription.channels:
+                self.subscribers[channel].add(subscription)
+        if self.uses_database:
+            self.start_polling()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for channel in subscription.channels:
+                subscribers = self.subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.subscribers[channel]
+
+    def deliver(self, event):
+        with self.lock:
+            targets = set().union(*(
+                self.subscribers.get(channel, ()) for channel in
+                event['channels']
+            ))
+        for subscription in targets:
+            subscription.put(event)
+
+    def publish(self, channels, kind, data):
+        """Отправляет событие после фиксации текущей транзакции."""
+        channels = sorted(set(channels))
+        if self.uses_database:
+            transaction.on_commit(lambda: self.store(channels, kind, data))
+        else:
+            transaction.on_commit(lambda: self.deliver({
+                'id': next(self.counter),
+                'kind': kind,
+                'channels': channels,
+                'data': data,
+            }))
+
+    def store(self, channels, kind, data):
+        Event.objects.create(
+            kind=kind,
+            channels=pack_channels(channels),
+            data=json.dumps(data, ensure_ascii=False)
+        )
+        if random.random() < CLEANUP_PROBABILITY:
+            Event.objects.filter(created__lt=timezone.now() - timedelta(
+                seconds=settings.EVENTS['RETENTION']
+            )).delete()
+
+    def start_polling(self):
+        with self.lock:
+            if self.poller is not None and self.poller.is_alive():
+                return
+            self.last_id = Event.objects.aggregate(
+                last_id=Max('pk')
+            )['last_id'] or 0
+            self.poller = threading.Thread(target=self.poll, daemon=True)
+            self.poller.start()
+
+    def poll(self):
+        while True:
+            time.sleep(settings.EVENTS['POLL_INTERVAL'])
+            try:
+                self.poll_once()
+            except Exception:
+                logger.exception('Не удалось прочитать события')
+
+    def poll_once(self):
+        rows = Event.objects.filter(pk__gt=self.last_id).order_by('pk')[
+            :settings.EVENTS['QUEUE_SIZE']
+        ]
+        for row in rows:
+            self.last_id = row.pk
+            self.deliver(to_event(row))
+
+    def replay(self, channels, after_id):
+        """События, пропущенные клиентом и уже разосланные поллером."""
+        if not self.uses_database or not channels:
+            return []
+        query = Q()
+        for channel in channels:
+            query |= Q(channels__contains=f' {channel} ')
+        rows = Event.objects.filter(
+            query, pk__gt=after_id, pk__lte=self.last_id
+        ).order_by('-pk')[:settings.EVENTS['QUEUE_SIZE']]
+        return [to_event(row) for row in reversed(rows)]
+
+
+broker = Broker()
+
+
+def publish(channels, kind, data):
+    broker.publish(channels, kind, data)
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """Поток text/event-stream для подписки.
+
+    Под WSGI события ждутся в потоке запроса. ThreadPoolASGIHandler
+    забирает async_content и отдаёт поток из цикла событий, не занимая
+    поток пула. Через max_age секунд поток закрывается, и браузер
+    переподключается через retry секунд с Last-Event-ID.
+    """
+
+    def __init__(self, subscription, backlog=(), max_age=None, retry=None,
+                 cursor=None):
+        self.subscription = subscription
+        self.backlog = list(backlog)
+        self.max_age = settings.EVENTS['MAX_AGE'] if max_age is None else (
+            max_age
+        )
+        self.retry = settings.EVENTS['RETRY'] if retry is None else retry
+        self.cursor = cursor
+        super().__init__(
+            self.iter_events(), content_type='text/event-stream'
+        )
+        self['Cache-Control'] = 'no-cache'
+        self['X-Accel-Buffering'] = 'no'
+
+    def preamble(self):
+        retry = f'retry: {int(self.retry * 1000)}\n'
+        if self.cursor and not self.backlog:
+            # id без данных только задаёт Last-Event-ID переподключения.
+            retry += f'id: {self.cursor}\n'
+        return f'{retry}\n'.encode() + b''.join(
+            format_event(event) for event in self.backlog
+        )
+
+    def iter_events(self):
+        deadline = time.monotonic() + self.max_age
+        try:
+            yield self.preamble()
+            remaining = deadline - time.monotonic()
+            while remaining > 0:
+                events = self.subscription.wait(
+                    min(settings.EVENTS['KEEPALIVE'], remaining)
+                )
+                yield b''.join(map(format_event, events)) or KEEPALIVE
+                remaining = deadline - time.monotonic()
+        finally:
+            self.subscription.close()
+
+    async def async_content(self):
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(ready.set)
+            except RuntimeError:
+                pass
+
+        self.subscription.waker = wake
+        deadline = loop.time() + self.max_age
+        try:
+            yield self.preamble()
+            remaining = deadline - loop.time()
+            while remaining > 0:
+                events = self.subscription.drain()
+                if events:
+                    yield b''.join(map(format_event, events))
+                else:
+                    try:
+                        await asyncio.wait_for(ready.wait(), min(
+                            settings.EVENTS['KEEPALIVE'], remaining
+                        ))
+                    except asyncio.TimeoutError:
+                        yield KEEPALIVE
+                    ready.clear()
+                remaining = deadline - loop.time()
+        finally:
+            self.subscription.close()
+
+
+def streams_allowed(request):
+    """Можно ли держать поток EVENTS['MAX_AGE'] секунд.
+
+    Под ThreadPoolASGIHandler поток не занимает поток пула. Синхронный
+    воркер WSGI он занимает целиком, поэтому там долгие потоки
+    включаются явно через EVENTS['STREAM'].
+    """
+    return bool(
+        settings.EVENTS['STREAM'] or request.META.get(ASGI_ENVIRON_KEY)
+    )
+
+
+def event_stream(channels, last_event_id=None, long_lived=True):
+    """Ответ-поток событий каналов, начиная после last_event_id.
+
+    Короткий поток (long_lived=False) закрывается через
+    EVENTS['SHORT_MAX_AGE'] секунд, и браузер переподключается через
+    EVENTS['SHORT_RETRY']: получается опрос, который догоняет пропущенные
+    события по Last-Event-ID.
+    """
+    subscription = broker.subscribe(channels)
+    backlog = []
+    if last_event_id and last_event_id.isdigit():
+        backlog = broker.replay(subscription.channels, int(last_event_id))
+    cursor = broker.last_id if broker.uses_database else None
+    if long_lived:
+        return EventStreamResponse(subscription, backlog, cursor=cursor)
+    return EventStreamResponse(
+        subscription, backlog, settings.EVENTS['SHORT_MAX_AGE'],
+        settings.EVENTS['SHORT_RETRY'], cursor
+    )
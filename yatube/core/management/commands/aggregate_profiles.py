@@ -0,0 +1,53 @@
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.profiling import PROFILE_SUFFIX, profile_view_name, read_profile
+
+
+class Command(BaseCommand):
+    help = (
+        'Объединяет профили медленных запросов по представлениям в '
+        'файлы collapsed stacks для flamegraph'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory', default=settings.PROFILING['DIRECTORY']
+        )
+        parser.add_argument('--output')
+        parser.add_argument('--top', type=int, default=5)
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        output = options['output'] or os.path.join(directory, 'aggregated')
+        views = defaultdict(Counter)
+        profiles = Counter()
+        if os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                if entry.is_file() and entry.name.endswith(PROFILE_SUFFIX):
+                    view = profile_view_name(entry.name)
+                    views[view].update(read_profile(entry.path))
+                    profiles[view] += 1
+        if not views:
+            self.stdout.write('Профили не найдены')
+            return
+        os.makedirs(output, exist_ok=True)
+        for view, samples in sorted(views.items()):
+            filename = os.path.join(
+                output, f'{view.replace(":", ".")}{PROFILE_SUFFIX}'
+            )
+            with open(filename, 'w') as aggregated:
+                for stack, count in samples.most_common():
+                    aggregated.write(f'{stack} {count}\n')
+            self.stdout.write(
+                f'{view}: профилей {profiles[view]}, '
+                f'выборок {sum(samples.values())} -> {filename}'
+            )
+            leaves = Counter()
+            for stack, count in samples.items():
+                leaves[stack.rsplit(';', 1)[-1]] += count
+            for leaf, count in leaves.most_common(options['top']):
+                self.stdout.write(f'    {count:>6}  {leaf}')
@@ -0,0 +1,127 @@
+import asyncio
+import statistics
+import time
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+
+from core.asgi import DEFAULT_THREADS, ThreadPoolASGIHandler
+
+
+class SlowRequestsMiddleware:
+    """Имитирует медленный запрос (блокировка SQLite, генерация миниатюры)."""
+
+    def __init__(self, application, delay):
+        self.application = application
+        self.delay = delay
+
+    def __call__(self, environ, start_response):
+        if 'slow=1' in environ['QUERY_STRING']:
+            time.sleep(self.delay)
+        return self.application(environ, start_response)
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает синхронный WSGI-воркер и ASGI-обработчик с пулом '
+        'потоков на смеси медленных и быстрых запросов'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/about/author/')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--slow-ratio', type=float, default=0.1)
+        parser.add_argument('--slow-ms', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=DEFAULT_THREADS)
+
+    def handle(self, *args, **options):
+        application = SlowRequestsMiddleware(
+            WSGIHandler(), options['slow_ms'] / 1000
+        )
+        slow_every = (
+            round(1 / options['slow_ratio']) if options['slow_ratio'] else 0
+        )
+        queries = [
+            'slow=1' if slow_every and i % slow_every == 0 else 'slow=0'
+            for i in range(options['requests'])
+        ]
+        results = {
+            'WSGI (1 поток)': self.run_wsgi(
+                application, options['path'], queries
+            ),
+            f'ASGI ({options["threads"]} потоков)': asyncio.run(
+                self.run_asgi(
+                    ThreadPoolASGIHandler(application, options['threads']),
+                    options['path'],
+                    queries
+                )
+            ),
+        }
+        for name, (total, latencies) in results.items():
+            fast = [
+                latency for latency, query in zip(latencies, queries)
+                if query == 'slow=0'
+            ]
+            self.stdout.write(
+                f'{name}: {len(queries) / total:.1f} запросов/с, '
+                f'быстрые запросы p50={statistics.median(fast) * 1000:.1f} мс '
+                f'p95={percentile(fast, 95) * 1000:.1f} мс'
+            )
+
+    def run_wsgi(self, application, path, queries):
+        def start_response(status, headers, exc_info=None):
+            pass
+
+        latencies = []
+        started = time.perf_counter()
+        for query in queries:
+            request_started = time.perf_counter()
+            response = application(
+                {
+                    'REQUEST_METHOD': 'GET',
+                    'PATH_INFO': path,
+                    'QUERY_STRING': query,
+                    'SERVER_NAME': 'localhost',
+                    'SERVER_PORT': '80',
+                    'wsgi.input': None,
+                    'wsgi.url_scheme': 'http',
+                },
+                start_response
+            )
+            b''.join(response)
+            response.close()
+            latencies.append(time.perf_counter() - request_started)
+        return time.perf_counter() - started, latencies
+
+    async def run_asgi(self, handler, path, queries):
+        started = time.perf_counter()
+
+        async def request(query):
+            request_started = time.perf_counter()
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                pass
+
+            await handler(
+                {
+                    'type': 'http',
+                    'method': 'GET',
+                    'path': path,
+                    'query_string': query.encode(),
+                    'headers': [],
+                },
+                receive,
+                send
+            )
+            return time.perf_counter() - request_started
+
+        latencies = await asyncio.gather(*map(request, queries))
+        return time.perf_counter() - started, latencies
@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from core.ratelimit import ratelimit
+
+SCOPE = 'benchmark'
+RESPONSE = HttpResponse()
+
+
+@ratelimit(SCOPE)
+def limited_view(request):
+    return RESPONSE
+
+
+def plain_view(request):
+    return RESPONSE
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет накладные расходы ограничителя частоты на запрос, '
+        'который не упирается в лимит'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = {
+            'POST': factory.post('/'),
+            'GET': factory.get('/'),
+        }
+        for request in requests.values():
+            request.user = AnonymousUser()
+        policies = {SCOPE: {'ip': f'{options["iterations"] * 10}/m'}}
+        with override_settings(RATELIMIT={
+            **settings.RATELIMIT, 'POLICIES': policies
+        }):
+            baseline = self.measure(plain_view, requests['POST'], options)
+            results = {
+                'POST, учёт в кеше': self.measure(
+                    limited_view, requests['POST'], options
+                ),
+                'GET, метод без ограничения': self.measure(
+                    limited_view, requests['GET'], options
+                ),
+            }
+        self.stdout.write(
+            f'Бэкенд кеша: {settings.CACHES["default"]["BACKEND"]}'
+        )
+        for name, duration in results.items():
+            self.stdout.write(
+                f'{name:<30} {(duration - baseline) * 1e6:+.2f} мкс на запрос'
+            )
+
+    def measure(self, view, request, options):
+        """Лучшее из repeat средних времён вызова представления."""
+        iterations = options['iterations']
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                view(request)
+            timings.append((time.perf_counter() - started) / iterations)
+        return min(timings)
@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BOOT_MODULES = ('yatube.wsgi', 'yatube.urls')
+BOOT_SCRIPT = f'import {", ".join(BOOT_MODULES)}'
+
+
+def parse_importtime(output):
+    """Разбирает вывод python -X importtime в список (модуль, self, cumul)."""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_time), int(cumulative)))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время импорта при запуске воркера и сверяет его с '
+        'бюджетом settings.IMPORT_TIME_BUDGET'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15)
+
+    def handle(self, *args, **options):
+        budget = settings.IMPORT_TIME_BUDGET
+        # Прогрев импортирует отложенные модули нарочно; бюджет считается
+        # для воркера без него.
+        env = {
+            name: value for name, value in os.environ.items()
+            if name != 'YATUBE_PRELOAD'
+        }
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=env,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr)
+        modules = parse_importtime(result.stderr)
+        total_ms = sum(self_time for _, self_time, _ in modules) / 1000
+        heaviest = sorted(
+            (module for module in modules if module[0] not in BOOT_MODULES),
+            key=lambda module: module[2],
+            reverse=True
+        )
+        for name, _, cumulative in heaviest[:options['top']]:
+            self.stdout.write(f'{cumulative / 1000:>9.1f} мс  {name}')
+        self.stdout.write(
+            f'Всего: {total_ms:.1f} мс из {budget["TOTAL_MS"]} мс, '
+            f'модулей: {len(modules)}'
+        )
+        imported = {name for name, _, _ in modules}
+        eager = [
+            module for module in budget['DEFERRED_MODULES']
+            if module in imported
+        ]
+        errors = []
+        if total_ms > budget['TOTAL_MS']:
+            errors.append(
+                f'время импорта {total_ms:.1f} мс превышает бюджет '
+                f'{budget["TOTAL_MS"]} мс'
+            )
+        if eager:
+            errors.append(
+                'при запуске импортируются отложенные модули: '
+                + ', '.join(eager)
+            )
+        if errors:
+            raise CommandError('; '.join(errors))
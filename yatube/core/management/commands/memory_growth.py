@@ -0,0 +1,71 @@
+import gc
+import tracemalloc
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+
+from core.memory import GROUPINGS, format_size, format_stat, take_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет запрос к странице N раз и показывает, сколько памяти '
+        'осталось занято после сборки мусора и где она выделена'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--group-by', choices=GROUPINGS, default='lineno'
+        )
+
+    def handle(self, *args, **options):
+        path, query = (options['path'].split('?', 1) + [''])[:2]
+        application = WSGIHandler()
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start(settings.MEMORY_PROFILING['FRAMES'])
+        try:
+            self.drive(application, path, query, options['warmup'])
+            gc.collect()
+            before = take_snapshot()
+            self.drive(application, path, query, options['requests'])
+            gc.collect()
+            after = take_snapshot()
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+        stats = after.compare_to(before, options['group_by'])
+        growth = sum(stat.size_diff for stat in stats)
+        self.stdout.write(
+            f'Прирост после {options["requests"]} запросов: '
+            f'{format_size(growth)}, '
+            f'{format_size(growth / max(options["requests"], 1))} на запрос'
+        )
+        for stat in stats[:options['top']]:
+            self.stdout.write(format_stat(stat, diff=True))
+
+    def drive(self, application, path, query, count):
+        def start_response(status, headers, exc_info=None):
+            if not status.startswith('200'):
+                raise CommandError(f'{path} ответил {status}')
+
+        for _ in range(count):
+            response = application(
+                {
+                    'REQUEST_METHOD': 'GET',
+                    'PATH_INFO': path,
+                    'QUERY_STRING': query,
+                    'SERVER_NAME': 'localhost',
+                    'SERVER_PORT': '80',
+                    'wsgi.input': None,
+                    'wsgi.url_scheme': 'http',
+                },
+                start_response
+            )
+            b''.join(response)
+            response.close()
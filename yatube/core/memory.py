@@ -0,0 +1,138 @@
+import linecache
+import os
+import signal
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+
+IGNORED_FILES = (
+    tracemalloc.__file__,
+    linecache.__file__,
+    '<frozen importlib._bootstrap>',
+    '<frozen importlib._bootstrap_external>',
+    '<unknown>',
+)
+GROUPINGS = ('lineno', 'filename', 'traceback')
+
+_lock = threading.Lock()
+_previous = None
+
+
+def start_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(settings.MEMORY_PROFILING['FRAMES'])
+
+
+def take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, filename) for filename in IGNORED_FILES
+    ])
+
+
+def format_size(size):
+    for unit in ('Б', 'КиБ', 'МиБ'):
+        if abs(size) < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} ГиБ'
+
+
+def format_stat(stat, diff=False):
+    frame = stat.traceback[0]
+    if diff:
+        line = (
+            f'{format_size(stat.size_diff):>12} '
+            f'{stat.count_diff:+8d} блоков  всего {format_size(stat.size)}'
+        )
+    else:
+        line = f'{format_size(stat.size):>12} {stat.count:8d} блоков'
+    lines = [f'{line}  {frame.filename}:{frame.lineno}']
+    if len(stat.traceback) > 1:
+        lines.extend(
+            f'        {item.filename}:{item.lineno}'
+            for item in stat.traceback[1:]
+        )
+    return '\n'.join(lines)
+
+
+def memory_report(group_by='lineno', limit=None, diff=False):
+    """Самые крупные места выделения памяти в процессе.
+
+    С diff сравнивает со снимком предыдущего вызова; текущий снимок
+    становится новой базой для следующего сравнения.
+    """
+    global _previous
+    limit = limit or settings.MEMORY_PROFILING['TOP']
+    snapshot = take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    lines = [
+        f'PID {os.getpid()}, {time.strftime("%Y-%m-%d %H:%M:%S")}',
+        f'Отслеживается: {format_size(current)}, пик {format_size(peak)}',
+        '',
+    ]
+    with _lock:
+        previous, _previous = _previous, snapshot
+    if diff and previous is not None:
+        lines.append('Изменение с прошлого снимка:')
+        stats = snapshot.compare_to(previous, group_by)
+    else:
+        if diff:
+            lines.append('Прошлого снимка нет, он сохранён для сравнения.')
+        stats = snapshot.statistics(group_by)
+    lines.extend(format_stat(stat, diff and previous is not None)
+                 for stat in stats[:limit])
+    return '\n'.join(lines) + '\n'
+
+
+def dump_report(signum=None, frame=None):
+    """Пишет отчёт с разницей к прошлому снимку в каталог профилей.
+
+    Обработчик сигнала: kill -USR2 <pid> у работающего воркера.
+    """
+    directory = settings.MEMORY_PROFILING['DIRECTORY']
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(
+        directory, f'memory-{os.getpid()}-{int(time.time())}.txt'
+    )
+    with open(path, 'w', encoding='utf-8') as report:
+        report.write(memory_report(diff=True))
+    return path
+
+
+def install_signal_handler():
+    """Подключает dump_report к сигналу MEMORY_PROFILING['SIGNAL'].
+
+    Обработчик ставится только из главного потока; в других потоках
+    и на платформах без сигнала ничего не происходит.
+    """
+    name = settings.MEMORY_PROFILING['SIGNAL']
+    signum = getattr(signal, name, None) if name else None
+    if signum is None:
+        return False
+    try:
+        signal.signal(signum, dump_report)
+    except ValueError:
+        return False
+    return True
+
+
+class PeakTracker:
+    """Пиковый прирост отслеживаемой памяти за время запроса.
+
+    tracemalloc считает память всего процесса, поэтому при параллельных
+    запросах в пик попадают и чужие выделения. reset_peak появился в
+    Python 3.9; без него считается только прирост текущего объёма.
+    """
+
+    def __init__(self):
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self.start, _ = tracemalloc.get_traced_memory()
+
+    def stop(self):
+        current, peak = tracemalloc.get_traced_memory()
+        if not hasattr(tracemalloc, 'reset_peak'):
+            peak = current
+        return max(peak - self.start, 0)
@@ -0,0 +1,194 @@
+import threading
+import weakref
+from bisect import bisect_left
+
+TIME_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+MEMORY_BUCKETS = tuple(2 ** power for power in range(16, 28, 2))
+
+REGISTRY = []
+
+
+class ShardOwner:
+    """Живёт в threading.local потока и умирает вместе с потоком."""
+
+    __slots__ = ('rows', '__weakref__')
+
+    def __init__(self):
+        self.rows = {}
+
+
+def merge_rows(total, rows):
+    for labels, row in list(rows.items()):
+        merged = total.setdefault(labels, [0] * len(row))
+        for i, value in enumerate(row):
+            merged[i] += value
+
+
+class Metric:
+    """Метрика, накапливаемая в отдельном шарде для каждого потока.
+
+    Запись в метрику не берёт блокировок: поток меняет только свой шард,
+    а блокировка нужна лишь при регистрации нового потока. Шарды
+    складываются при экспорте. Шард завершившегося потока переносится
+    в общий итог, поэтому число шардов не растёт с числом потоков.
+    """
+
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._local = threading.local()
+        self._shards = {}
+        self._retired = {}
+        self._lock = threading.RLock()
+        REGISTRY.append(self)
+
+    def _shard(self):
+        try:
+            return self._local.owner.rows
+        except AttributeError:
+            owner = self._local.owner = ShardOwner()
+            with self._lock:
+                self._shards[id(owner.rows)] = owner.rows
+            weakref.finalize(owner, self._retire, owner.rows)
+            return owner.rows
+
+    def _retire(self, rows):
+        with self._lock:
+            self._shards.pop(id(rows), None)
+            merge_rows(self._retired, rows)
+
+    def _collect(self):
+        total = {}
+        with self._lock:
+            shards = list(self._shards.values())
+            merge_rows(total, self._retired)
+        for shard in shards:
+            merge_rows(total, shard)
+        return sorted(total.items())
+
+    def _format_labels(self, values, **extra):
+        pairs = list(zip(self.labels, values)) + list(extra.items())
+        if not pairs:
+            return ''
+        return '{%s}' % ','.join(
+            f'{name}="{escape_label(value)}"' for name, value in pairs
+        )
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.kind}'
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            row = shard[labels] = [0]
+        row[0] += amount
+
+    def expose(self):
+        yield from super().expose()
+        for labels, (value,) in self._collect():
+            yield f'{self.name}{self._format_labels(labels)} {value}'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=TIME_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            row = shard[labels] = [0] * (len(self.buckets) + 3)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-2] += value
+        row[-1] += 1
+
+    def expose(self):
+        yield from super().expose()
+        for labels, row in self._collect():
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, row):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket'
+                    f'{self._format_labels(labels, le=bound)} {cumulative}'
+                )
+            yield f'{self.name}_sum{self._format_labels(labels)} {row[-2]}'
+            yield f'{self.name}_count{self._format_labels(labels)} {row[-1]}'
+
+
+def escape_label(value):
+    return str(value).replace('\\', r'\\').replace(
+        '"', r'\"'
+    ).replace('\n', r'\n')
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return '\n'.join(lines) + '\n'
+
+
+VIEW_DURATION = Histogram(
+    'yatube_view_duration_seconds',
+    'Время обработки запроса представлением.',
+    ('view',)
+)
+SQL_DURATION = Histogram(
+    'yatube_view_sql_duration_seconds',
+    'Суммарное время SQL-запросов за один запрос.',
+    ('view',)
+)
+SQL_QUERIES = Histogram(
+    'yatube_view_sql_queries',
+    'Количество SQL-запросов за один запрос.',
+    ('view',),
+    buckets=COUNT_BUCKETS
+)
+TEMPLATE_DURATION = Histogram(
+    'yatube_template_render_seconds',
+    'Время отрисовки шаблона.',
+    ('template',)
+)
+CACHE_REQUESTS = Counter(
+    'yatube_cache_requests_total',
+    'Обращения к кешу по префиксу ключа.',
+    ('prefix', 'result')
+)
+VIEW_CACHE = Counter(
+    'yatube_view_cache_total',
+    'Ответы кеша представлений: hit, miss, early, stale, stale_error, wait.',
+    ('view', 'result')
+)
+REQUEST_MEMORY_PEAK = Histogram(
+    'yatube_request_memory_peak_bytes',
+    'Пиковый прирост памяти за запрос по данным tracemalloc.',
+    ('view',),
+    buckets=MEMORY_BUCKETS
+)
+THUMBNAIL_DURATION = Histogram(
+    'yatube_thumbnail_generation_seconds',
+    'Время генерации миниатюры.',
+    ('geometry',)
+)
+RATELIMITED = Counter(
+    'yatube_ratelimited_total',
+    'Запросы, отклонённые ограничителем частоты.',
+    ('scope',)
+)
@@ -0,0 +1,197 @@
+import hashlib
+import random
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.utils.cache import get_max_age, patch_vary_headers
+
+from .compression import (
+    MIN_COMPRESS_SIZE, accepted_encodings, compress, minify_html
+)
+from .memory import PeakTracker, install_signal_handler, start_tracing
+from .metrics import (
+    REQUEST_MEMORY_PEAK, SQL_DURATION, SQL_QUERIES, VIEW_DURATION
+)
+from .profiling import StackSampler, write_profile
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Собирает время ответа, время и число SQL-запросов по представлениям."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        duration = perf_counter() - started
+        view = get_view_name(request)
+        VIEW_DURATION.observe(duration, view)
+        SQL_DURATION.observe(timer.duration, view)
+        SQL_QUERIES.observe(timer.count, view)
+        return response
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else 'unresolved'
+
+
+class ProfilingMiddleware:
+    """Снимает профиль запросов дольше порога представления.
+
+    Профиль также пишется для случайной доли запросов (SAMPLE_RATE) и по
+    заголовку X-Profile от сотрудников. Запрос без единого снятого стека
+    профиля не оставляет.
+    """
+
+    def __init__(self, get_response):
+        self.config = settings.PROFILING
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = StackSampler(self.config['INTERVAL'])
+
+    def __call__(self, request):
+        forced = (
+            random.random() < self.config['SAMPLE_RATE']
+            or 'HTTP_X_PROFILE' in request.META and request.user.is_staff
+        )
+        thread_id = threading.get_ident()
+        self.sampler.start(thread_id)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            samples = self.sampler.stop(thread_id)
+        duration = perf_counter() - started
+        view = get_view_name(request)
+        threshold = self.config['THRESHOLDS'].get(
+            view, self.config['DEFAULT_THRESHOLD']
+        )
+        slow = threshold is not None and duration >= threshold
+        if samples and (forced or slow):
+            write_profile(
+                self.config['DIRECTORY'],
+                view,
+                samples,
+                self.config['MAX_FILES']
+            )
+        return response
+
+
+class MemoryProfilingMiddleware:
+    """Записывает пиковый прирост памяти запросов через tracemalloc.
+
+    Измеряется случайная доля запросов (SAMPLE_RATE) и запросы
+    сотрудников с заголовком X-Memory-Profile; им пик возвращается в
+    заголовке X-Memory-Peak.
+    """
+
+    def __init__(self, get_response):
+        self.config = settings.MEMORY_PROFILING
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        start_tracing()
+        install_signal_handler()
+
+    def __call__(self, request):
+        requested = (
+            'HTTP_X_MEMORY_PROFILE' in request.META and request.user.is_staff
+        )
+        if not requested and random.random() >= self.config['SAMPLE_RATE']:
+            return self.get_response(request)
+        tracker = PeakTracker()
+        response = self.get_response(request)
+        peak = tracker.stop()
+        REQUEST_MEMORY_PEAK.observe(peak, get_view_name(request))
+        if requested:
+            response['X-Memory-Peak'] = str(peak)
+        return response
+
+
+class CompressionMiddleware:
+    """Минифицирует HTML и сжимает ответы gzip или brotli.
+
+    Для ответов, которые можно кешировать (например, из cache_page),
+    готовое тело сохраняется в кеше по хешу исходного содержимого, так
+    что закешированная страница сжимается один раз, а не на каждый запрос.
+    """
+
+    key = 'compressed:{}:{}'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.streaming
+            or response.status_code != 200
+            or response.has_header('Content-Encoding')
+        ):
+            return response
+        content_type = response.get('Content-Type', '')
+        html = content_type.startswith('text/html')
+        compressible = html or content_type.startswith((
+            'text/', 'application/json', 'application/javascript'
+        ))
+        if not compressible:
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encodings = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING')
+        )
+        encoding = encodings[0] if encodings else 'identity'
+        if len(response.content) < MIN_COMPRESS_SIZE:
+            return response
+        timeout = get_max_age(response)
+        key = None
+        if timeout:
+            key = self.key.format(
+                hashlib.md5(response.content).hexdigest(), encoding
+            )
+            content = cache.get(key)
+            if content is not None:
+                return self.replace_content(response, content, encoding)
+        content = response.content
+        if html:
+            content = minify_html(
+                content.decode(response.charset)
+            ).encode(response.charset)
+        if encoding != 'identity':
+            content = compress(content, encoding)
+        if key:
+            cache.set(key, content, timeout)
+        return self.replace_content(response, content, encoding)
+
+    def replace_content(self, response, content, encoding):
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+            etag = response.get('ETag')
+            if etag and not etag.startswith('W/'):
+                response['ETag'] = 'W/' + etag
+        return response
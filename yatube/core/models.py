@@ -0,0 +1,18 @@
+from django.db import models
+
+
+class Event(models.Model):
+    """Уведомление для живых лент, общее для всех процессов.
+
+    channels хранит каналы через пробел с пробелами по краям, чтобы
+    подписку на канал можно было найти по вхождению ' канал '.
+    """
+    kind = models.CharField('Тип', max_length=32)
+    channels = models.TextField('Каналы')
+    data = models.TextField('Данные')
+    created = models.DateTimeField('Создано', auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['pk']
+        verbose_name = 'Событие'
+        verbose_name_plural = 'События'
@@ -0,0 +1,24 @@
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+EXACT_COUNT_LIMIT = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор без полного COUNT(*) по большим таблицам.
+
+    До EXACT_COUNT_LIMIT строк число считается точно запросом с LIMIT.
+    Дальше для выборки без фильтров берётся наибольший первичный ключ,
+    а для отфильтрованной число останавливается на пороге.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        count = queryset[:EXACT_COUNT_LIMIT + 1].count()
+        if count <= EXACT_COUNT_LIMIT:
+            return count
+        if not queryset.query.where:
+            return queryset.aggregate(last=Max('pk'))['last']
+        return EXACT_COUNT_LIMIT
@@ -0,0 +1,159 @@
+import inspect
+import logging
+import os
+import queue
+import tempfile
+import threading
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection, transaction
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import Resolver404, resolve
+
+from .compression import (
+    ENCODING_SUFFIXES, MIN_COMPRESS_SIZE, available_encodings, compress,
+    minify_html
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'index.html'
+
+_queue = queue.Queue()
+_pending = set()
+_lock = threading.Lock()
+_worker = None
+
+
+def page_file(path):
+    """Файл страницы в PRERENDER['ROOT'] или None для недопустимого пути."""
+    root = os.path.abspath(settings.PRERENDER['ROOT'])
+    parts = [part for part in path.split('/') if part]
+    if any(part in ('.', '..') for part in parts):
+        return None
+    return os.path.join(root, *parts, INDEX_FILE)
+
+
+def render_page(path):
+    """HTML страницы для анонимного посетителя или None, если её нет.
+
+    Представление вызывается напрямую: промежуточные слои и кеш страниц
+    пропускаются, чтобы файл не собирался из устаревшего ответа.
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return None
+    view = match.func
+    if not hasattr(view, 'view_class'):
+        view = inspect.unwrap(view)
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    request.resolver_match = match
+    try:
+        response = view(request, *match.args, **match.kwargs)
+    except Http404:
+        return None
+    if hasattr(response, 'render'):
+        response.render()
+    if response.status_code != 200:
+        return None
+    return minify_html(
+        response.content.decode(response.charset)
+    ).encode(response.charset)
+
+
+def write_atomic(filename, data):
+    descriptor, temp = tempfile.mkstemp(dir=os.path.dirname(filename))
+    with os.fdopen(descriptor, 'wb') as target:
+        target.write(data)
+    os.chmod(temp, 0o644)
+    os.replace(temp, filename)
+
+
+def remove_variants(filename, encodings):
+    for encoding in encodings:
+        variant = filename + ENCODING_SUFFIXES[encoding]
+        if os.path.exists(variant):
+            os.remove(variant)
+
+
+def write_page(filename, content):
+    """Записывает страницу и её сжатые варианты, заменяя файлы атомарно."""
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    write_atomic(filename, content)
+    stale = set(ENCODING_SUFFIXES)
+    if len(content) >= MIN_COMPRESS_SIZE:
+        for encoding in available_encodings():
+            compressed = compress(content, encoding)
+            if len(compressed) < len(content):
+                suffix = ENCODING_SUFFIXES[encoding]
+                write_atomic(filename + suffix, compressed)
+                stale.discard(encoding)
+    remove_variants(filename, stale)
+
+
+def remove_page(filename):
+    if os.path.exists(filename):
+        os.remove(filename)
+    remove_variants(filename, ENCODING_SUFFIXES)
+
+
+def regenerate_page(path):
+    """Перестраивает файл страницы; исчезнувшая страница удаляется."""
+    filename = page_file(path)
+    if filename is None:
+        return
+    content = render_page(path)
+    if content is None:
+        remove_page(filename)
+    else:
+        write_page(filename, content)
+
+
+def regenerate(paths):
+    for path in sorted(set(paths)):
+        try:
+            regenerate_page(path)
+        except Exception:
+            logger.exception('Не удалось перестроить страницу %s', path)
+
+
+def schedule(paths):
+    """Перестраивает страницы после фиксации текущей транзакции.
+
+    При PRERENDER['BACKGROUND'] страницы собирает фоновый поток, а
+    одинаковые пути, ожидающие в очереди, объединяются.
+    """
+    paths = set(paths)
+    if paths:
+        transaction.on_commit(lambda: dispatch(paths))
+
+
+def dispatch(paths):
+    global _worker
+    if not settings.PRERENDER['BACKGROUND']:
+        regenerate(paths)
+        return
+    with _lock:
+        fresh = paths - _pending
+        _pending.update(fresh)
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=work, daemon=True)
+            _worker.start()
+    for path in fresh:
+        _queue.put(path)
+
+
+def work():
+    while True:
+        path = _queue.get()
+        with _lock:
+            _pending.discard(path)
+        try:
+            regenerate([path])
+        finally:
+            if _queue.empty():
+                connection.close()
@@ -0,0 +1,103 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_SUFFIX = '.folded'
+
+
+def frame_label(frame):
+    code = frame.f_code
+    filename = os.path.basename(code.co_filename)
+    return f'{code.co_name} ({filename}:{code.co_firstlineno})'
+
+
+def collapse_stack(frame):
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Статистический профилировщик потоков, обрабатывающих запросы.
+
+    Один фоновый поток раз в interval секунд снимает стеки
+    зарегистрированных потоков через sys._current_frames(), поэтому
+    стоимость профилирования не зависит от числа вызовов функций. Пока
+    нет профилируемых запросов, поток спит на условии и не просыпается.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.samples = {}
+        self._lock = threading.Condition()
+        self._thread = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self.samples[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='stack-sampler', daemon=True
+                )
+                self._thread.start()
+            self._lock.notify()
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self.samples.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self.samples:
+                    self._lock.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, counter in self.samples.items():
+                    frame = frames.get(thread_id)
+                    if frame is not None:
+                        counter[collapse_stack(frame)] += 1
+
+
+def write_profile(directory, view, samples, max_files):
+    """Сохраняет стеки в формате collapsed stacks (flamegraph.pl)."""
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(
+        directory,
+        f'{view.replace(":", ".")}@{time.time_ns()}-{os.getpid()}'
+        f'{PROFILE_SUFFIX}'
+    )
+    with open(filename, 'w') as profile:
+        for stack, count in samples.most_common():
+            profile.write(f'{stack} {count}\n')
+    rotate_profiles(directory, max_files)
+    return filename
+
+
+def rotate_profiles(directory, max_files):
+    profiles = sorted(
+        (entry for entry in os.scandir(directory)
+         if entry.name.endswith(PROFILE_SUFFIX)),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in profiles[:max(0, len(profiles) - max_files)]:
+        os.remove(entry.path)
+
+
+def read_profile(path):
+    samples = Counter()
+    with open(path) as profile:
+        for line in profile:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            if stack:
+                samples[stack] += int(count)
+    return samples
+
+
+def profile_view_name(filename):
+    return filename.rpartition('@')[0].replace('.', ':')
@@ -0,0 +1,144 @@
+import ipaddress
+import math
+import time
+from functools import lru_cache, wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+from .metrics import RATELIMITED
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+RATELIMIT_KEY = 'ratelimit:{}:{}:{}'
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Разбирает ограничение вида '10/m' в пару (лимит, период в секундах)."""
+    limit, _, period = rate.partition('/')
+    return int(limit), PERIODS[period]
+
+
+def count_hit(key, timeout):
+    """Атомарно увеличивает счётчик окна, создавая его при первом запросе."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def hit(key, limit, period, now):
+    """Учитывает запрос в скользящем окне.
+
+    Число запросов оценивается как счётчик текущего окна плюс счётчик
+    предыдущего, взвешенный долей, которая ещё попадает в окно. Возвращает
+    0, если лимит не превышен, иначе число секунд до следующей попытки.
+    """
+    window, elapsed = divmod(now, period)
+    window = int(window)
+    current = count_hit(f'{key}:{window}', period * 2)
+    previous = cache.get(f'{key}:{window - 1}', 0)
+    if previous * (1 - elapsed / period) + current <= limit:
+        return 0
+    if current <= limit:
+        wait = period * (1 - (limit - current) / previous) - elapsed
+    else:
+        wait = period - elapsed + period * (1 - (limit - 1) / current)
+    return max(1, math.ceil(wait))
+
+
+@lru_cache(maxsize=None)
+def get_trusted_networks(proxies):
+    return [ipaddress.ip_network(proxy, strict=False) for proxy in proxies]
+
+
+def is_trusted(address, networks):
+    return any(address in network for network in networks)
+
+
+def get_client_ip(request):
+    """Адрес клиента с учётом доверенных прокси из TRUSTED_PROXIES.
+
+    X-Forwarded-For читается справа налево, пока адреса принадлежат
+    доверенным прокси: левее первого чужого адреса значения мог подставить
+    сам клиент. Без X-Forwarded-For используется X-Real-IP. Заголовки
+    от недоверенного REMOTE_ADDR игнорируются.
+    """
+    remote = request.META.get('REMOTE_ADDR')
+    networks = get_trusted_networks(tuple(settings.TRUSTED_PROXIES))
+    try:
+        client = ipaddress.ip_address(remote)
+    except ValueError:
+        return remote
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR') or (
+        request.META.get('HTTP_X_REAL_IP', '')
+    )
+    hops = [hop.strip() for hop in forwarded.split(',') if hop.strip()]
+    while hops and is_trusted(client, networks):
+        try:
+            client = ipaddress.ip_address(hops.pop())
+        except ValueError:
+            break
+    return str(client)
+
+
+def get_identities(request):
+    if request.user.is_authenticated:
+        yield 'user', request.user.pk
+        # Пока TRUSTED_PROXIES не заданы, за прокси все запросы приходят
+        # с его адреса, и вошедшие пользователи делили бы один лимит.
+        if not settings.TRUSTED_PROXIES:
+            return
+    yield 'ip', get_client_ip(request)
+
+
+def check_rate(request, scope):
+    """Учитывает запрос во всех политиках scope.
+
+    Возвращает 0 или наибольшее время ожидания среди превышенных политик.
+    """
+    config = settings.RATELIMIT
+    policy = config['POLICIES'].get(scope)
+    if not config['ENABLED'] or not policy:
+        return 0
+    now = time.time()
+    retry_after = 0
+    for kind, identity in get_identities(request):
+        rate = policy.get(kind)
+        if rate:
+            limit, period = parse_rate(rate)
+            retry_after = max(retry_after, hit(
+                RATELIMIT_KEY.format(scope, kind, identity),
+                limit, period, now
+            ))
+    if retry_after:
+        RATELIMITED.inc(scope)
+    return retry_after
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after}, status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def ratelimit(scope, methods=('POST',)):
+    """Ограничивает частоту запросов к представлению по политике scope.
+
+    Запросы других методов проходят без обращения к кешу.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = check_rate(request, scope)
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,87 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+from urllib.parse import unquote
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+
+from .compression import ENCODING_SUFFIXES, accepted_encodings
+
+FOREVER = 'public, max-age=31536000, immutable'
+SHORT = 'public, max-age=60'
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+BLOCK_SIZE = 64 * 1024
+
+
+class StaticFilesMiddleware:
+    """WSGI-слой, отдающий статику и медиа мимо Django.
+
+    Кеширование на год выставляется только статике с хешем в имени
+    (collectstatic). Медиа отдаются с коротким сроком и ETag: удалённую
+    картинку может заменить новая с тем же именем, а миниатюра sorl при
+    перегенерации сохраняет имя. Предсжатые копии выбираются по
+    Accept-Encoding, а тело отдаётся через wsgi.file_wrapper, который
+    gunicorn реализует через sendfile().
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.mounts = [
+            (settings.STATIC_URL, settings.STATIC_ROOT, True),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT, False),
+        ]
+
+    def __call__(self, environ, start_response):
+        path = unquote(environ.get('PATH_INFO', ''))
+        for url, root, hashed_names in self.mounts:
+            if root and path.startswith(url):
+                if environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+                    break
+                served = self.serve(
+                    environ, start_response, root, path[len(url):],
+                    hashed_names
+                )
+                if served is not None:
+                    return served
+                break
+        return self.application(environ, start_response)
+
+    def serve(self, environ, start_response, root, name, hashed_names):
+        root = os.path.realpath(root)
+        path = os.path.realpath(os.path.join(root, name))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Vary', 'Accept-Encoding'),
+            (
+                'Cache-Control',
+                FOREVER if hashed_names and HASHED_NAME.search(name)
+                else SHORT
+            ),
+        ]
+        for encoding in accepted_encodings(
+            environ.get('HTTP_ACCEPT_ENCODING')
+        ):
+            if os.path.isfile(path + ENCODING_SUFFIXES[encoding]):
+                path += ENCODING_SUFFIXES[encoding]
+                headers.append(('Content-Encoding', encoding))
+                break
+        stat = os.stat(path)
+        etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+        headers += [
+            ('ETag', etag),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+        ]
+        if environ.get('HTTP_IF_NONE_MATCH') == etag:
+            start_response('304 Not Modified', headers)
+            return []
+        headers.append(('Content-Length', str(stat.st_size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return file_wrapper(open(path, 'rb'), BLOCK_SIZE)
@@ -0,0 +1,45 @@
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .compression import (
+    COMPRESSIBLE_EXTENSIONS, ENCODING_SUFFIXES, MIN_COMPRESS_SIZE,
+    available_encodings, compress
+)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище статики с хешем в имени и предсжатыми копиями файлов.
+
+    Рядом с каждым текстовым файлом collectstatic кладёт .gz (и .br, если
+    установлен brotli), чтобы сервер не сжимал их на каждом запросе.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in hashed_names:
+            self.write_compressed(name)
+
+    def write_compressed(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for encoding in available_encodings():
+            compressed = compress(data, encoding)
+            if len(compressed) < len(data):
+                with open(path + ENCODING_SUFFIXES[encoding], 'wb') as target:
+                    target.write(compressed)
+            elif os.path.exists(path + ENCODING_SUFFIXES[encoding]):
+                os.remove(path + ENCODING_SUFFIXES[encoding])
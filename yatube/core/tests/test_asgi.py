@@ -0,0 +1,103 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from ..asgi import ASGI_ENVIRON_KEY, ThreadPoolASGIHandler, build_environ
+
+
+def run(handler, scope, messages, sent=None):
+    """Выполняет запрос и возвращает отправленные обработчиком сообщения."""
+    incoming = list(messages)
+    sent = [] if sent is None else sent
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(handler(scope, receive, send))
+    return sent
+
+
+def http_scope(**extra):
+    return {
+        'type': 'http', 'method': 'POST', 'path': '/echo/',
+        'query_string': b'a=1', 'headers': [], **extra,
+    }
+
+
+class ThreadPoolASGIHandlerTests(SimpleTestCase):
+    def setUp(self):
+        self.environ = None
+
+        def application(environ, start_response):
+            self.environ = environ
+            start_response('201 Created', [('X-Echo', 'yes')])
+            return [b'body: ', environ['wsgi.input'].read()]
+
+        self.handler = ThreadPoolASGIHandler(application, threads=1)
+
+    def test_body_and_response(self):
+        """Тело из нескольких сообщений собирается, ответ отправляется"""
+        sent = run(self.handler, http_scope(), [
+            {'type': 'http.request', 'body': b'abc', 'more_body': True},
+            {'type': 'http.request', 'body': b'def'},
+        ])
+        self.assertEqual(sent[0], {
+            'type': 'http.response.start', 'status': 201,
+            'headers': [(b'x-echo', b'yes')],
+        })
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            b'body: abcdef'
+        )
+        self.assertFalse(sent[-1].get('more_body'))
+        self.assertEqual(self.environ['QUERY_STRING'], 'a=1')
+        self.assertTrue(self.environ[ASGI_ENVIRON_KEY])
+
+    def test_headers(self):
+        """Заголовки переводятся в environ, повторные склеиваются"""
+        environ = build_environ(http_scope(
+            headers=[
+                (b'content-type', b'text/plain'),
+                (b'x-tag', b'a'), (b'x-tag', b'b'),
+                (b'cookie', b'sessionid=1'), (b'cookie', b'csrftoken=2'),
+            ],
+            client=('10.0.0.1', 5000), server=('example.com', 8000),
+        ), None)
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_X_TAG'], 'a,b')
+        self.assertEqual(environ['HTTP_COOKIE'], 'sessionid=1; csrftoken=2')
+        self.assertEqual(environ['REMOTE_ADDR'], '10.0.0.1')
+        self.assertEqual(
+            (environ['SERVER_NAME'], environ['SERVER_PORT']),
+            ('example.com', '8000')
+        )
+
+    def test_lifespan(self):
+        """Обработчик подтверждает запуск и остановку"""
+        sent = run(self.handler, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'},
+            {'type': 'lifespan.shutdown'},
+        ])
+        self.assertEqual([message['type'] for message in sent], [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete',
+        ])
+
+    def test_errors(self):
+        """Неизвестный тип соединения и ошибка приложения не глотаются"""
+        with self.assertRaises(ValueError):
+            run(self.handler, {'type': 'websocket'}, [])
+
+        def broken(environ, start_response):
+            raise RuntimeError('сбой')
+
+        sent = []
+        with self.assertRaises(RuntimeError):
+            run(ThreadPoolASGIHandler(broken, threads=1), http_scope(), [
+                {'type': 'http.request', 'body': b''},
+            ], sent)
+        self.assertEqual(sent, [])
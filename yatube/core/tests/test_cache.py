@@ -0,0 +1,141 @@
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import OperationalError
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..cache import (
+    InstrumentedFileBasedCache, acquire_lock, cache_page_swr, release_lock,
+    view_cache_key
+)
+from ..metrics import VIEW_CACHE
+
+
+class CountingView:
+    def __init__(self):
+        self.calls = 0
+        self.error = None
+
+    def __call__(self, request):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return HttpResponse(f'ответ {self.calls}')
+
+
+@override_settings(VIEW_CACHE={**settings.VIEW_CACHE, 'WAIT': 0})
+class CachePageSWRTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.view = CountingView()
+        self.cached_view = cache_page_swr(20, key_prefix='test_page')(
+            self.view
+        )
+        self.request = RequestFactory().get('/')
+        self.request.user = AnonymousUser()
+        self.key = view_cache_key(self.request, 'test_page')
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self):
+        return self.cached_view(self.request).content.decode()
+
+    def expire(self):
+        entry = cache.get(self.key)
+        entry['expires'] = 0
+        cache.set(self.key, entry)
+
+    def count(self, result):
+        return dict(VIEW_CACHE._collect()).get(('test_page', result), [0])[0]
+
+    def test_hit_after_miss(self):
+        """Повторный запрос берётся из кеша и учитывается как hit"""
+        hits = self.count('hit')
+        self.assertEqual([self.get(), self.get()], ['ответ 1', 'ответ 1'])
+        self.assertEqual(self.view.calls, 1)
+        self.assertEqual(self.count('hit'), hits + 1)
+
+    def test_stale_while_another_request_recomputes(self):
+        """Пока страницу пересчитывает другой запрос, отдаётся старая копия"""
+        self.get()
+        self.expire()
+        cache.add(f'{self.key}:lock', True)
+        self.assertEqual(self.get(), 'ответ 1')
+        self.assertEqual(self.view.calls, 1)
+
+    def test_expired_entry_recomputed_once(self):
+        """Устаревшую страницу пересчитывает запрос, взявший блокировку"""
+        self.get()
+        self.expire()
+        self.assertEqual([self.get(), self.get()], ['ответ 2', 'ответ 2'])
+
+    def test_early_refresh(self):
+        """Долгий пересчёт обновляет страницу до истечения срока"""
+        self.get()
+        entry = cache.get(self.key)
+        entry['delta'] = 1000
+        cache.set(self.key, entry)
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertEqual(self.get(), 'ответ 2')
+
+    def test_stale_if_error(self):
+        """При ошибке базы отдаётся устаревшая копия, без неё - ошибка"""
+        self.get()
+        self.expire()
+        self.view.error = OperationalError('database is locked')
+        with self.assertLogs('core.cache', 'ERROR'):
+            self.assertEqual(self.get(), 'ответ 1')
+        cache.clear()
+        with self.assertRaises(OperationalError):
+            self.get()
+
+    def test_process_lock_without_atomic_add(self):
+        """Если cache.add не атомарен, пересчёт в процессе всё равно один"""
+        with mock.patch('core.cache.cache.add', return_value=True):
+            self.assertTrue(acquire_lock(self.key))
+            self.assertFalse(acquire_lock(self.key))
+            release_lock(self.key)
+            self.assertTrue(acquire_lock(self.key))
+        release_lock(self.key)
+
+
+class LockedFileBasedCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.cache = InstrumentedFileBasedCache(directory, {})
+
+    def run_threads(self, target, count=8):
+        threads = [threading.Thread(target=target) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_add_and_incr_atomic(self):
+        """Одновременные add удаются один раз, incr не теряет прибавок"""
+        added = []
+        self.run_threads(lambda: added.append(self.cache.add('lock', 1)))
+        self.assertEqual(added.count(True), 1)
+        self.cache.set('counter', 0)
+
+        def increment():
+            for _ in range(25):
+                self.cache.incr('counter')
+
+        self.run_threads(increment)
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    def test_lock_files_not_culled(self):
+        """Файлы блокировок не считаются записями кеша"""
+        self.cache.add('key', 1)
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 2))
@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase, override_settings
+
+from ..checks import (
+    check_cache_atomicity, check_middleware, check_storages, check_templates
+)
+
+
+class PerformanceChecksTests(SimpleTestCase):
+    def test_dev_settings_reported(self):
+        """Настройки разработки дают предупреждения"""
+        errors = check_storages(None) + check_middleware(None)
+        self.assertEqual(
+            {error.id for error in errors},
+            {'core.W004', 'core.W005', 'core.W006', 'core.W007',
+             'core.W008'}
+        )
+
+    @override_settings(
+        DATABASES={'default': {
+            'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 60
+        }},
+        CACHES={'default': {
+            'BACKEND': 'core.cache.InstrumentedFileBasedCache',
+            'LOCATION': '/tmp/yatube-cache',
+        }},
+        STATICFILES_STORAGE=(
+            'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'
+        ),
+    )
+    def test_production_storages_pass(self):
+        """Постоянные соединения, общий кеш и манифест статики проходят"""
+        self.assertEqual(check_storages(None), [])
+
+    def test_cached_loader_detected(self):
+        """Явно заданный cached.Loader не вызывает предупреждения"""
+        with self.settings(TEMPLATES=[{
+            'BACKEND': 'django.template.backends.django.DjangoTemplates',
+            'OPTIONS': {'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                ]),
+            ]},
+        }]):
+            self.assertEqual(check_templates(None), [])
+
+    def test_non_atomic_cache_reported(self):
+        """Файловый кеш без атомарного add даёт предупреждение"""
+        caches = {
+            'django.core.cache.backends.filebased.FileBasedCache': [
+                'core.W009'
+            ],
+            'core.cache.InstrumentedFileBasedCache': [],
+            'django.core.cache.backends.memcached.PyLibMCCache': [],
+            'django.core.cache.backends.memcached.MemcachedCache': [],
+            'django_redis.cache.RedisCache': [],
+        }
+        for backend, expected in caches.items():
+            with self.subTest(backend=backend):
+                with self.settings(CACHES={'default': {
+                    'BACKEND': backend, 'LOCATION': '/tmp/yatube-cache',
+                }}):
+                    self.assertEqual(
+                        [error.id for error in check_cache_atomicity(None)],
+                        expected
+                    )
@@ -0,0 +1,59 @@
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..compression import minify_html
+
+
+@override_settings(
+    MIDDLEWARE=['core.middleware.CompressionMiddleware'] + settings.MIDDLEWARE
+)
+class CompressionMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_html_minified_and_gzipped(self):
+        """HTML-страница минифицируется и сжимается gzip"""
+        response = self.client.get(
+            reverse('about:author'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        html = gzip.decompress(response.content).decode()
+        self.assertIn('<html lang="ru">', html)
+        self.assertNotIn('  ', html)
+
+    def test_cached_page_compressed_once(self):
+        """Закешированная главная сохраняется в кеше уже сжатой"""
+        first = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        keys = [
+            key for key in cache._cache
+            if key.startswith(':1:compressed:')
+        ]
+        self.assertEqual(len(keys), 1)
+        second = self.client.get(
+            reverse('posts:index'), HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(first.content, second.content)
+
+    def test_identity_for_clients_without_gzip(self):
+        """Без Accept-Encoding ответ только минифицируется"""
+        response = self.client.get(reverse('about:author'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn(b'  ', response.content)
+
+
+class MinifyHtmlTests(TestCase):
+    def test_pre_and_script_preserved(self):
+        """Содержимое pre и script не меняется"""
+        html = '<p>  a  </p>\n\n  <pre>  x\n  y</pre><script> a  = 1</script>'
+        self.assertEqual(
+            minify_html(html),
+            '<p> a </p>\n<pre>  x\n  y</pre><script> a  = 1</script>'
+        )
@@ -0,0 +1,82 @@
+import asyncio
+
+from django.conf import settings
+from django.test import TransactionTestCase, override_settings
+
+from ..asgi import ThreadPoolASGIHandler
+from ..events import Broker, broker, event_stream, publish
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@override_settings(EVENTS={**settings.EVENTS, 'MAX_AGE': 0.2})
+class EventStreamTests(TransactionTestCase):
+    def test_subscriber_gets_only_its_channels(self):
+        """Подписчик получает события только своих каналов"""
+        response = event_stream({'group:1'})
+        publish({'feed', 'group:1'}, 'post', {'id': 1})
+        publish({'group:2'}, 'post', {'id': 2})
+        content = read_stream(response)
+        self.assertIn('event: post\ndata: {"id": 1}', content)
+        self.assertNotIn('"id": 2', content)
+        self.assertFalse(broker.subscribers)
+
+    def test_keepalive_without_events(self):
+        """Без событий в поток пишется комментарий keepalive"""
+        with override_settings(EVENTS={
+            **settings.EVENTS, 'MAX_AGE': 0.2, 'KEEPALIVE': 0.05
+        }):
+            content = read_stream(event_stream({'feed'}))
+        self.assertTrue(content.startswith('retry: 3000'))
+        self.assertIn(': keepalive', content)
+
+    def test_database_backend_between_processes(self):
+        """Через таблицу событий подписчик получает событие и догоняет
+        пропущенные по Last-Event-ID"""
+        with override_settings(EVENTS={
+            **settings.EVENTS, 'BACKEND': 'database', 'MAX_AGE': 0.2,
+            'POLL_INTERVAL': 3600
+        }):
+            other = Broker()
+            subscription = other.subscribe({'feed'})
+            publish({'feed'}, 'post', {'id': 7})
+            other.poll_once()
+            event, = subscription.wait(0)
+            subscription.close()
+            self.assertEqual(event['data'], {'id': 7})
+            response = event_stream({'feed'}, str(event['id'] - 1))
+            self.assertIn('"id": 7', read_stream(response))
+            response = event_stream({'feed'})
+            self.assertIn(f'id: {broker.last_id}\n\n', read_stream(response))
+
+    def test_asgi_streams_without_pool_thread(self):
+        """ASGI-обработчик отдаёт поток событий из цикла событий"""
+        def application(environ, start_response):
+            response = event_stream({'feed'})
+            start_response('200 OK', list(response.items()))
+            return response
+
+        handler = ThreadPoolASGIHandler(application, threads=1)
+        messages = []
+
+        async def receive():
+            if not messages:
+                return {'type': 'http.request', 'body': b''}
+            await asyncio.sleep(1)
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+            if len(messages) == 2:
+                publish({'feed'}, 'comment', {'id': 3})
+
+        asyncio.run(handler({
+            'type': 'http', 'method': 'GET', 'path': '/events/',
+            'headers': [],
+        }, receive, send))
+        self.assertEqual(messages[0]['status'], 200)
+        body = b''.join(message.get('body', b'') for message in messages)
+        self.assertIn(b'event: comment', body)
+        self.assertFalse(messages[-1].get('more_body'))
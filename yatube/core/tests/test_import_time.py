@@ -0,0 +1,19 @@
+import os
+import subprocess
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+
+class ImportTimeTests(SimpleTestCase):
+    def test_budget_checked_without_preload(self):
+        """Бюджет импорта замеряется без прогрева YATUBE_PRELOAD"""
+        result = subprocess.CompletedProcess([], 0, stderr='')
+        with mock.patch.dict(os.environ, {'YATUBE_PRELOAD': '1'}), \
+                mock.patch('subprocess.run', return_value=result) as run:
+            call_command('check_import_time', stdout=StringIO())
+        env = run.call_args[1]['env']
+        self.assertNotIn('YATUBE_PRELOAD', env)
+        self.assertIn('DJANGO_SETTINGS_MODULE', env)
@@ -0,0 +1,78 @@
+import shutil
+import tempfile
+import tracemalloc
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..memory import dump_report, memory_report
+from ..metrics import REQUEST_MEMORY_PEAK
+
+User = get_user_model()
+MEMORY_DIR = tempfile.mkdtemp()
+
+
+@override_settings(MEMORY_PROFILING={
+    **settings.MEMORY_PROFILING,
+    'ENABLED': True,
+    'SAMPLE_RATE': 0,
+    'SIGNAL': None,
+    'DIRECTORY': MEMORY_DIR,
+})
+class MemoryProfilingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='admin', is_staff=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.staff)
+
+    def tearDown(self):
+        tracemalloc.stop()
+        shutil.rmtree(MEMORY_DIR, ignore_errors=True)
+
+    def test_peak_recorded_on_request(self):
+        """По заголовку X-Memory-Profile пик запроса попадает в метрику"""
+        response = self.client.get(
+            reverse('about:author'), HTTP_X_MEMORY_PROFILE='1'
+        )
+        self.assertGreater(int(response['X-Memory-Peak']), 0)
+        self.assertIn(('about:author',), dict(REQUEST_MEMORY_PEAK._collect()))
+
+    def test_report_and_diff(self):
+        """Отчёт показывает места выделения и разницу снимков"""
+        tracemalloc.start()
+        memory_report()
+        retained = [bytearray(1024) for _ in range(100)]
+        report = memory_report(diff=True)
+        self.assertIn('Изменение с прошлого снимка', report)
+        self.assertIn('test_memory.py', report)
+        self.assertTrue(retained)
+        with open(dump_report(), encoding='utf-8') as dumped:
+            self.assertIn('Отслеживается', dumped.read())
+
+    def test_endpoint_staff_only(self):
+        """Отчёт о памяти доступен только сотрудникам"""
+        tracemalloc.start()
+        url = reverse('memory')
+        self.assertEqual(Client().get(url).status_code, 403)
+        response = self.client.get(url, {'group': 'filename', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.client.get(url, {'group': 'bad'}).status_code, 400
+        )
+
+    def test_growth_command(self):
+        """Команда прогоняет страницу и печатает прирост памяти"""
+        out = StringIO()
+        call_command(
+            'memory_growth', '/about/author/', requests=5, warmup=1,
+            stdout=out
+        )
+        self.assertIn('Прирост после 5 запросов', out.getvalue())
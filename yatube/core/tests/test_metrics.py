@@ -0,0 +1,107 @@
+import gc
+import threading
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import get_key_prefix
+from ..metrics import CACHE_REQUESTS, Counter, Histogram, REGISTRY
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_metrics_collected_for_views_and_cache(self):
+        """Метрики представлений и кеша попадают в экспорт"""
+        self.client.get(reverse('posts:index'))
+        with override_settings(METRICS_TOKEN='secret'):
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret'
+            )
+        content = response.content.decode()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIn(
+            'yatube_view_duration_seconds_count{view="posts:index"}',
+            content
+        )
+        self.assertIn(
+            'yatube_cache_requests_total{prefix="index_page",result="miss"}',
+            content
+        )
+        self.assertIn(
+            'yatube_template_render_seconds_count'
+            '{template="posts/index.html"}',
+            content
+        )
+
+    def test_metrics_forbidden_without_token(self):
+        """Без staff и токена метрики недоступны, в том числе с 127.0.0.1"""
+        url = reverse('metrics')
+        for headers in (
+            {'REMOTE_ADDR': '127.0.0.1'},
+            {'HTTP_AUTHORIZATION': 'Bearer secret'},
+        ):
+            with self.subTest(headers=headers):
+                response = self.client.get(url, **headers)
+                self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+        with override_settings(METRICS_TOKEN='secret'):
+            response = self.client.get(url, HTTP_AUTHORIZATION='Bearer x')
+            self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+            response = self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer secret'
+            )
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Гистограмма выводит накопительные значения корзин"""
+        histogram = Histogram('test_histogram', 'Тест', ('view',), (1, 2))
+        REGISTRY.remove(histogram)
+        for value in (0.5, 1.5, 3):
+            histogram.observe(value, 'index')
+        lines = list(histogram.expose())
+        self.assertIn('test_histogram_bucket{view="index",le="1"} 1', lines)
+        self.assertIn('test_histogram_bucket{view="index",le="2"} 2', lines)
+        self.assertIn(
+            'test_histogram_bucket{view="index",le="+Inf"} 3', lines
+        )
+        self.assertIn('test_histogram_count{view="index"} 3', lines)
+
+    def test_finished_thread_shards_merged(self):
+        """Шарды завершившихся потоков переносятся в общий итог"""
+        counter = Counter('test_threads_total', 'Тест', ('view',))
+        REGISTRY.remove(counter)
+        for _ in range(20):
+            thread = threading.Thread(target=counter.inc, args=('index',))
+            thread.start()
+            thread.join()
+        gc.collect()
+        self.assertEqual(counter._shards, {})
+        self.assertEqual(counter._collect(), [(('index',), [20])])
+
+    def test_get_many_counted(self):
+        """get_many учитывает попадание и промах каждого ключа"""
+        def count(result):
+            return dict(CACHE_REQUESTS._collect()).get(
+                ('bulktest', result), [0]
+            )[0]
+
+        cache.set('bulktest:1', 'a')
+        hits, misses = count('hit'), count('miss')
+        self.assertEqual(
+            cache.get_many(['bulktest:1', 'bulktest:2']), {'bulktest:1': 'a'}
+        )
+        self.assertEqual((count('hit'), count('miss')), (hits + 1, misses + 1))
+
+    def test_cache_key_prefix(self):
+        """Префикс ключа кеша определяется и для cache_page"""
+        self.assertEqual(
+            get_key_prefix(
+                'views.decorators.cache.cache_header.index_page.abc'
+            ),
+            'index_page'
+        )
+        self.assertEqual(get_key_prefix('post_bulk:1'), 'post_bulk')
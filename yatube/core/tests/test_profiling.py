@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+from collections import Counter
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..profiling import StackSampler, read_profile, write_profile
+
+User = get_user_model()
+PROFILES_DIR = tempfile.mkdtemp()
+
+
+@override_settings(PROFILING={
+    **settings.PROFILING,
+    'ENABLED': True,
+    'DIRECTORY': PROFILES_DIR,
+    'MAX_FILES': 2,
+})
+class ProfilingTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(PROFILES_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(PROFILES_DIR, ignore_errors=True)
+
+    def test_profile_written_for_staff_header(self):
+        """Заголовок X-Profile от сотрудника сохраняет непустой профиль"""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        with mock.patch.object(StackSampler, 'stop', return_value=Counter()):
+            client.get(reverse('about:author'), HTTP_X_PROFILE='1')
+        output = StringIO()
+        call_command('aggregate_profiles', stdout=output)
+        self.assertIn('Профили не найдены', output.getvalue())
+        with mock.patch.object(
+            StackSampler, 'stop', return_value=Counter({'view': 1})
+        ):
+            client.get(reverse('about:author'), HTTP_X_PROFILE='1')
+        output = StringIO()
+        call_command('aggregate_profiles', stdout=output)
+        self.assertIn('about:author: профилей 1', output.getvalue())
+
+    def test_sampler_idle_without_requests(self):
+        """Без профилируемых потоков сэмплер ждёт и не снимает стеки"""
+        sampler = StackSampler(0.001)
+        with mock.patch('core.profiling.sys._current_frames') as frames:
+            sampler.start(0)
+            sampler.stop(0)
+            sampler._thread.join(0.05)
+            calls = frames.call_count
+            sampler._thread.join(0.05)
+        self.assertLessEqual(calls, 1)
+        self.assertEqual(frames.call_count, calls)
+        self.assertTrue(sampler._thread.is_alive())
+
+    def test_header_ignored_for_guest(self):
+        """Заголовок X-Profile от гостя игнорируется"""
+        Client().get(reverse('about:author'), HTTP_X_PROFILE='1')
+        output = StringIO()
+        call_command('aggregate_profiles', stdout=output)
+        self.assertIn('Профили не найдены', output.getvalue())
+
+    def test_profiles_rotated_and_aggregated(self):
+        """Старые профили удаляются, остальные объединяются по view"""
+        for _ in range(3):
+            write_profile(PROFILES_DIR, 'posts:index', Counter({'a;b': 1}), 2)
+        output = StringIO()
+        call_command('aggregate_profiles', stdout=output)
+        self.assertIn('posts:index: профилей 2', output.getvalue())
+        self.assertEqual(
+            read_profile(f'{PROFILES_DIR}/aggregated/posts.index.folded'),
+            {'a;b': 2}
+        )
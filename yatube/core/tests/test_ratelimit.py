@@ -0,0 +1,103 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..ratelimit import (
+    get_client_ip, get_identities, hit, parse_rate, ratelimit
+)
+
+
+@ratelimit('test')
+def limited_view(request):
+    return HttpResponse()
+
+
+@override_settings(RATELIMIT={
+    **settings.RATELIMIT, 'POLICIES': {'test': {'ip': '2/m'}},
+})
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def request(self, method='post', ip='10.0.0.1'):
+        request = getattr(self.factory, method)('/', REMOTE_ADDR=ip)
+        request.user = AnonymousUser()
+        return limited_view(request)
+
+    def test_parse_rate(self):
+        """Ограничение '10/m' разбирается в лимит и период"""
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('100/h'), (100, 3600))
+
+    def test_limit_exceeded(self):
+        """Сверх лимита возвращается 429 с заголовком Retry-After"""
+        with mock.patch('core.ratelimit.time.time', return_value=60.0):
+            statuses = [self.request().status_code for _ in range(3)]
+            response = self.request()
+        self.assertEqual(statuses, [200, 200, 429])
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '105')
+
+    def test_limits_per_ip_and_method(self):
+        """Лимит считается по адресу и не касается GET-запросов"""
+        with mock.patch('core.ratelimit.time.time', return_value=60.0):
+            for _ in range(3):
+                self.request()
+            self.assertEqual(self.request('get').status_code, 200)
+            self.assertEqual(
+                self.request(ip='10.0.0.2').status_code, 200
+            )
+
+    def test_sliding_window(self):
+        """Запросы прошлого окна учитываются с убывающим весом"""
+        for key in ('early', 'late'):
+            self.assertEqual(hit(key, 2, 60, 0), 0)
+            self.assertEqual(hit(key, 2, 60, 1), 0)
+        self.assertEqual(hit('early', 2, 60, 75), 15)
+        self.assertEqual(hit('late', 2, 60, 90), 0)
+
+
+class ClientIpTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def client_ip(self, remote, **headers):
+        request = self.factory.get('/', REMOTE_ADDR=remote, **headers)
+        return get_client_ip(request)
+
+    @override_settings(TRUSTED_PROXIES=['127.0.0.1', '10.0.0.0/8'])
+    def test_forwarded_from_trusted_proxy(self):
+        """Адрес клиента берётся из заголовков только доверенного прокси"""
+        self.assertEqual(self.client_ip(
+            '127.0.0.1', HTTP_X_FORWARDED_FOR='1.1.1.1, 2.2.2.2, 10.0.0.5'
+        ), '2.2.2.2')
+        self.assertEqual(
+            self.client_ip('127.0.0.1', HTTP_X_REAL_IP='3.3.3.3'), '3.3.3.3'
+        )
+        self.assertEqual(self.client_ip(
+            '127.0.0.1', HTTP_X_FORWARDED_FOR='не адрес'
+        ), '127.0.0.1')
+        self.assertEqual(self.client_ip(
+            '4.4.4.4', HTTP_X_FORWARDED_FOR='2.2.2.2'
+        ), '4.4.4.4')
+
+    def test_headers_ignored_without_trusted_proxies(self):
+        """Без TRUSTED_PROXIES заголовки прокси не читаются"""
+        self.assertEqual(self.client_ip(
+            '127.0.0.1', HTTP_X_FORWARDED_FOR='2.2.2.2'
+        ), '127.0.0.1')
+
+    def test_ip_policy_for_authenticated_needs_proxies(self):
+        """Вошедшие ограничиваются по адресу, только если прокси заданы"""
+        request = self.factory.post('/', REMOTE_ADDR='127.0.0.1')
+        request.user = mock.Mock(is_authenticated=True, pk=7)
+        self.assertEqual(list(get_identities(request)), [('user', 7)])
+        with self.settings(TRUSTED_PROXIES=['127.0.0.1']):
+            self.assertEqual(list(get_identities(request)), [
+                ('user', 7), ('ip', '127.0.0.1'),
+            ])
@@ -0,0 +1,95 @@
+import os
+import shutil
+import tempfile
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..static import FOREVER, SHORT, StaticFilesMiddleware
+from ..storage import CompressedManifestStaticFilesStorage
+
+STATIC_ROOT = tempfile.mkdtemp()
+MEDIA_ROOT = tempfile.mkdtemp()
+CSS = b'body { margin: 0; padding: 0; }\n' * 50
+
+
+def django_application(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'django']
+
+
+@override_settings(STATIC_ROOT=STATIC_ROOT, MEDIA_ROOT=MEDIA_ROOT)
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(STATIC_ROOT, 'css'), exist_ok=True)
+        with open(
+            os.path.join(STATIC_ROOT, 'css/site.0123456789ab.css'), 'wb'
+        ) as css:
+            css.write(CSS)
+        for name in ('image.gif', 'image.0123456789ab.gif'):
+            with open(os.path.join(MEDIA_ROOT, name), 'wb') as image:
+                image.write(b'GIF89a')
+        CompressedManifestStaticFilesStorage(
+            location=STATIC_ROOT
+        ).write_compressed('css/site.0123456789ab.css')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def request(self, path, **headers):
+        response = {}
+
+        def start_response(status, response_headers):
+            response['status'] = status
+            response['headers'] = dict(response_headers)
+
+        environ = RequestFactory().get(path, **headers).environ
+        body = StaticFilesMiddleware(django_application)(
+            environ, start_response
+        )
+        response['body'] = b''.join(body)
+        return response
+
+    def test_hashed_static_served_compressed_forever(self):
+        """Статика с хешем отдаётся сжатой и кешируется на год"""
+        response = self.request(
+            '/static/css/site.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip'
+        )
+        self.assertEqual(response['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(response['headers']['Cache-Control'], FOREVER)
+        self.assertLess(len(response['body']), len(CSS))
+
+    def test_uncompressed_for_clients_without_gzip(self):
+        """Клиент без gzip получает исходный файл"""
+        response = self.request('/static/css/site.0123456789ab.css')
+        self.assertNotIn('Content-Encoding', response['headers'])
+        self.assertEqual(response['body'], CSS)
+
+    def test_not_modified(self):
+        """Совпавший ETag даёт 304"""
+        etag = self.request(
+            '/static/css/site.0123456789ab.css'
+        )['headers']['ETag']
+        response = self.request(
+            '/static/css/site.0123456789ab.css', HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response['status'], '304 Not Modified')
+
+    def test_media_revalidated(self):
+        """Загруженные картинки кешируются ненадолго и с ETag"""
+        for path in ('/media/image.gif', '/media/image.0123456789ab.gif'):
+            with self.subTest(path=path):
+                headers = self.request(path)['headers']
+                self.assertEqual(headers['Cache-Control'], SHORT)
+                self.assertIn('ETag', headers)
+
+    def test_missing_and_outside_files_passed_to_django(self):
+        """Отсутствующие файлы и выход за корень уходят в Django"""
+        for path in ('/static/missing.css', '/static/../../etc/passwd'):
+            with self.subTest(path=path):
+                self.assertEqual(self.request(path)['body'], b'django')
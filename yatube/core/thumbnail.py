@@ -0,0 +1,93 @@
+from time import perf_counter
+
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings, settings
+from sorl.thumbnail.images import ImageFile
+
+from .metrics import THUMBNAIL_DURATION
+
+
+class InstrumentedThumbnailBackend(ThumbnailBackend):
+    def _create_thumbnail(self, source_image, geometry_string, options,
+                          thumbnail):
+        started = perf_counter()
+        try:
+            return super()._create_thumbnail(
+                source_image, geometry_string, options, thumbnail
+            )
+        finally:
+            THUMBNAIL_DURATION.observe(
+                perf_counter() - started, geometry_string
+            )
+
+    def get_thumbnail_file(self, file_, geometry_string, **options):
+        """Файл миниатюры с тем же именем, что даст get_thumbnail.
+
+        Имя вычисляется из ключа исходника и опций, без обращения
+        к хранилищу и KV-таблице.
+        """
+        from sorl.thumbnail import default
+
+        source = ImageFile(file_)
+        if settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+
+def get_thumbnail_urls(files, geometry_string, **options):
+    """URL миниатюр пачки картинок в том же порядке, None для пустых.
+
+    Записи KV-хранилища sorl читаются одним get_many из кеша и одним
+    запросом к таблице для промахов. Отсутствующие миниатюры создаются
+    обычным get_thumbnail: после обработки картинки миниатюра уже есть.
+    """
+    from sorl.thumbnail import default, get_thumbnail
+    from sorl.thumbnail.images import deserialize_image_file
+    from sorl.thumbnail.kvstores.base import add_prefix
+    from sorl.thumbnail.kvstores.cached_db_kvstore import (
+        EMPTY_VALUE, KVStore
+    )
+    from sorl.thumbnail.models import KVStore as KVStoreModel
+
+    backend = default.backend
+    batched = isinstance(backend, InstrumentedThumbnailBackend) and (
+        isinstance(default.kvstore, KVStore)
+    )
+    names = {file_.name: file_ for file_ in files if file_}
+    urls = {}
+    if batched and names:
+        keys = {
+            add_prefix(backend.get_thumbnail_file(
+                file_, geometry_string, **options
+            ).key): name
+            for name, file_ in names.items()
+        }
+        kv_cache = default.kvstore.cache
+        values = {
+            key: value for key, value in kv_cache.get_many(keys).items()
+            if value != EMPTY_VALUE
+        }
+        missing = set(keys) - set(values)
+        if missing:
+            stored = dict(KVStoreModel.objects.filter(
+                key__in=missing
+            ).values_list('key', 'value'))
+            kv_cache.set_many(stored, settings.THUMBNAIL_CACHE_TIMEOUT)
+            values.update(stored)
+        urls = {
+            keys[key]: deserialize_image_file(value).url
+            for key, value in values.items()
+        }
+    for name, file_ in names.items():
+        if name not in urls:
+            urls[name] = get_thumbnail(
+                file_, geometry_string, **options
+            ).url
+    return [urls[file_.name] if file_ else None for file_ in files]
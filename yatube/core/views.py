@@ -1,4 +1,13 @@
+import tracemalloc
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.shortcuts import render
+from django.utils.crypto import constant_time_compare
+
+from .memory import GROUPINGS, memory_report
+from .metrics import render_metrics
 
 
 def page_not_found(request, exception):
@@ -15,3 +24,46 @@ def server_error(request):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+def has_metrics_token(request):
+    """Проверяет заголовок Authorization: Bearer <METRICS_TOKEN>.
+
+    REMOTE_ADDR не учитывается: за локальным прокси все запросы
+    приходят с 127.0.0.1.
+    """
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and constant_time_compare(header, f'Bearer {token}')
+
+
+def metrics(request):
+    if not (request.user.is_staff or has_metrics_token(request)):
+        raise PermissionDenied
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4'
+    )
+
+
+def memory(request):
+    """Крупнейшие места выделения памяти воркера.
+
+    Параметры: group (lineno, filename, traceback), limit и diff для
+    сравнения с предыдущим снимком этого воркера.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied
+    if not tracemalloc.is_tracing():
+        return HttpResponse(
+            'tracemalloc не запущен: включите MEMORY_PROFILING["ENABLED"] '
+            'или PYTHONTRACEMALLOC',
+            status=409, content_type='text/plain; charset=utf-8'
+        )
+    group_by = request.GET.get('group', 'lineno')
+    limit = request.GET.get('limit', '')
+    if group_by not in GROUPINGS or limit and not limit.isdigit():
+        return HttpResponseBadRequest('Неверные параметры отчёта')
+    return HttpResponse(
+        memory_report(group_by, int(limit or 0), 'diff' in request.GET),
+        content_type='text/plain; charset=utf-8'
+    )
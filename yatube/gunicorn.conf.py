@@ -0,0 +1,10 @@
+import multiprocessing
+import os
+
+os.environ.setdefault('YATUBE_PRELOAD', '1')
+
+wsgi_app = 'yatube.wsgi:application'
+preload_app = True
+workers = int(
+    os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1)
+)
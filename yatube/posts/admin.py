@@ -1,8 +1,76 @@
-from django.contrib import admin
-from .models import Post, Group
+import csv
 
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
 
-class PostAdmin(admin.ModelAdmin):
+from core.paginator import EstimatedCountPaginator
+
+from .deletion import schedule_deletion
+from .models import Comment, DeletionJob, Follow, Post, Group, Tag
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_as_csv(modeladmin, request, queryset):
+    """Выгружает выбранные строки в CSV потоком, не загружая их в память."""
+    fields = modeladmin.csv_fields
+    writer = csv.writer(Echo())
+    rows = queryset.order_by('pk').values_list(*fields).iterator()
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in with_header(fields, rows)),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{queryset.model._meta.model_name}.csv"'
+    )
+    return response
+
+
+export_as_csv.short_description = 'Выгрузить в CSV'
+
+
+def with_header(header, rows):
+    yield header
+    yield from rows
+
+
+class BatchedDeletionMixin:
+    """Удаление через админку ставится в очередь process_deletions.
+
+    Страница подтверждения не собирает связанные объекты, а сами объекты
+    сразу деактивируются.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+        self.message_user(
+            request, f'Удаление «{obj}» поставлено в очередь', messages.INFO
+        )
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    # date_hierarchy здесь не используется: навигация по датам выбирает
+    # различные годы и месяцы через strftime по каждой строке, и на SQLite
+    # это полный проход таблицы при каждом открытии списка. Фильтр по дате
+    # в list_filter сводится к диапазону по индексу.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'text',
@@ -11,10 +79,58 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
-    empty_value_display = '-пусто-'
+
+
+class GroupAdmin(BatchedDeletionMixin, admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author', 'post')
+    list_filter = ('created',)
+    actions = (export_as_csv,)
+    csv_fields = ('pk', 'post_id', 'author__username', 'created', 'text')
+
+
+class FollowAdmin(LargeTableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    actions = (export_as_csv,)
+    csv_fields = ('pk', 'user__username', 'author__username')
+
+
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'name')
+    search_fields = ('name',)
+
+
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'label', 'kind', 'status', 'stage', 'deleted', 'created', 'finished'
+    )
+    list_filter = ('status', 'kind')
+    readonly_fields = (
+        'kind', 'object_id', 'label', 'status', 'stage', 'deleted', 'error',
+        'created', 'heartbeat', 'finished'
+    )
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(Tag, TagAdmin)
+admin.site.register(DeletionJob, DeletionJobAdmin)
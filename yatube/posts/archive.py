@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+POST_FIELDS = (
+    'id', 'text', 'excerpt', 'excerpt_truncated', 'pub_date', 'author_id',
+    'group_id', 'image', 'image_status',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'created')
+
+
+def archive_cutoff(days):
+    return timezone.now() - timedelta(days=days)
+
+
+def archive_batch(cutoff, batch_size):
+    """Переносит самые старые посты в архив вместе с комментариями.
+
+    Возвращает число перенесённых постов, не больше batch_size.
+
+    Картинка у поста очищается перед удалением, чтобы сигнал удаления
+    не стёр файл, который теперь принадлежит архивному посту.
+    """
+    ids = list(
+        Post.objects.filter(pub_date__lt=cutoff).exclude(
+            image_status=Post.IMAGE_PROCESSING
+        ).order_by('pub_date').values_list('pk', flat=True)[:batch_size]
+    )
+    if not ids:
+        return 0
+    with transaction.atomic():
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**row)
+            for row in Post.objects.filter(pk__in=ids).values(*POST_FIELDS)
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**row)
+            for row in Comment.objects.filter(post_id__in=ids).values(
+                *COMMENT_FIELDS
+            )
+        )
+        Post.objects.filter(pk__in=ids).update(image='')
+        Post.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def get_post_or_archived(pk):
+    """Пост из рабочей таблицы, иначе из архива, иначе None."""
+    post = Post.objects.filter(pk=pk).first()
+    if post is None:
+        post = ArchivedPost.objects.filter(pk=pk).first()
+    return post
+
+
+class TieredPosts:
+    """Последовательность постов: сначала рабочая таблица, затем архив.
+
+    Подходит для Paginator: count() и срезы выполняются запросами только
+    к тем таблицам, которые попадают в страницу.
+    """
+
+    def __init__(self, *querysets):
+        self.querysets = querysets
+
+    @cached_property
+    def counts(self):
+        return [queryset.count() for queryset in self.querysets]
+
+    def count(self):
+        return sum(self.counts)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        posts = []
+        offset = 0
+        for queryset, count in zip(self.querysets, self.counts):
+            if stop is not None and stop <= offset:
+                break
+            low = max(start - offset, 0)
+            high = count if stop is None else min(stop - offset, count)
+            if low < high:
+                posts.extend(queryset[low:high])
+            offset += count
+        return posts
@@ -0,0 +1,270 @@
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from .models import Follow, Group, GroupStats, Post, User
+from .utils import count_related
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTS = 20
+END = '\U0010ffff'
+
+
+def normalize(text):
+    return ' '.join(text.casefold().replace('ё', 'е').split())
+
+
+def split_terms(*texts):
+    """Строки для поиска: каждый текст целиком и каждое его слово."""
+    terms = set()
+    for text in texts:
+        text = normalize(text or '')
+        if text:
+            terms.add(text)
+            terms.update(text.split())
+    return terms
+
+
+class Entry:
+    __slots__ = ('kind', 'label', 'url', 'score', 'terms')
+
+    def __init__(self, kind, label, url, score, terms):
+        self.kind = kind
+        self.label = label
+        self.url = url
+        self.score = score
+        self.terms = terms
+
+    def as_dict(self):
+        return {'type': self.kind, 'label': self.label, 'url': self.url}
+
+
+class PrefixIndex:
+    """Отсортированный массив строк поиска со ссылками на записи.
+
+    Префикс находится двумя bisect. Если под префикс попадает больше
+    SCAN_LIMIT строк (короткие запросы), лучшие записи считаются один раз
+    и хранятся, пока не изменится запись с этим префиксом.
+    """
+
+    def __init__(self, scan_limit):
+        self.scan_limit = scan_limit
+        self.terms = []
+        self.entries = {}
+        self.top = {}
+        self.lock = threading.Lock()
+        self.built = time.monotonic()
+
+    def add(self, key, entry):
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = entry
+            for term in entry.terms:
+                insort(self.terms, (term, key))
+            self._forget(entry)
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def _forget(self, entry):
+        """Сбрасывает закешированные результаты префиксов записи."""
+        for term in entry.terms:
+            for length in range(1, len(term) + 1):
+                self.top.pop(term[:length], None)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self._forget(entry)
+        for term in entry.terms:
+            position = bisect_left(self.terms, (term, key))
+            if position < len(self.terms) and self.terms[position] == (
+                term, key
+            ):
+                del self.terms[position]
+
+    def change_score(self, key, delta):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry.score = tuple(
+                    value + change for value, change in zip(entry.score, delta)
+                )
+                self._forget(entry)
+
+    def best(self, keys, limit):
+        return heapq.nlargest(
+            limit, keys, key=lambda key: (self.entries[key].score, key)
+        )
+
+    def search(self, prefix, limit):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self.lock:
+            start = bisect_left(self.terms, (prefix,))
+            end = bisect_left(self.terms, (prefix + END,), start)
+            if end - start <= self.scan_limit:
+                keys = {key for _, key in self.terms[start:end]}
+                found = self.best(keys, limit)
+            else:
+                found = self.top.get(prefix)
+                if found is None:
+                    keys = {key for _, key in self.terms[start:end]}
+                    found = self.top[prefix] = self.best(keys, MAX_RESULTS)
+            return [self.entries[key].as_dict() for key in found[:limit]]
+
+
+def user_entry(user, followers, posts):
+    full_name = f'{user.first_name} {user.last_name}'.strip()
+    return Entry(
+        'user',
+        f'{full_name} (@{user.username})' if full_name else user.username,
+        reverse('posts:profile', args=[user.username]),
+        (followers, posts),
+        split_terms(user.username, user.first_name, user.last_name,
+                    full_name)
+    )
+
+
+def group_entry(group, posts):
+    return Entry(
+        'group',
+        group.title,
+        reverse('posts:group_list', args=[group.slug]),
+        (posts, 0),
+        split_terms(group.slug, group.title)
+    )
+
+
+def build_index():
+    """Индекс активных пользователей и групп, два запроса."""
+    index = PrefixIndex(settings.AUTOCOMPLETE['SCAN_LIMIT'])
+    users = User.objects.filter(is_active=True).annotate(
+        followers_count=count_related(Follow.objects, 'author'),
+        posts_count=count_related(Post.objects, 'author'),
+    ).only('username', 'first_name', 'last_name')
+    for user in users.iterator():
+        index.entries[('user', user.pk)] = user_entry(
+            user, user.followers_count, user.posts_count
+        )
+    groups = Group.objects.filter(is_active=True).select_related(
+        'stats'
+    ).only('title', 'slug', 'stats__posts_count')
+    for group in groups.iterator():
+        index.entries[('group', group.pk)] = group_entry(
+            group, group_posts_count(group)
+        )
+    index.terms = sorted(
+        (term, key)
+        for key, entry in index.entries.items()
+        for term in entry.terms
+    )
+    return index
+
+
+def group_posts_count(group):
+    try:
+        return group.stats.posts_count
+    except GroupStats.DoesNotExist:
+        return 0
+
+
+_index = None
+_build_lock = threading.Lock()
+
+
+def get_index():
+    """Индекс процесса; строится при первом запросе.
+
+    Сигналы обновляют только индекс процесса, где произошло изменение,
+    поэтому индекс перестраивается раз в AUTOCOMPLETE['REBUILD_INTERVAL']
+    секунд, чтобы подхватить изменения из других воркеров. Перестройку
+    запускает один запрос в фоновом потоке, а все запросы до её конца
+    ищут по старому индексу. Ждут только запросы до первой сборки.
+    """
+    global _index
+    index = _index
+    if index is None:
+        with _build_lock:
+            if _index is None:
+                _index = build_index()
+            return _index
+    interval = settings.AUTOCOMPLETE['REBUILD_INTERVAL']
+    if time.monotonic() - index.built >= interval and _build_lock.acquire(
+        blocking=False
+    ):
+        if settings.AUTOCOMPLETE['BACKGROUND']:
+            threading.Thread(target=rebuild, daemon=True).start()
+        else:
+            rebuild(close_connection=False)
+    return index
+
+
+def rebuild(close_connection=True):
+    """Заменяет индекс новым; вызывается с захваченным _build_lock."""
+    global _index
+    try:
+        _index = build_index()
+    except Exception:
+        logger.exception('Не удалось перестроить индекс подсказок')
+        # Следующая попытка - через REBUILD_INTERVAL, а не на каждом запросе.
+        _index.built = time.monotonic()
+    finally:
+        _build_lock.release()
+        if close_connection:
+            connection.close()
+
+
+def loaded_index():
+    """Уже построенный индекс или None: сигналы его не строят."""
+    return _index
+
+
+def search(query, limit=10):
+    return get_index().search(query, min(limit, MAX_RESULTS))
+
+
+def update_user(user):
+    index = loaded_index()
+    if index is None:
+        return
+    key = ('user', user.pk)
+    if not user.is_active:
+        index.remove(key)
+        return
+    entry = index.entries.get(key)
+    index.add(key, user_entry(user, *(entry.score if entry else (0, 0))))
+
+
+def update_group(group):
+    index = loaded_index()
+    if index is None:
+        return
+    key = ('group', group.pk)
+    if not group.is_active:
+        index.remove(key)
+        return
+    entry = index.entries.get(key)
+    index.add(key, group_entry(group, entry.score[0] if entry else 0))
+
+
+def remove(kind, pk):
+    index = loaded_index()
+    if index is not None:
+        index.remove((kind, pk))
+
+
+def change_popularity(kind, pk, delta):
+    index = loaded_index()
+    if index is not None and pk is not None:
+        index.change_score((kind, pk), delta)
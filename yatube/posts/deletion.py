@@ -0,0 +1,219 @@
+import logging
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import autocomplete
+from .group_stats import subtract_group_posts
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, DeletionJob, Follow, Group, Post,
+    User
+)
+from .prerender import schedule_detached
+from .utils import invalidate_post_cache
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimLost(Exception):
+    """Задание забрал другой обработчик, пока этот считал его зависшим."""
+
+
+def schedule_deletion(target):
+    """Сразу деактивирует пользователя или группу и ставит удаление в очередь.
+
+    Неактивные пользователи и группы пропадают из лент и страниц, а их
+    данные удаляются пакетами командой process_deletions.
+    """
+    if isinstance(target, Group):
+        kind, label = DeletionJob.GROUP, target.slug
+    else:
+        kind, label = DeletionJob.USER, target.username
+    with transaction.atomic():
+        target.is_active = False
+        target.save(update_fields=['is_active'])
+        job = DeletionJob.objects.filter(
+            kind=kind, object_id=target.pk,
+            status__in=(DeletionJob.PENDING, DeletionJob.RUNNING)
+        ).first()
+        if job is None:
+            job = DeletionJob.objects.create(
+                kind=kind, object_id=target.pk, label=label
+            )
+    return job
+
+
+def batch_ids(queryset, batch_size):
+    return list(queryset.order_by().values_list('pk', flat=True)[:batch_size])
+
+
+def delete_batch(queryset, batch_size):
+    """Удаляет до batch_size строк; каскад затрагивает только эту пачку.
+
+    Возвращает число найденных строк и число действительно удалённых
+    вместе с каскадом.
+    """
+    ids = batch_ids(queryset, batch_size)
+    if not ids:
+        return 0, 0
+    deleted, _ = queryset.model.objects.filter(pk__in=ids).delete()
+    return len(ids), deleted
+
+
+def detach_batch(queryset, batch_size):
+    """Отвязывает до batch_size постов от группы, как SET_NULL.
+
+    UPDATE не отправляет сигналов, поэтому статистика группы, популярность
+    в подсказках и готовые страницы обновляются здесь же.
+    """
+    model = queryset.model
+    rows = list(queryset.order_by().values_list(
+        'pk', 'group_id', 'author_id', 'pub_date'
+    )[:batch_size])
+    if not rows:
+        return 0, 0
+    ids = [pk for pk, _, _, _ in rows]
+    detached = model.objects.filter(pk__in=ids).update(group=None)
+    for pk in ids:
+        invalidate_post_cache(pk)
+    if model is Post:
+        pub_dates = defaultdict(list)
+        for _, group_id, _, pub_date in rows:
+            pub_dates[group_id].append(pub_date)
+        for group_id, dates in pub_dates.items():
+            subtract_group_posts(group_id, dates)
+            transaction.on_commit(
+                lambda group_id=group_id, count=len(dates):
+                autocomplete.change_popularity(
+                    'group', group_id, (-count, 0)
+                )
+            )
+    schedule_detached(ids, {author_id for _, _, author_id, _ in rows})
+    return len(ids), detached
+
+
+def get_stages(job):
+    """Этапы удаления: сначала зависимые строки, последним сам объект.
+
+    Чужие комментарии к постам пользователя удаляются своими этапами до
+    постов, чтобы каскад пакета постов не затрагивал их без ограничения.
+    """
+    pk = job.object_id
+    if job.kind == DeletionJob.GROUP:
+        return [
+            ('posts', detach_batch, Post.objects.filter(group_id=pk)),
+            (
+                'archived_posts', detach_batch,
+                ArchivedPost.objects.filter(group_id=pk)
+            ),
+            ('group', delete_batch, Group.objects.filter(pk=pk)),
+        ]
+    return [
+        ('comments', delete_batch, Comment.objects.filter(author_id=pk)),
+        (
+            'post_comments', delete_batch,
+            Comment.objects.filter(post__author_id=pk)
+        ),
+        ('posts', delete_batch, Post.objects.filter(author_id=pk)),
+        (
+            'archived_comments', delete_batch,
+            ArchivedComment.objects.filter(author_id=pk)
+        ),
+        (
+            'archived_post_comments', delete_batch,
+            ArchivedComment.objects.filter(post__author_id=pk)
+        ),
+        (
+            'archived_posts', delete_batch,
+            ArchivedPost.objects.filter(author_id=pk)
+        ),
+        (
+            'follows', delete_batch,
+            Follow.objects.filter(Q(user_id=pk) | Q(author_id=pk))
+        ),
+        ('user', delete_batch, User.objects.filter(pk=pk)),
+    ]
+
+
+def claim_job(job):
+    """Забирает задание условным UPDATE, чтобы его не выполняли дважды.
+
+    Забрать можно задание в очереди, задание, которое этот экземпляр
+    уже забрал, и выполняемое задание без отметок дольше
+    DELETION['STALE_AFTER'] секунд: его обработчик считается погибшим.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.DELETION['STALE_AFTER'])
+    token = getattr(job, '_claim', None) or uuid.uuid4().hex
+    claimable = Q(status=DeletionJob.PENDING) | Q(
+        Q(claim=token) | Q(heartbeat__lt=stale) | Q(heartbeat__isnull=True),
+        status=DeletionJob.RUNNING
+    )
+    claimed = DeletionJob.objects.filter(claimable, pk=job.pk).update(
+        status=DeletionJob.RUNNING, claim=token, heartbeat=now
+    )
+    if claimed:
+        job.refresh_from_db()
+        job._claim = token
+    return bool(claimed)
+
+
+def save_job(job, **fields):
+    """Сохраняет задание, только если оно всё ещё принадлежит обработчику."""
+    updated = DeletionJob.objects.filter(
+        pk=job.pk, claim=job._claim
+    ).update(heartbeat=timezone.now(), **fields)
+    if not updated:
+        raise ClaimLost(job)
+
+
+def run_job(job, batch_size, max_batches=None, progress=None):
+    """Выполняет задание пакетами, каждый в своей транзакции.
+
+    Прогресс сохраняется вместе с пакетом, поэтому прерванное задание
+    продолжается с того же этапа; progress вызывается после каждого
+    пакета. Возвращает True, если задание завершено, и False, если оно
+    прервано или его выполняет другой обработчик.
+    """
+    if not claim_job(job):
+        return False
+    stages = get_stages(job)
+    names = [name for name, _, _ in stages]
+    start = names.index(job.stage) if job.stage in names else 0
+    batches = 0
+    try:
+        for name, step, queryset in stages[start:]:
+            while True:
+                if max_batches is not None and batches >= max_batches:
+                    return False
+                with transaction.atomic():
+                    found, removed = step(queryset, batch_size)
+                    save_job(
+                        job, stage=name, deleted=F('deleted') + removed
+                    )
+                job.stage = name
+                job.deleted += removed
+                if not found:
+                    break
+                batches += 1
+                if progress is not None:
+                    progress(job)
+        save_job(job, status=DeletionJob.DONE, finished=timezone.now())
+    except ClaimLost:
+        logger.warning('Удаление %s выполняет другой обработчик', job)
+        return False
+    except Exception as error:
+        logger.exception('Не удалось выполнить удаление %s', job)
+        job.status = DeletionJob.FAILED
+        job.error = str(error)
+        DeletionJob.objects.filter(pk=job.pk, claim=job._claim).update(
+            status=job.status, error=job.error
+        )
+        return False
+    job.refresh_from_db()
+    return True
@@ -0,0 +1,70 @@
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from core.events import publish
+
+from .models import Follow, Group, User
+
+FEED_CHANNEL = 'feed'
+
+
+def group_channel(group_id):
+    return f'group:{group_id}'
+
+
+def author_channel(author_id):
+    return f'author:{author_id}'
+
+
+def post_channels(post):
+    channels = {FEED_CHANNEL, author_channel(post.author_id)}
+    if post.group_id:
+        channels.add(group_channel(post.group_id))
+    return channels
+
+
+def publish_post(post):
+    publish(post_channels(post), 'post', {
+        'id': post.pk,
+        'author': post.author.username,
+        'excerpt': post.excerpt,
+        'url': reverse('posts:post_detail', args=[post.pk]),
+    })
+
+
+def publish_comment(comment):
+    post = comment.post
+    publish(post_channels(post), 'comment', {
+        'id': comment.pk,
+        'post': post.pk,
+        'author': comment.author.username,
+        'url': reverse('posts:post_detail', args=[post.pk]),
+    })
+
+
+def get_channels(request):
+    """Каналы из параметров запроса: group, author, follow или общая лента.
+
+    Подписки пользователя читаются один раз при подключении.
+    """
+    if 'group' in request.GET:
+        group = get_object_or_404(
+            Group, slug=request.GET['group'], is_active=True
+        )
+        return {group_channel(group.pk)}
+    if 'author' in request.GET:
+        author = get_object_or_404(
+            User, username=request.GET['author'], is_active=True
+        )
+        return {author_channel(author.pk)}
+    if 'follow' in request.GET:
+        if not request.user.is_authenticated:
+            raise PermissionDenied
+        return {
+            author_channel(author_id)
+            for author_id in Follow.objects.filter(
+                user=request.user
+            ).values_list('author_id', flat=True)
+        }
+    return {FEED_CHANNEL}
@@ -1,14 +1,27 @@
 from django import forms
+from django.core.validators import FileExtensionValidator
+
+from .images import IMAGE_EXTENSIONS
 from .models import Post, Comment
 
 
 class PostForm(forms.ModelForm):
+    image = forms.FileField(
+        label='Картинка',
+        required=False,
+        validators=[FileExtensionValidator(IMAGE_EXTENSIONS)]
+    )
+
     class Meta:
         model = Post
-        fields = ('text', 'group', 'image' )
+        fields = ('text', 'group')
         labels = {'text': 'Текст поста', 'group': 'Выберите группу'}
         help_texts = {'text': 'Текст поста', 'group': 'Выберите группу'}
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['image'].initial = self.instance.image
+
     def clean_text(self):
         data = self.cleaned_data['text']
         if data == '':
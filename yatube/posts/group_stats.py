@@ -0,0 +1,121 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import (
+    Count, F, IntegerField, Max, OuterRef, Subquery, Sum
+)
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import GroupActivity, GroupStats, Post
+
+ACTIVITY_DAYS = 7
+
+
+def activity_since():
+    return timezone.localdate() - timedelta(days=ACTIVITY_DAYS - 1)
+
+
+def change_group_stats(group_id, pub_date, delta):
+    """Прибавляет delta постов к статистике группы и к дню pub_date.
+
+    Дни вне окна активности не трогаются, чтобы удаление старых постов
+    не создавало строк с отрицательными счётчиками.
+    """
+    if group_id is None:
+        return
+    with transaction.atomic():
+        GroupStats.objects.get_or_create(group_id=group_id)
+        GroupStats.objects.filter(group_id=group_id).update(
+            posts_count=F('posts_count') + delta
+        )
+        if delta > 0:
+            GroupStats.objects.filter(group_id=group_id).exclude(
+                last_post_date__gte=pub_date
+            ).update(last_post_date=pub_date)
+        else:
+            refresh_last_post_date(group_id, pub_date)
+        day = timezone.localdate(pub_date)
+        if day >= activity_since():
+            GroupActivity.objects.get_or_create(group_id=group_id, date=day)
+            GroupActivity.objects.filter(group_id=group_id, date=day).update(
+                posts_count=F('posts_count') + delta
+            )
+
+
+def subtract_group_posts(group_id, pub_dates):
+    """Вычитает из статистики группы пачку постов, убранных без сигналов.
+
+    Вызывается после того, как посты уже отвязаны от группы: дата
+    последнего поста пересчитывается по оставшимся.
+    """
+    if group_id is None or not pub_dates:
+        return
+    since = activity_since()
+    days = Counter(timezone.localdate(pub_date) for pub_date in pub_dates)
+    with transaction.atomic():
+        GroupStats.objects.filter(group_id=group_id).update(
+            posts_count=F('posts_count') - len(pub_dates)
+        )
+        refresh_last_post_date(group_id, max(pub_dates))
+        for day, count in days.items():
+            if day >= since:
+                GroupActivity.objects.filter(
+                    group_id=group_id, date=day
+                ).update(posts_count=F('posts_count') - count)
+
+
+def refresh_last_post_date(group_id, removed_date):
+    """Пересчитывает дату последнего поста, если убран самый свежий."""
+    stats = GroupStats.objects.filter(
+        group_id=group_id, last_post_date__lte=removed_date
+    )
+    if stats.exists():
+        stats.update(last_post_date=Post.objects.filter(
+            group_id=group_id
+        ).aggregate(last=Max('pub_date'))['last'])
+
+
+def groups_by_activity(queryset):
+    """Группы с числом постов за ACTIVITY_DAYS дней, самые активные первыми."""
+    week = GroupActivity.objects.filter(
+        group=OuterRef('pk'), date__gte=activity_since()
+    ).order_by().values('group').annotate(
+        total=Sum('posts_count')
+    ).values('total')
+    return queryset.select_related('stats').annotate(
+        week_posts=Coalesce(Subquery(week, output_field=IntegerField()), 0)
+    ).order_by(
+        '-week_posts',
+        F('stats__last_post_date').desc(nulls_last=True),
+        'title'
+    )
+
+
+def rebuild_group_stats():
+    """Пересчитывает статистику групп по таблице постов."""
+    posts = Post.objects.filter(group__isnull=False).order_by()
+    since = activity_since()
+    with transaction.atomic():
+        GroupStats.objects.all().delete()
+        GroupActivity.objects.all().delete()
+        GroupStats.objects.bulk_create(
+            GroupStats(
+                group_id=row['group'],
+                posts_count=row['count'],
+                last_post_date=row['last'],
+            )
+            for row in posts.values('group').annotate(
+                count=Count('pk'), last=Max('pub_date')
+            )
+        )
+        GroupActivity.objects.bulk_create(
+            GroupActivity(
+                group_id=row['group'], date=row['day'],
+                posts_count=row['count']
+            )
+            for row in posts.annotate(day=TruncDate('pub_date')).filter(
+                day__gte=since
+            ).values('group', 'day').annotate(count=Count('pk'))
+        )
@@ -0,0 +1,217 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Post
+from .utils import get_thumbnail_urls
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('jpg', 'jpeg', 'png', 'gif', 'webp')
+JPEG_QUALITY = 85
+TEMP_PREFIX = 'yatube-image-'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def reencode_image(source, max_dimension):
+    """Проверяет, уменьшает и пересохраняет картинку без метаданных.
+
+    Выполняется в отдельном процессе, поэтому не обращается к Django.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as image:
+        image.verify()
+    with Image.open(source) as image:
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension))
+        options = {}
+        if image_format == 'JPEG':
+            if image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            options = {'quality': JPEG_QUALITY, 'optimize': True}
+        target = f'{source}.out'
+        image.save(target, format=image_format, **options)
+    return target
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING['WORKERS']
+            )
+        return _executor
+
+
+def stash_upload(upload):
+    _, extension = os.path.splitext(upload.name)
+    descriptor, path = tempfile.mkstemp(
+        suffix=extension, prefix=TEMP_PREFIX,
+        dir=settings.IMAGE_PROCESSING['TEMP_DIR']
+    )
+    with os.fdopen(descriptor, 'wb') as stashed:
+        for chunk in upload.chunks():
+            stashed.write(chunk)
+    return path
+
+
+def set_status(post, status):
+    post.image_status = status
+    post.save(update_fields=['image_status'])
+
+
+def queue_image(post, upload):
+    """Ставит загруженную картинку поста в очередь на обработку.
+
+    False означает, что пользователь очистил поле картинки.
+    """
+    if upload is False:
+        post.image = ''
+        post.image_status = Post.IMAGE_READY
+        post.save(update_fields=['image', 'image_status'])
+        return
+    if not isinstance(upload, UploadedFile):
+        return
+    source = stash_upload(upload)
+    post.image_status = Post.IMAGE_PROCESSING
+    post.image_queued = timezone.now()
+    post.save(update_fields=['image_status', 'image_queued'])
+    if not settings.IMAGE_PROCESSING['WORKERS']:
+        process_inline(post.pk, source, upload.name)
+        return
+    transaction.on_commit(
+        lambda: submit(post.pk, source, upload.name)
+    )
+
+
+def process_inline(post_id, source, name):
+    try:
+        target = reencode_image(
+            source, settings.IMAGE_PROCESSING['MAX_DIMENSION']
+        )
+    except Exception:
+        logger.exception('Не удалось обработать картинку поста %s', post_id)
+        fail(post_id, source)
+    else:
+        finish(post_id, source, target, name)
+
+
+def submit(post_id, source, name):
+    """Отправляет картинку в пул процессов.
+
+    Результат обрабатывается в потоке пула, а по истечении TIMEOUT пост
+    помечается ошибочным, даже если процесс ещё занят.
+    """
+    future = get_executor().submit(
+        reencode_image, source, settings.IMAGE_PROCESSING['MAX_DIMENSION']
+    )
+    claim = threading.Lock()
+
+    def on_timeout():
+        if claim.acquire(blocking=False):
+            future.cancel()
+            logger.error('Таймаут обработки картинки поста %s', post_id)
+            closing_connection(fail, post_id, source)
+
+    def done(future):
+        timer.cancel()
+        if not claim.acquire(blocking=False):
+            remove_files(f'{source}.out')
+            return
+        error = 'отменено' if future.cancelled() else future.exception()
+        if error:
+            logger.error(
+                'Не удалось обработать картинку поста %s: %s', post_id, error
+            )
+            closing_connection(fail, post_id, source)
+        else:
+            closing_connection(
+                finish, post_id, source, future.result(), name
+            )
+
+    timer = threading.Timer(settings.IMAGE_PROCESSING['TIMEOUT'], on_timeout)
+    timer.daemon = True
+    timer.start()
+    future.add_done_callback(done)
+
+
+def closing_connection(func, *args):
+    try:
+        func(*args)
+    finally:
+        connection.close()
+
+
+def finish(post_id, source, target, name):
+    try:
+        post = Post.objects.filter(pk=post_id).first()
+        if post is None:
+            return
+        with open(target, 'rb') as processed:
+            post.image.save(name, File(processed), save=False)
+        # Миниатюра создаётся здесь, а не при первой выдаче поста в API.
+        get_thumbnail_urls([post.image])
+        post.image_status = Post.IMAGE_READY
+        post.save(update_fields=['image', 'image_status'])
+    finally:
+        remove_files(source, target)
+
+
+def fail(post_id, source):
+    remove_files(source, f'{source}.out')
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        set_status(post, Post.IMAGE_FAILED)
+
+
+def remove_files(*paths):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def recover_images(older_than):
+    """Помечает ошибкой зависшие картинки и удаляет забытые файлы.
+
+    Картинка считается зависшей, если пост ждёт обработки дольше
+    older_than секунд: процесс, который её обрабатывал, перезапустили
+    или убили. Временные файлы обработки старше того же срока никому
+    уже не нужны. Возвращает число постов и удалённых файлов.
+    """
+    stale = Post.objects.filter(
+        image_status=Post.IMAGE_PROCESSING
+    ).exclude(
+        image_queued__gte=timezone.now() - timedelta(seconds=older_than)
+    )
+    posts = 0
+    for post in stale.only('pk', 'image_status'):
+        logger.error('Картинка поста %s зависла в обработке', post.pk)
+        set_status(post, Post.IMAGE_FAILED)
+        posts += 1
+    directory = settings.IMAGE_PROCESSING['TEMP_DIR'] or (
+        tempfile.gettempdir()
+    )
+    deadline = time.time() - older_than
+    files = 0
+    for entry in os.scandir(directory):
+        if not entry.name.startswith(TEMP_PREFIX) or not entry.is_file():
+            continue
+        if entry.stat().st_mtime <= deadline:
+            remove_files(entry.path)
+            files += 1
+    return posts, files
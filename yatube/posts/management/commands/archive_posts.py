@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.archive import archive_batch, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше ARCHIVE["AFTER_DAYS"] дней и их комментарии '
+        'в архивные таблицы'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE['AFTER_DAYS']
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ARCHIVE['BATCH_SIZE']
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='Остановиться после стольких пакетов'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['days'])
+        total = 0
+        batches = 0
+        while options['max_batches'] is None or (
+            batches < options['max_batches']
+        ):
+            moved = archive_batch(cutoff, options['batch_size'])
+            if not moved:
+                break
+            total += moved
+            batches += 1
+            self.stdout.write(f'Пакет {batches}: {moved} постов')
+        self.stdout.write(f'Перенесено в архив постов: {total}')
@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+from collections import deque
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from posts.models import Post
+from posts.tags import save_post_tags, tokenize_chunk
+
+
+def iter_chunks(chunk_size):
+    """Пачки (id, текст, дата) постов по возрастанию id без OFFSET."""
+    last_pk = 0
+    while True:
+        rows = list(
+            Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', 'text', 'pub_date'
+            )[:chunk_size]
+        )
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        yield rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет хештеги существующих постов: тексты разбираются '
+        'пачками в пуле процессов, результаты пишутся пакетно'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Число процессов; 0 - разбирать в текущем процессе'
+        )
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if not workers:
+            total = sum(
+                self.save(rows, tokenize_chunk(
+                    [(pk, text) for pk, text, _ in rows]
+                ))
+                for rows in iter_chunks(options['chunk_size'])
+            )
+        else:
+            connection.close()
+            with multiprocessing.Pool(workers) as pool:
+                total = self.run_pool(pool, workers, options['chunk_size'])
+        self.stdout.write(f'Обработано постов: {total}')
+
+    def run_pool(self, pool, workers, chunk_size):
+        """До 2 * workers пачек в работе; готовые сохраняются по порядку."""
+        pending = deque()
+        total = 0
+        for rows in iter_chunks(chunk_size):
+            pending.append((rows, pool.apply_async(
+                tokenize_chunk, ([(pk, text) for pk, text, _ in rows],)
+            )))
+            while len(pending) > 2 * workers:
+                rows, result = pending.popleft()
+                total += self.save(rows, result.get())
+        while pending:
+            rows, result = pending.popleft()
+            total += self.save(rows, result.get())
+        return total
+
+    def save(self, rows, tokens):
+        save_post_tags(
+            dict(tokens), {pk: pub_date for pk, _, pub_date in rows}
+        )
+        return len(rows)
@@ -0,0 +1,35 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.prerender import INDEX_FILE, page_file, regenerate_page, remove_page
+from posts.prerender import all_pages
+
+
+class Command(BaseCommand):
+    help = (
+        'Собирает статические HTML-страницы для анонимных посетителей '
+        'в PRERENDER["ROOT"]'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Удалить файлы страниц, которых больше нет на сайте'
+        )
+
+    def handle(self, *args, **options):
+        written = set()
+        for path in all_pages():
+            regenerate_page(path)
+            written.add(page_file(path))
+        self.stdout.write(f'Обработано страниц: {len(written)}')
+        if options['prune']:
+            pruned = 0
+            for directory, _, files in os.walk(settings.PRERENDER['ROOT']):
+                filename = os.path.abspath(os.path.join(directory, INDEX_FILE))
+                if INDEX_FILE in files and filename not in written:
+                    remove_page(filename)
+                    pruned += 1
+            self.stdout.write(f'Удалено страниц: {pruned}')
@@ -0,0 +1,67 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.deletion import claim_job, run_job, schedule_deletion
+from posts.models import DeletionJob, Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователей и группы пакетами: ставит новые удаления '
+        'в очередь и выполняет накопившиеся задания'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', action='append', default=[],
+            help='Поставить в очередь удаление пользователя'
+        )
+        parser.add_argument(
+            '--group', action='append', default=[],
+            help='Поставить в очередь удаление группы по slug'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.DELETION['BATCH_SIZE']
+        )
+        parser.add_argument(
+            '--interval', type=float, default=None,
+            help='Не завершаться, проверяя очередь раз в столько секунд'
+        )
+
+    def handle(self, *args, **options):
+        for username in options['user']:
+            self.schedule(User, username=username)
+        for slug in options['group']:
+            self.schedule(Group, slug=slug)
+        while True:
+            self.process(options['batch_size'])
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
+
+    def schedule(self, model, **lookup):
+        target = model.objects.filter(**lookup).first()
+        if target is None:
+            raise CommandError(f'Не найдено: {lookup}')
+        job = schedule_deletion(target)
+        self.stdout.write(f'В очереди: {job}')
+
+    def process(self, batch_size):
+        jobs = DeletionJob.objects.filter(
+            status__in=(DeletionJob.PENDING, DeletionJob.RUNNING)
+        )
+        for job in jobs:
+            if not claim_job(job):
+                continue
+            run_job(job, batch_size, progress=self.report)
+            self.stdout.write(
+                f'{job}: {job.get_status_display()}, '
+                f'удалено строк: {job.deleted}'
+            )
+
+    def report(self, job):
+        self.stdout.write(
+            f'{job}: этап {job.stage}, удалено строк: {job.deleted}'
+        )
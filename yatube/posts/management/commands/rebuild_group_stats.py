@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from posts.group_stats import rebuild_group_stats
+from posts.models import GroupStats
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает статистику и недельную активность групп '
+        'по таблице постов'
+    )
+
+    def handle(self, *args, **options):
+        rebuild_group_stats()
+        self.stdout.write(f'Групп с постами: {GroupStats.objects.count()}')
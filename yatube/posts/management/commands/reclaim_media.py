@@ -0,0 +1,90 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.media import (
+    POST_IMAGES_DIR, delete_media_files, find_kvstore_orphans,
+    get_live_images, iter_media_files
+)
+
+STATE_FILE = '.reclaim_media.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки и миниатюры, не принадлежащие ни одному посту, '
+        'и их записи в KV-хранилище sorl-thumbnail'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Не трогать файлы моложе стольких секунд'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать обход заново, а не с последней точки'
+        )
+
+    def handle(self, *args, **options):
+        from sorl.thumbnail import default
+        from sorl.thumbnail.conf import settings as thumbnail_settings
+
+        self.dry_run = options['dry_run']
+        self.batch_size = options['batch_size']
+        self.state_path = os.path.join(settings.MEDIA_ROOT, STATE_FILE)
+        live_images = get_live_images()
+        orphan_keys, live_thumbnails = find_kvstore_orphans(live_images)
+        for start in range(0, len(orphan_keys), self.batch_size):
+            if not self.dry_run:
+                default.kvstore._delete_raw(
+                    *orphan_keys[start:start + self.batch_size]
+                )
+        self.stdout.write(f'Записей KV-хранилища: {len(orphan_keys)}')
+
+        last = None if options['restart'] else self.load_state()
+        directories = sorted(
+            [POST_IMAGES_DIR, thumbnail_settings.THUMBNAIL_PREFIX]
+        )
+        orphans = []
+        deleted = 0
+        for directory in directories:
+            for name in iter_media_files(
+                directory, options['min_age'], after=last
+            ):
+                if name.startswith(POST_IMAGES_DIR):
+                    live = name in live_images
+                else:
+                    live = name in live_thumbnails
+                if not live:
+                    orphans.append(name)
+                if len(orphans) >= self.batch_size:
+                    deleted += self.flush(orphans, name)
+                    orphans = []
+        deleted += self.flush(orphans, None)
+        self.stdout.write(f'Файлов: {deleted}')
+
+    def flush(self, names, last):
+        if self.dry_run:
+            for name in names:
+                self.stdout.write(name)
+            return len(names)
+        delete_media_files(names)
+        if last is None:
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+        else:
+            with open(self.state_path, 'w') as state:
+                json.dump({'last': last}, state)
+        return len(names)
+
+    def load_state(self):
+        try:
+            with open(self.state_path) as state:
+                return json.load(state)['last']
+        except (OSError, ValueError, KeyError):
+            return None
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.images import recover_images
+
+
+class Command(BaseCommand):
+    help = (
+        'Помечает ошибкой картинки, зависшие в обработке после перезапуска '
+        'сервера, и удаляет забытые временные файлы обработки'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int,
+            default=settings.IMAGE_PROCESSING['TIMEOUT'] * 2,
+            help='Считать зависшими картинки, ждущие дольше стольких секунд'
+        )
+
+    def handle(self, *args, **options):
+        posts, files = recover_images(options['older_than'])
+        self.stdout.write(f'Постов: {posts}, временных файлов: {files}')
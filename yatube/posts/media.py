@@ -0,0 +1,128 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .models import ArchivedPost, Post
+
+POST_IMAGES_DIR = Post._meta.get_field('image').upload_to
+
+
+def delete_post_image(name):
+    """Удаляет картинку поста, её миниатюры и записи о них в KV-хранилище."""
+    if not name:
+        return
+    from sorl.thumbnail import delete
+    delete(name)
+
+
+def get_live_images():
+    return {
+        image
+        for model in (Post, ArchivedPost)
+        for image in model.objects.exclude(image='').values_list(
+            'image', flat=True
+        )
+    }
+
+
+def load_kvstore():
+    """Читает KV-хранилище sorl одним запросом.
+
+    Возвращает имена картинок по ключам и списки ключей миниатюр
+    по ключам исходных картинок.
+    """
+    from sorl.thumbnail.conf import settings as thumbnail_settings
+    from sorl.thumbnail.models import KVStore
+
+    prefix = thumbnail_settings.THUMBNAIL_KEY_PREFIX
+    images = {}
+    thumbnails = {}
+    rows = KVStore.objects.filter(key__startswith=prefix).values_list(
+        'key', 'value'
+    )
+    for raw_key, value in rows.iterator():
+        _, identity, key = raw_key.split('||', 2)
+        if identity == 'image':
+            images[key] = json.loads(value)['name']
+        elif identity == 'thumbnails':
+            thumbnails[key] = json.loads(value)
+    return images, thumbnails
+
+
+def find_kvstore_orphans(live_images):
+    """Находит записи KV-хранилища для картинок, которых нет у постов.
+
+    Возвращает сырые ключи KV-хранилища для удаления и множество имён
+    миниатюр, которые используются живыми картинками.
+    """
+    from sorl.thumbnail.kvstores.base import add_prefix
+
+    images, thumbnails = load_kvstore()
+    orphan_keys = []
+    live_thumbnails = set()
+    for source_key, thumbnail_keys in thumbnails.items():
+        names = {images[key] for key in thumbnail_keys if key in images}
+        if images.get(source_key) in live_images:
+            live_thumbnails |= names
+            continue
+        orphan_keys.append(add_prefix(source_key, 'thumbnails'))
+        if source_key in images:
+            orphan_keys.append(add_prefix(source_key))
+        orphan_keys.extend(add_prefix(key) for key in thumbnail_keys)
+    thumbnail_key_set = {
+        key for keys in thumbnails.values() for key in keys
+    }
+    orphan_keys.extend(
+        add_prefix(key) for key, name in images.items()
+        if key not in thumbnail_key_set
+        and key not in thumbnails
+        and name not in live_images
+    )
+    return orphan_keys, live_thumbnails
+
+
+def iter_media_files(directory, min_age, after=None):
+    """Файлы каталога MEDIA_ROOT в порядке сравнения их имён как строк.
+
+    Имена идут строго по возрастанию, поэтому обход можно продолжить
+    с места остановки: файлы с именем не больше after пропускаются,
+    а каталоги, целиком лежащие до after, не читаются. Файлы моложе
+    min_age секунд пропускаются: они могут принадлежать посту
+    или миниатюре, которые ещё сохраняются.
+    """
+    deadline = time.time() - min_age
+    yield from _iter_sorted_files(
+        directory.rstrip('/'), deadline, after
+    )
+
+
+def _iter_sorted_files(directory, deadline, after):
+    try:
+        entries = list(os.scandir(
+            os.path.join(settings.MEDIA_ROOT, directory)
+        ))
+    except FileNotFoundError:
+        return
+    # Имя каталога сравнивается с косой чертой: так все файлы поддерева
+    # встают ровно туда, где их имена окажутся при сравнении строк.
+    keyed = sorted(
+        (entry.name + '/' if entry.is_dir() else entry.name, entry)
+        for entry in entries
+    )
+    for key, entry in keyed:
+        name = f'{directory}/{key}'
+        if entry.is_dir():
+            if after is None or name > after or after.startswith(name):
+                yield from _iter_sorted_files(name[:-1], deadline, after)
+        elif after is not None and name <= after:
+            continue
+        elif entry.stat().st_mtime <= deadline:
+            yield name
+
+
+def delete_media_files(names):
+    for name in names:
+        default_storage.delete(name)
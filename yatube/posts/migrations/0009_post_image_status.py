@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_auto_20221126_1823'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_status',
+            field=models.CharField(choices=[('ready', 'Готова'), ('processing', 'Обрабатывается'), ('failed', 'Не удалось обработать')], default='ready', max_length=16, verbose_name='Состояние картинки'),
+        ),
+    ]
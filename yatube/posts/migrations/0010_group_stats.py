@@ -0,0 +1,82 @@
+# Generated by Django 2.2.28 on 2026-10-19 19:38
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+import django.db.models.deletion
+
+ACTIVITY_DAYS = 7
+
+
+def rebuild_stats(apps, schema_editor):
+    """Заполняет статистику групп по уже существующим постам.
+
+    Копия posts.group_stats.rebuild_group_stats на момент миграции:
+    миграция не должна меняться вместе с живым кодом.
+    """
+    Post = apps.get_model('posts', 'Post')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    GroupActivity = apps.get_model('posts', 'GroupActivity')
+    posts = Post.objects.filter(group__isnull=False).order_by()
+    since = timezone.localdate() - timedelta(days=ACTIVITY_DAYS - 1)
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=row['group'],
+            posts_count=row['count'],
+            last_post_date=row['last'],
+        )
+        for row in posts.values('group').annotate(
+            count=Count('pk'), last=Max('pub_date')
+        )
+    )
+    GroupActivity.objects.bulk_create(
+        GroupActivity(
+            group_id=row['group'], date=row['day'], posts_count=row['count']
+        )
+        for row in posts.annotate(day=TruncDate('pub_date')).filter(
+            day__gte=since
+        ).values('group', 'day').annotate(count=Count('pk'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_image_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Количество постов')),
+                ('last_post_date', models.DateTimeField(blank=True, null=True, verbose_name='Дата последнего поста')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupActivity',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='День')),
+                ('posts_count', models.IntegerField(default=0, verbose_name='Количество постов')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='posts.Group')),
+            ],
+            options={
+                'verbose_name': 'Активность группы',
+                'verbose_name_plural': 'Активность групп',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='groupactivity',
+            constraint=models.UniqueConstraint(fields=('group', 'date'), name='unique_group_activity'),
+        ),
+        migrations.RunPython(rebuild_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.28 on 2026-10-19 19:48
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 300
+ELLIPSIS = '…'
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Копия posts.models.make_excerpt на момент миграции."""
+    if len(text) <= length:
+        return text
+    head = text[:length]
+    words = head.rsplit(None, 1)
+    return (words[0].rstrip() if words else head.strip()) + ELLIPSIS
+
+
+def fill_excerpts(apps, schema_editor):
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        batch = []
+        for post in model.objects.only('pk', 'text').iterator():
+            post.excerpt = make_excerpt(post.text)
+            batch.append(post)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(batch, ['excerpt'])
+                batch = []
+        model.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=301, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=301, verbose_name='Начало текста'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-19 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_queued',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Картинка поставлена в обработку'),
+        ),
+    ]
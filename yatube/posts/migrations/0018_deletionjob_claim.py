@@ -0,0 +1,23 @@
+# Generated by Django 2.2.28 on 2026-10-19 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_archive_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletionjob',
+            name='claim',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Обработчик'),
+        ),
+        migrations.AddField(
+            model_name='deletionjob',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последняя отметка обработчика'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 2.2.28 on 2026-10-19 20:46
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+EXCERPT_LENGTH = 300
+ELLIPSIS = '…'
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Копия posts.models.make_excerpt на момент миграции."""
+    text = text.lstrip()
+    if len(text) <= length:
+        return text, False
+    return text[:length].rsplit(None, 1)[0].rstrip() + ELLIPSIS, True
+
+
+def fill_excerpts(apps, schema_editor):
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        batch = []
+        for post in model.objects.only('pk', 'text').iterator():
+            post.excerpt, post.excerpt_truncated = make_excerpt(post.text)
+            batch.append(post)
+            if len(batch) == BATCH_SIZE:
+                model.objects.bulk_update(
+                    batch, ['excerpt', 'excerpt_truncated']
+                )
+                batch = []
+        model.objects.bulk_update(batch, ['excerpt', 'excerpt_truncated'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_deletionjob_claim'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст обрезан'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_truncated',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст обрезан'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -3,17 +3,41 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+EXCERPT_LENGTH = 300
+ELLIPSIS = '…'
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """Начало текста не длиннее length символов, обрезанное по слову.
+
+    Возвращает начало и признак того, что текст был обрезан.
+    """
+    text = text.lstrip()
+    if len(text) <= length:
+        return text, False
+    return text[:length].rsplit(None, 1)[0].rstrip() + ELLIPSIS, True
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    is_active = models.BooleanField('Активна', default=True)
 
     def __str__(self):
         return self.title
 
 
 class Post(models.Model):
+    IMAGE_READY = 'ready'
+    IMAGE_PROCESSING = 'processing'
+    IMAGE_FAILED = 'failed'
+    IMAGE_STATUSES = (
+        (IMAGE_READY, 'Готова'),
+        (IMAGE_PROCESSING, 'Обрабатывается'),
+        (IMAGE_FAILED, 'Не удалось обработать'),
+    )
+
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста')
@@ -39,12 +63,91 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    image_status = models.CharField(
+        'Состояние картинки',
+        max_length=16,
+        choices=IMAGE_STATUSES,
+        default=IMAGE_READY
+    )
+    image_queued = models.DateTimeField(
+        'Картинка поставлена в обработку',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    excerpt = models.CharField(
+        'Начало текста',
+        max_length=EXCERPT_LENGTH + len(ELLIPSIS),
+        blank=True,
+        editable=False
+    )
+    excerpt_truncated = models.BooleanField(
+        'Текст обрезан',
+        default=False,
+        editable=False
+    )
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt, self.excerpt_truncated = make_excerpt(self.text)
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'excerpt', 'excerpt_truncated'
+                }
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['-pub_date'], name='post_pub_date_idx'),
+            models.Index(
+                fields=['author', '-pub_date'], name='post_author_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date'], name='post_group_date_idx'
+            ),
+        ]
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats'
+    )
+    posts_count = models.IntegerField('Количество постов', default=0)
+    last_post_date = models.DateTimeField(
+        'Дата последнего поста',
+        null=True,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+
+class GroupActivity(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='activity'
+    )
+    date = models.DateField('День')
+    posts_count = models.IntegerField('Количество постов', default=0)
+
+    class Meta:
+        verbose_name = 'Активность группы'
+        verbose_name_plural = 'Активность групп'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('group', 'date'), name='unique_group_activity'),
+        ]
 
 
 class Comment(models.Model):
@@ -65,6 +168,12 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ['-created']
+        indexes = [
+            models.Index(fields=['-created'], name='comment_created_idx'),
+            models.Index(
+                fields=['post', '-created'], name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -90,3 +199,176 @@ class Follow(models.Model):
                     user=models.F('author')), name='user_author_diff'
             )
         ]
+
+
+class Tag(models.Model):
+    name = models.CharField('Хештег', max_length=100, unique=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+    class Meta:
+        verbose_name = 'Хештег'
+        verbose_name_plural = 'Хештеги'
+
+
+class PostTag(models.Model):
+    """Хештег поста; дата публикации скопирована для ленты тега по индексу."""
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Хештег'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Хештег поста'
+        verbose_name_plural = 'Хештеги постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('tag', 'post'), name='unique_post_tag'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date', '-post'],
+                name='posttag_tag_date_idx'
+            ),
+        ]
+
+
+class ArchivedPost(models.Model):
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст поста')
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name='Автор',
+        related_name='archived_posts'
+    )
+    group = models.ForeignKey(
+        Group, blank=True,
+        null=True, on_delete=models.SET_NULL,
+        verbose_name='Группа',
+        related_name='archived_posts'
+    )
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        blank=True
+    )
+    image_status = models.CharField(
+        'Состояние картинки',
+        max_length=16,
+        choices=Post.IMAGE_STATUSES,
+        default=Post.IMAGE_READY
+    )
+    excerpt = models.CharField(
+        'Начало текста',
+        max_length=EXCERPT_LENGTH + len(ELLIPSIS),
+        blank=True,
+        editable=False
+    )
+    excerpt_truncated = models.BooleanField(
+        'Текст обрезан',
+        default=False,
+        editable=False
+    )
+    archived_at = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    def __str__(self):
+        return self.text[:15]
+
+    class Meta:
+        ordering = ['-pub_date']
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='archived_post_author_date_idx'
+            ),
+        ]
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        related_name='comments',
+        on_delete=models.CASCADE
+    )
+    author = models.ForeignKey(
+        User,
+        related_name='archived_comments',
+        on_delete=models.CASCADE
+    )
+    text = models.TextField()
+    created = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created']
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', '-created'],
+                name='archived_comment_post_idx'
+            ),
+        ]
+
+
+class DeletionJob(models.Model):
+    USER = 'user'
+    GROUP = 'group'
+    KINDS = (
+        (USER, 'Пользователь'),
+        (GROUP, 'Группа'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField('Что удаляется', max_length=16, choices=KINDS)
+    object_id = models.IntegerField('Идентификатор')
+    label = models.CharField('Название', max_length=200)
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    stage = models.CharField('Этап', max_length=32, blank=True)
+    deleted = models.IntegerField('Удалено строк', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    claim = models.CharField(
+        'Обработчик', max_length=32, blank=True, editable=False
+    )
+    heartbeat = models.DateTimeField(
+        'Последняя отметка обработчика', null=True, blank=True
+    )
+    finished = models.DateTimeField('Завершено', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.label}'
+
+    class Meta:
+        ordering = ['created']
+        verbose_name = 'Удаление'
+        verbose_name_plural = 'Удаления'
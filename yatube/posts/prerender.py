@@ -0,0 +1,177 @@
+from django.conf import settings
+from django.urls import reverse
+
+from core.prerender import schedule
+
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post, User
+)
+
+
+def index_page():
+    return reverse('posts:index')
+
+
+def group_page(slug):
+    return reverse('posts:group_list', args=[slug])
+
+
+def profile_page(username):
+    return reverse('posts:profile', args=[username])
+
+
+def post_page(pk):
+    return reverse('posts:post_detail', args=[pk])
+
+
+def post_pages(post):
+    """Лента, страница поста, профиль автора и страницы его групп.
+
+    Учитывается и прежняя группа, из которой пост перенесли.
+    """
+    group_ids = {post.group_id, getattr(post, '_old_group_id', None)}
+    slugs = Group.objects.filter(pk__in=group_ids - {None}).values_list(
+        'slug', flat=True
+    )
+    username = User.objects.filter(pk=post.author_id).values_list(
+        'username', flat=True
+    ).first()
+    pages = {index_page(), post_page(post.pk)}
+    pages.update(group_page(slug) for slug in slugs)
+    if username:
+        pages.add(profile_page(username))
+    return pages
+
+
+def detached_pages(post_ids, author_ids):
+    """Страницы постов, которые отвязали от группы одним UPDATE без сигналов.
+
+    Ссылка на группу пропадает с карточек в ленте, профилях авторов
+    и на страницах самих постов.
+    """
+    usernames = User.objects.filter(pk__in=author_ids).values_list(
+        'username', flat=True
+    )
+    pages = {index_page()} | {post_page(pk) for pk in post_ids}
+    pages.update(profile_page(username) for username in usernames)
+    return pages
+
+
+def comment_pages(comment):
+    """Число и последние комментарии видны во всех лентах с постом."""
+    post = Post.objects.filter(pk=comment.post_id).first()
+    return post_pages(post) if post else {post_page(comment.post_id)}
+
+
+def archived_post_pages(post):
+    """Архивный пост виден только на своей странице и в профиле автора."""
+    pages = {post_page(post.pk)}
+    username = User.objects.filter(pk=post.author_id).values_list(
+        'username', flat=True
+    ).first()
+    if username:
+        pages.add(profile_page(username))
+    return pages
+
+
+def archived_comment_pages(comment):
+    post = ArchivedPost.objects.filter(pk=comment.post_id).first()
+    return archived_post_pages(post) if post else {post_page(comment.post_id)}
+
+
+def group_pages(group):
+    """Страница группы и лента, где на карточках указано её название."""
+    slugs = {group.slug, getattr(group, '_old_slug', None)}
+    return {index_page()} | {group_page(slug) for slug in slugs if slug}
+
+
+def user_pages(user):
+    """Профиль, лента и страницы постов, где видно имя пользователя.
+
+    Это его посты и посты, которые он комментировал, в том числе
+    архивные. Лента меняется и когда автора деактивируют.
+    """
+    usernames = {user.username, getattr(user, '_old_username', None)}
+    pages = {index_page()} | {
+        profile_page(username) for username in usernames if username
+    }
+    for posts in (
+        Post.objects.filter(author_id=user.pk).values_list('pk', flat=True),
+        ArchivedPost.objects.filter(author_id=user.pk).values_list(
+            'pk', flat=True
+        ),
+        Comment.objects.filter(author_id=user.pk).values_list(
+            'post_id', flat=True
+        ),
+        ArchivedComment.objects.filter(author_id=user.pk).values_list(
+            'post_id', flat=True
+        ),
+    ):
+        pages.update(post_page(pk) for pk in posts.iterator())
+    return pages
+
+
+def follow_pages(follow):
+    usernames = User.objects.filter(
+        pk__in=(follow.user_id, follow.author_id)
+    ).values_list('username', flat=True)
+    return {profile_page(username) for username in usernames}
+
+
+PAGE_DEPENDENCIES = {
+    Post: post_pages,
+    Comment: comment_pages,
+    ArchivedPost: archived_post_pages,
+    ArchivedComment: archived_comment_pages,
+    Group: group_pages,
+    User: user_pages,
+    Follow: follow_pages,
+}
+
+
+IGNORED_FIELDS = {'last_login'}
+
+
+def remember_previous(instance, field):
+    """Запоминает прежнее значение поля, чтобы убрать старую страницу."""
+    if settings.PRERENDER['ENABLED'] and instance.pk:
+        setattr(instance, f'_old_{field}', type(instance).objects.filter(
+            pk=instance.pk
+        ).values_list(field, flat=True).first())
+
+
+def schedule_detached(post_ids, author_ids):
+    if settings.PRERENDER['ENABLED']:
+        schedule(detached_pages(post_ids, author_ids))
+
+
+def schedule_pages(instance, update_fields=None):
+    """Ставит в очередь страницы, которые зависят от объекта."""
+    if not settings.PRERENDER['ENABLED']:
+        return
+    if update_fields and set(update_fields) <= IGNORED_FIELDS:
+        return
+    schedule(PAGE_DEPENDENCIES[type(instance)](instance))
+
+
+def all_pages():
+    """Все страницы для анонимных посетителей, включая архивные посты."""
+    yield index_page()
+    yield reverse('about:author')
+    yield reverse('about:tech')
+    groups = Group.objects.filter(is_active=True).values_list(
+        'slug', flat=True
+    )
+    for slug in groups.iterator():
+        yield group_page(slug)
+    users = User.objects.filter(is_active=True).values_list(
+        'username', flat=True
+    )
+    for username in users.iterator():
+        yield profile_page(username)
+    for model in (Post, ArchivedPost):
+        posts = model.objects.filter(author__is_active=True).values_list(
+            'pk', flat=True
+        )
+        for pk in posts.iterator():
+            yield post_page(pk)
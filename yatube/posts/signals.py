@@ -0,0 +1,157 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import autocomplete
+from .group_stats import change_group_stats
+from .media import delete_post_image
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Post, User
+)
+from .prerender import remember_previous, schedule_pages
+from .tags import sync_post_tags
+from .utils import (
+    invalidate_author_cache, invalidate_comments_cache, invalidate_post_cache
+)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_changed(sender, instance, **kwargs):
+    invalidate_post_cache(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_created_or_deleted(sender, instance, created=True, **kwargs):
+    if created:
+        invalidate_author_cache(instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    invalidate_author_cache(instance.user_id, instance.author_id)
+
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_author_cache(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_post_cache(instance.post_id)
+    invalidate_comments_cache(instance.post_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_state(sender, instance, **kwargs):
+    old = instance.pk and Post.objects.filter(pk=instance.pk).values_list(
+        'image', 'group_id'
+    ).first()
+    instance._old_image, instance._old_group_id = old or (None, None)
+
+
+@receiver(post_save, sender=Post)
+def update_group_stats(sender, instance, created, **kwargs):
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if created:
+        change_group_stats(instance.group_id, instance.pub_date, 1)
+    elif old_group_id != instance.group_id:
+        change_group_stats(old_group_id, instance.pub_date, -1)
+        change_group_stats(instance.group_id, instance.pub_date, 1)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_group_stats(sender, instance, **kwargs):
+    change_group_stats(instance.group_id, instance.pub_date, -1)
+
+
+@receiver(post_save, sender=Post)
+def delete_replaced_image(sender, instance, **kwargs):
+    old_image = getattr(instance, '_old_image', None)
+    if old_image and old_image != instance.image.name:
+        transaction.on_commit(lambda: delete_post_image(old_image))
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def delete_image(sender, instance, **kwargs):
+    image = instance.image.name
+    if image:
+        transaction.on_commit(lambda: delete_post_image(image))
+
+
+@receiver(pre_save, sender=Group)
+def remember_slug(sender, instance, **kwargs):
+    remember_previous(instance, 'slug')
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, **kwargs):
+    remember_previous(instance, 'username')
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Group)
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Follow)
+@receiver(post_delete, sender=ArchivedPost)
+@receiver(post_delete, sender=ArchivedComment)
+def regenerate_pages(sender, instance, update_fields=None, **kwargs):
+    schedule_pages(instance, update_fields)
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    transaction.on_commit(lambda: autocomplete.update_user(instance))
+
+
+@receiver(post_save, sender=Group)
+def index_group(sender, instance, **kwargs):
+    transaction.on_commit(lambda: autocomplete.update_group(instance))
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def unindex(sender, instance, **kwargs):
+    kind = 'user' if sender is User else 'group'
+    transaction.on_commit(lambda: autocomplete.remove(kind, instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Follow)
+def follow_popularity(sender, instance, signal, created=False, **kwargs):
+    if created or signal is post_delete:
+        delta = (1, 0) if created else (-1, 0)
+        transaction.on_commit(lambda: autocomplete.change_popularity(
+            'user', instance.author_id, delta
+        ))
+
+
+@receiver([post_save, post_delete], sender=Post)
+def post_popularity(sender, instance, signal, created=False, **kwargs):
+    deleted = signal is post_delete
+    changes = []
+    if created or deleted:
+        sign = -1 if deleted else 1
+        changes = [
+            ('user', instance.author_id, (0, sign)),
+            ('group', instance.group_id, (sign, 0)),
+        ]
+    elif getattr(instance, '_old_group_id', None) != instance.group_id:
+        changes = [
+            ('group', instance._old_group_id, (-1, 0)),
+            ('group', instance.group_id, (1, 0)),
+        ]
+    for kind, pk, delta in changes:
+        transaction.on_commit(
+            lambda kind=kind, pk=pk, delta=delta:
+            autocomplete.change_popularity(kind, pk, delta)
+        )
+
+
+@receiver(post_save, sender=Post)
+def update_post_tags(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'text' in update_fields:
+        sync_post_tags(instance)
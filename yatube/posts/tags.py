@@ -0,0 +1,113 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.db import transaction
+from django.db.models import Q
+
+from .models import Post, PostTag, Tag
+
+HASHTAG = re.compile(r'(?<![\w&#])#(\w{1,100})')
+MAX_TAGS = 30
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MAX_POST_ID = 2 ** 63 - 1
+
+
+def normalize_tag(name):
+    return name.casefold().replace('ё', 'е')
+
+
+def extract_tags(text):
+    """Хештеги текста без повторов, в порядке появления."""
+    names = dict.fromkeys(
+        normalize_tag(name) for name in HASHTAG.findall(text)
+    )
+    return list(names)[:MAX_TAGS]
+
+
+def tokenize_chunk(rows):
+    """Хештеги для пачки (id, текст); выполняется в процессах пула."""
+    return [(pk, extract_tags(text)) for pk, text in rows]
+
+
+def get_tag_ids(names):
+    """Идентификаторы тегов по именам; новые теги создаются пакетом."""
+    if not names:
+        return {}
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    return dict(
+        Tag.objects.filter(name__in=names).values_list('name', 'pk')
+    )
+
+
+def save_post_tags(tags_by_post, pub_dates):
+    """Заменяет хештеги постов пачкой: одна вставка и одно удаление."""
+    tag_ids = get_tag_ids({
+        name for names in tags_by_post.values() for name in names
+    })
+    with transaction.atomic():
+        PostTag.objects.filter(post_id__in=tags_by_post).delete()
+        PostTag.objects.bulk_create([
+            PostTag(
+                tag_id=tag_ids[name], post_id=pk, pub_date=pub_dates[pk]
+            )
+            for pk, names in tags_by_post.items()
+            for name in names
+        ])
+
+
+def sync_post_tags(post):
+    save_post_tags(
+        {post.pk: extract_tags(post.text)}, {post.pk: post.pub_date}
+    )
+
+
+def encode_cursor(post_tag):
+    delta = post_tag.pub_date - EPOCH
+    microseconds = (delta.days * 86400 + delta.seconds) * 10 ** 6 + (
+        delta.microseconds
+    )
+    return f'{microseconds}.{post_tag.post_id}'
+
+
+def decode_cursor(cursor):
+    """Дата и id последнего поста страницы; ValueError для неверного."""
+    microseconds, post_id = cursor.split('.')
+    try:
+        pub_date = EPOCH + timedelta(microseconds=int(microseconds))
+    except OverflowError:
+        raise ValueError(f'Дата курсора вне допустимого диапазона: {cursor}')
+    post_id = int(post_id)
+    if not 0 < post_id <= MAX_POST_ID:
+        raise ValueError(f'Неверный id поста в курсоре: {cursor}')
+    return pub_date, post_id
+
+
+def get_tag_page(tag, per_page, cursor=None):
+    """Посты тега, начиная после курсора, и курсор следующей страницы.
+
+    Страница читается по индексу (tag, -pub_date, -post) без OFFSET,
+    поэтому дальние страницы не дороже первой.
+    """
+    post_tags = PostTag.objects.filter(
+        tag=tag, post__author__is_active=True
+    ).order_by('-pub_date', '-post_id')
+    if cursor:
+        pub_date, post_id = decode_cursor(cursor)
+        post_tags = post_tags.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, post_id__lt=post_id)
+        )
+    post_tags = list(post_tags[:per_page + 1])
+    next_cursor = None
+    if len(post_tags) > per_page:
+        post_tags = post_tags[:per_page]
+        next_cursor = encode_cursor(post_tags[-1])
+    posts = Post.objects.filter(
+        pk__in=[post_tag.post_id for post_tag in post_tags]
+    ).select_related('author', 'group').defer('text').in_bulk()
+    return [
+        posts[post_tag.post_id] for post_tag in post_tags
+        if post_tag.post_id in posts
+    ], next_cursor
@@ -0,0 +1,24 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import conditional_escape, format_html
+from django.utils.safestring import mark_safe
+
+from ..tags import HASHTAG, normalize_tag
+
+register = template.Library()
+
+
+@register.filter(needs_autoescape=True)
+def linkify_hashtags(text, autoescape=True):
+    """Заменяет #хештеги ссылками на ленты тегов."""
+    if autoescape:
+        text = conditional_escape(text)
+
+    def link(match):
+        return format_html(
+            '<a href="{}">#{}</a>',
+            reverse('posts:tag_posts', args=[normalize_tag(match.group(1))]),
+            match.group(1)
+        )
+
+    return mark_safe(HASHTAG.sub(link, text))
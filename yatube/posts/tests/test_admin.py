@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.contrib import admin
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+from ..admin import LargeTableAdmin
+from ..models import Comment, Follow, Group, Post, User
+
+
+class LargeTableAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author, group=cls.group)
+            for i in range(5)
+        )
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Первый, "с кавычками"'
+        )
+        Follow.objects.create(user=cls.admin, author=cls.author)
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def test_post_changelist_does_not_list_groups(self):
+        """Список постов не выводит все группы в каждой строке"""
+        for i in range(3):
+            Group.objects.create(
+                title=f'Лишняя группа {i}', slug=f'extra-{i}',
+                description='Описание'
+            )
+        response = self.admin_client.get(
+            reverse('admin:posts_post_changelist')
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Лишняя группа')
+
+    def test_no_date_hierarchy_on_large_tables(self):
+        """Большие таблицы не строят навигацию по датам полным проходом"""
+        for model, model_admin in admin.site._registry.items():
+            if isinstance(model_admin, LargeTableAdmin):
+                with self.subTest(model=model):
+                    self.assertIsNone(model_admin.date_hierarchy)
+
+    def test_estimated_count(self):
+        """Сверх порога число строк оценивается без полного подсчёта"""
+        queryset = Post.objects.all()
+        with mock.patch('core.paginator.EXACT_COUNT_LIMIT', 2):
+            self.assertEqual(
+                EstimatedCountPaginator(queryset, 2).count,
+                queryset.order_by('-pk').first().pk
+            )
+            self.assertEqual(
+                EstimatedCountPaginator(
+                    queryset.filter(author=self.author), 2
+                ).count,
+                2
+            )
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 5)
+
+    def test_comments_exported_to_csv(self):
+        """Комментарии выгружаются в CSV потоком"""
+        comment = Comment.objects.get()
+        response = self.admin_client.post(
+            reverse('admin:posts_comment_changelist'),
+            {'action': 'export_as_csv', '_selected_action': [comment.pk]}
+        )
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'pk,post_id,author__username,created,text')
+        self.assertTrue(lines[1].endswith(',"Первый, ""с кавычками"""'))
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..media import get_live_images
+from ..models import ArchivedComment, ArchivedPost, Comment, Post, User
+from ..utils import NUMBER_OF_POST
+from .test_media import SMALL_GIF
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_old(*posts, days=800):
+    """Сдвигает даты постов в прошлое, сохраняя их порядок."""
+    for age, post in enumerate(reversed(posts)):
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=days, minutes=age)
+        )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ArchivePostsCommandTests(TransactionTestCase):
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_old_posts_moved_with_comments_and_image(self):
+        """Старые посты переносятся в архив с комментариями и картинкой"""
+        user = User.objects.create_user(username='user')
+        old = Post.objects.create(
+            author=user,
+            text='Старый пост',
+            image=SimpleUploadedFile('old.gif', SMALL_GIF, 'image/gif')
+        )
+        fresh = Post.objects.create(author=user, text='Свежий пост')
+        comment = Comment.objects.create(post=old, author=user, text='Ответ')
+        make_old(old)
+        call_command('archive_posts', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(Post.objects.all()), [fresh])
+        archived = ArchivedPost.objects.get()
+        self.assertEqual(
+            (archived.pk, archived.text, archived.image.name),
+            (old.pk, 'Старый пост', 'posts/old.gif')
+        )
+        self.assertEqual(
+            list(ArchivedComment.objects.values_list('pk', 'post_id')),
+            [(comment.pk, old.pk)]
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.assertTrue(
+            os.path.exists(os.path.join(TEMP_MEDIA_ROOT, 'posts/old.gif'))
+        )
+        self.assertIn('posts/old.gif', get_live_images())
+
+
+class ArchiveFallbackTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='archivist')
+        cls.archived = [
+            Post.objects.create(author=cls.user, text=f'Архивный {i}')
+            for i in range(4)
+        ]
+        Comment.objects.create(
+            post=cls.archived[0], author=cls.user, text='Старый ответ'
+        )
+        make_old(*cls.archived)
+        call_command('archive_posts', stdout=StringIO())
+        cls.hot = [
+            Post.objects.create(author=cls.user, text=f'Рабочий {i}')
+            for i in range(NUMBER_OF_POST - 2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_post_detail_falls_back_to_archive(self):
+        """Архивный пост открывается по прежнему адресу"""
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'pk': self.archived[0].pk})
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['archived'])
+        self.assertContains(response, 'Старый ответ')
+        self.assertNotContains(
+            response,
+            reverse('posts:post_edit', kwargs={'post_id': self.archived[0].pk})
+        )
+
+    def test_archived_hashtags_not_linked(self):
+        """Хештеги архивного поста не ведут в ленту тега без него"""
+        ArchivedPost.objects.filter(pk=self.archived[1].pk).update(
+            text='Архивный 1 #старое'
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'pk': self.archived[1].pk})
+        )
+        self.assertContains(response, '#старое')
+        self.assertNotContains(
+            response, reverse('posts:tag_posts', args=['старое'])
+        )
+
+    def test_profile_lists_archive_after_hot_posts(self):
+        """Профиль показывает архивные посты после рабочих"""
+        url = reverse('posts:profile', kwargs={'username': 'archivist'})
+        first = self.client.get(url).context
+        second = self.client.get(url, {'page': 2}).context
+        self.assertEqual(first['posts_count'], NUMBER_OF_POST + 2)
+        self.assertEqual(
+            [post.text for post in first['page_obj']][-3:],
+            ['Рабочий 0', 'Архивный 3', 'Архивный 2']
+        )
+        self.assertEqual(
+            [post.text for post in second['page_obj']],
+            ['Архивный 1', 'Архивный 0']
+        )
+        self.assertEqual(second['page_obj'][1].comments_count, 1)
@@ -0,0 +1,107 @@
+from django.conf import settings
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from .. import autocomplete
+from ..models import Follow, Group, Post, User
+
+
+def labels(query, limit=10):
+    return [result['label'] for result in autocomplete.search(query, limit)]
+
+
+class AutocompleteTests(TransactionTestCase):
+    def setUp(self):
+        autocomplete._index = None
+        self.anna = User.objects.create_user(
+            username='anna', first_name='Анна', last_name='Петрова'
+        )
+        self.andrey = User.objects.create_user(username='andrey')
+        for name in ('reader1', 'reader2'):
+            Follow.objects.create(
+                user=User.objects.create_user(username=name),
+                author=self.anna
+            )
+        self.cats = Group.objects.create(
+            title='Котики Москвы', slug='cats', description='-'
+        )
+
+    def tearDown(self):
+        autocomplete._index = None
+
+    def test_users_ranked_by_followers(self):
+        """Пользователи находятся по имени и фамилии, популярные выше"""
+        self.assertEqual(labels('an'), ['Анна Петрова (@anna)', 'andrey'])
+        self.assertEqual(labels('пет'), ['Анна Петрова (@anna)'])
+        self.assertEqual(labels('АННА ПЕТ'), ['Анна Петрова (@anna)'])
+        self.assertEqual(labels('zzz'), [])
+
+    def test_groups_by_title_word_and_slug(self):
+        """Группа находится по слову названия и по slug"""
+        self.assertEqual(labels('моск'), ['Котики Москвы'])
+        self.assertEqual(autocomplete.search('cat')[0]['url'], '/group/cats/')
+
+    def test_incremental_updates(self):
+        """Изменения пользователей, групп и популярности видны сразу"""
+        autocomplete.get_index()
+        with self.assertNumQueries(0):
+            labels('an')
+        User.objects.create_user(username='anton')
+        Follow.objects.create(user=self.anna, author=self.andrey)
+        Follow.objects.create(user=User.objects.get(
+            username='reader1'
+        ), author=self.andrey)
+        Post.objects.create(text='Пост', author=self.andrey)
+        self.assertEqual(labels('an')[0], 'andrey')
+        self.assertIn('anton', labels('ant'))
+        self.anna.is_active = False
+        self.anna.save()
+        self.assertNotIn('Анна Петрова (@anna)', labels('an'))
+        self.cats.slug = 'kittens'
+        self.cats.save()
+        self.assertEqual(labels('cats'), [])
+        self.assertEqual(labels('kit'), ['Котики Москвы'])
+        self.cats.delete()
+        self.assertEqual(labels('кот'), [])
+
+    @override_settings(AUTOCOMPLETE={
+        **settings.AUTOCOMPLETE, 'SCAN_LIMIT': 1
+    })
+    def test_short_prefix_uses_cached_top(self):
+        """Лучшие записи широкого префикса кешируются до изменения"""
+        self.assertEqual(labels('a', 1), ['Анна Петрова (@anna)'])
+        self.assertIn('a', autocomplete.get_index().top)
+        Follow.objects.filter(author=self.anna).delete()
+        User.objects.create_user(username='a_popular')
+        self.assertNotIn('a', autocomplete.get_index().top)
+
+    @override_settings(AUTOCOMPLETE={
+        **settings.AUTOCOMPLETE, 'BACKGROUND': False
+    })
+    def test_stale_index_served_during_rebuild(self):
+        """Пока индекс перестраивается, запросы ищут по старому"""
+        stale = autocomplete.get_index()
+        stale.built -= settings.AUTOCOMPLETE['REBUILD_INTERVAL']
+        self.assertTrue(autocomplete._build_lock.acquire(blocking=False))
+        try:
+            with self.assertNumQueries(0):
+                self.assertIs(autocomplete.get_index(), stale)
+        finally:
+            autocomplete._build_lock.release()
+        self.assertIs(autocomplete.get_index(), stale)
+        self.assertIsNot(autocomplete.get_index(), stale)
+        self.assertFalse(autocomplete._build_lock.locked())
+
+    def test_endpoint(self):
+        """Эндпоинт отдаёт подсказки в JSON"""
+        response = Client().get(reverse('posts:autocomplete'), {'q': 'ann'})
+        self.assertEqual(response.json()['results'], [{
+            'type': 'user', 'label': 'Анна Петрова (@anna)',
+            'url': '/profile/anna/',
+        }])
+        self.assertEqual(
+            Client().get(
+                reverse('posts:autocomplete'), {'limit': 'x'}
+            ).status_code,
+            400
+        )
@@ -0,0 +1,172 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..deletion import claim_job, run_job, schedule_deletion
+from ..models import (
+    ArchivedComment, ArchivedPost, Comment, DeletionJob, Follow, Group,
+    GroupStats, Post, User
+)
+
+
+class BatchedDeletionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='prolific')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+            for i in range(5)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Ответ читателя'
+        )
+        Comment.objects.create(
+            post=Post.objects.create(text='Чужой пост', author=cls.reader),
+            author=cls.author,
+            text='Ответ автора'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_user_hidden_at_once_and_deleted_in_batches(self):
+        """Пользователь скрывается сразу, а удаляется пакетами"""
+        job = schedule_deletion(self.author)
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:profile', kwargs={'username': 'prolific'})
+            ).status_code,
+            404
+        )
+        self.assertEqual(
+            [post.text for post in self.client.get(
+                reverse('posts:index')
+            ).context['page_obj']],
+            ['Чужой пост']
+        )
+        self.assertFalse(run_job(job, batch_size=2, max_batches=2))
+        self.assertEqual(job.stage, 'post_comments')
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
+        reports = []
+        self.assertTrue(run_job(job, batch_size=2, progress=reports.append))
+        self.assertEqual(job.status, DeletionJob.DONE)
+        self.assertEqual(job.deleted, 9)
+        self.assertTrue(reports)
+        self.assertFalse(User.objects.filter(pk=self.author.pk).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), []
+        )
+        self.assertEqual(Post.objects.get().text, 'Чужой пост')
+
+    def test_archived_replies_deleted_before_archived_posts(self):
+        """Чужие комментарии к архивным постам удаляются своим этапом"""
+        now = timezone.now()
+        post = ArchivedPost.objects.create(
+            id=1000, text='Архивный пост', pub_date=now, author=self.author
+        )
+        ArchivedComment.objects.create(
+            id=1000, post=post, author=self.reader, text='Ответ',
+            created=now
+        )
+        job = schedule_deletion(self.author)
+        while ArchivedComment.objects.exists():
+            self.assertFalse(run_job(job, batch_size=10, max_batches=1))
+            self.assertTrue(ArchivedPost.objects.exists())
+        self.assertEqual(job.stage, 'archived_post_comments')
+        self.assertTrue(run_job(job, batch_size=10))
+        self.assertFalse(ArchivedPost.objects.exists())
+
+    def test_group_posts_detached_before_group_deleted(self):
+        """Посты удаляемой группы остаются без группы"""
+        schedule_deletion(self.group)
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'group'})
+        )
+        self.assertEqual(response.status_code, 404)
+        call_command('process_deletions', batch_size=2, stdout=StringIO())
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(
+            Post.objects.filter(author=self.author, group=None).count(), 5
+        )
+
+    def test_detached_posts_update_stats_and_pages(self):
+        """Отвязка постов обновляет статистику группы и готовые страницы"""
+        job = schedule_deletion(self.group)
+        with self.settings(PRERENDER={
+            **settings.PRERENDER, 'ENABLED': True
+        }), mock.patch('posts.prerender.schedule') as schedule:
+            self.assertFalse(run_job(job, batch_size=10, max_batches=1))
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).posts_count, 0
+        )
+        pages = schedule.call_args[0][0]
+        self.assertIn(
+            reverse('posts:post_detail', args=[self.posts[0].pk]), pages
+        )
+        self.assertIn(
+            reverse('posts:profile', kwargs={'username': 'prolific'}), pages
+        )
+
+    def test_job_claimed_by_one_runner(self):
+        """Задание выполняет один обработчик, зависшее забирает другой"""
+        job = schedule_deletion(self.author)
+        self.assertTrue(claim_job(job))
+        other = DeletionJob.objects.get(pk=job.pk)
+        self.assertFalse(claim_job(other))
+        self.assertFalse(run_job(other, batch_size=2))
+
+        def steal(job):
+            DeletionJob.objects.filter(pk=job.pk).update(
+                heartbeat=timezone.now() - timedelta(
+                    seconds=settings.DELETION['STALE_AFTER'] + 1
+                )
+            )
+            self.assertTrue(claim_job(other))
+
+        with self.assertLogs('posts.deletion', 'WARNING'):
+            self.assertFalse(run_job(job, batch_size=2, progress=steal))
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.assertTrue(run_job(other, batch_size=2))
+        self.assertEqual(DeletionJob.objects.get().deleted, 9)
+
+    def test_admin_delete_routed_through_queue(self):
+        """Удаление в админке ставит задание в очередь"""
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        client.post(
+            reverse('admin:auth_user_delete', args=[self.author.pk]),
+            {'post': 'yes'}
+        )
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertEqual(
+            DeletionJob.objects.get().status, DeletionJob.PENDING
+        )
+        out = StringIO()
+        call_command('process_deletions', stdout=out)
+        self.assertIn('удалено строк', out.getvalue())
+        self.assertFalse(User.objects.filter(username='prolific').exists())
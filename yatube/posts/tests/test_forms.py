@@ -1,12 +1,23 @@
+import os
 import shutil
 import tempfile
+import time
+from datetime import timedelta
+from http import HTTPStatus
+from io import BytesIO, StringIO
 
 from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, Client, override_settings
+from django.core.management import call_command
+from django.test import (
+    TestCase, TransactionTestCase, Client, override_settings
+)
 from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
 
 from ..forms import PostForm
+from ..images import TEMP_PREFIX
 from ..models import Group, Post, User, Comment
 
 ONE_POST: int = 1
@@ -119,7 +130,10 @@ class PostFormTest(TestCase):
 
 
 #
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_PROCESSING={**settings.IMAGE_PROCESSING, 'WORKERS': 0}
+)
 class PostCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -210,3 +224,141 @@ class PostCreateFormTests(TestCase):
                 self.assertEqual(response.context['post'].text, post.text)
                 self.assertEqual(response.context['post'].group, post.group)
                 self.assertEqual(response.context['post'].author, self.user)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_PROCESSING={
+        **settings.IMAGE_PROCESSING, 'MAX_DIMENSION': 100, 'WORKERS': 0
+    }
+)
+class ImageProcessingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def make_jpeg(self):
+        image = Image.new('RGB', (400, 200), 'red')
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        content = BytesIO()
+        image.save(content, format='JPEG', exif=exif)
+        return SimpleUploadedFile(
+            'photo.jpg', content.getvalue(), content_type='image/jpeg'
+        )
+
+    def test_uploaded_image_downscaled_without_exif(self):
+        """Картинка уменьшается и сохраняется без EXIF"""
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с фото', 'image': self.make_jpeg()}
+        )
+        post = Post.objects.get(text='Пост с фото')
+        self.assertEqual(post.image_status, Post.IMAGE_READY)
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertNotIn(0x010F, image.getexif())
+
+    def test_broken_image_marked_failed(self):
+        """Повреждённая картинка помечается ошибкой, пост сохраняется"""
+        with self.assertLogs('posts.images', 'ERROR'):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={
+                    'text': 'Битая картинка',
+                    'image': SimpleUploadedFile(
+                        'broken.gif', b'not an image',
+                        content_type='image/gif'
+                    ),
+                }
+            )
+        post = Post.objects.get(text='Битая картинка')
+        self.assertEqual(post.image_status, Post.IMAGE_FAILED)
+        self.assertFalse(post.image)
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    IMAGE_PROCESSING={**settings.IMAGE_PROCESSING, 'WORKERS': 1}
+)
+class ImageProcessingPoolTests(TransactionTestCase):
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_image_processed_in_pool(self):
+        """Картинка обрабатывается в пуле процессов после ответа"""
+        user = User.objects.create_user(username='user')
+        client = Client()
+        client.force_login(user)
+        content = BytesIO()
+        Image.new('RGB', (10, 10)).save(content, format='PNG')
+        response = client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'Пост из пула',
+                'image': SimpleUploadedFile('pool.png', content.getvalue()),
+            }
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        deadline = time.time() + 10
+        post = Post.objects.get(text='Пост из пула')
+        while post.image_status == Post.IMAGE_PROCESSING:
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.05)
+            post.refresh_from_db()
+        self.assertEqual(post.image_status, Post.IMAGE_READY)
+        self.assertEqual(post.image.name, 'posts/pool.png')
+
+
+class ImageRecoveryTests(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+
+    def make_file(self, name, age):
+        path = os.path.join(self.temp_dir, name)
+        open(path, 'wb').close()
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+        return path
+
+    def test_stale_images_failed_and_temp_files_removed(self):
+        """Зависшие картинки помечаются ошибкой, старые файлы удаляются"""
+        user = User.objects.create_user(username='user')
+        now = timezone.now()
+        stale, fresh = [
+            Post.objects.create(
+                author=user, text=text,
+                image_status=Post.IMAGE_PROCESSING, image_queued=queued
+            )
+            for text, queued in (
+                ('Зависла', now - timedelta(minutes=5)),
+                ('Обрабатывается', now),
+            )
+        ]
+        old = self.make_file(f'{TEMP_PREFIX}old.jpg', 300)
+        new = self.make_file(f'{TEMP_PREFIX}new.jpg', 0)
+        foreign = self.make_file('foreign.jpg', 300)
+        with self.settings(IMAGE_PROCESSING={
+            **settings.IMAGE_PROCESSING, 'TEMP_DIR': self.temp_dir
+        }), self.assertLogs('posts.images', 'ERROR'):
+            call_command(
+                'recover_images', '--older-than', '60', stdout=StringIO()
+            )
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.image_status, Post.IMAGE_FAILED)
+        self.assertEqual(fresh.image_status, Post.IMAGE_PROCESSING)
+        self.assertFalse(os.path.exists(old))
+        self.assertTrue(os.path.exists(new))
+        self.assertTrue(os.path.exists(foreign))
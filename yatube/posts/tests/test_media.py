@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from ..media import iter_media_files
+from ..models import Post, User
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def media_path(name):
+    return os.path.join(TEMP_MEDIA_ROOT, name)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostImageCleanupTests(TransactionTestCase):
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_image_deleted_with_post(self):
+        """Картинка удаляется вместе с постом"""
+        user = User.objects.create_user(username='user')
+        post = Post.objects.create(
+            author=user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('deleted.gif', SMALL_GIF, 'image/gif')
+        )
+        self.assertTrue(os.path.exists(media_path(post.image.name)))
+        post.delete()
+        self.assertFalse(os.path.exists(media_path('posts/deleted.gif')))
+
+    def test_replaced_image_deleted(self):
+        """Заменённая картинка удаляется"""
+        user = User.objects.create_user(username='user')
+        post = Post.objects.create(
+            author=user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('old.gif', SMALL_GIF, 'image/gif')
+        )
+        post.image = SimpleUploadedFile('new.gif', SMALL_GIF, 'image/gif')
+        post.save()
+        self.assertFalse(os.path.exists(media_path('posts/old.gif')))
+        self.assertTrue(os.path.exists(media_path('posts/new.gif')))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ReclaimMediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+
+    def tearDown(self):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_orphans_deleted_live_images_kept(self):
+        """Команда удаляет только файлы без постов"""
+        Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('live.gif', SMALL_GIF, 'image/gif')
+        )
+        for name in ('posts/orphan.gif', 'cache/ab/cd/orphan.jpg'):
+            os.makedirs(os.path.dirname(media_path(name)), exist_ok=True)
+            with open(media_path(name), 'wb') as orphan:
+                orphan.write(SMALL_GIF)
+        call_command(
+            'reclaim_media', '--min-age', '0', '--batch-size', '1',
+            stdout=StringIO()
+        )
+        self.assertTrue(os.path.exists(media_path('posts/live.gif')))
+        self.assertFalse(os.path.exists(media_path('posts/orphan.gif')))
+        self.assertFalse(os.path.exists(media_path('cache/ab/cd/orphan.jpg')))
+        self.assertFalse(os.path.exists(media_path('.reclaim_media.json')))
+
+    def test_orphan_thumbnails_removed_from_kvstore(self):
+        """Миниатюры картинки без поста удаляются из KV-хранилища"""
+        from sorl.thumbnail import get_thumbnail
+        from sorl.thumbnail.models import KVStore
+
+        post = Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('thumb.gif', SMALL_GIF, 'image/gif')
+        )
+        thumbnail = get_thumbnail(post.image, '960x339', crop='center')
+        self.assertTrue(os.path.exists(media_path(thumbnail.name)))
+        Post.objects.filter(pk=post.pk).update(image='')
+        call_command('reclaim_media', '--min-age', '0', stdout=StringIO())
+        self.assertFalse(os.path.exists(media_path(thumbnail.name)))
+        self.assertFalse(os.path.exists(media_path('posts/thumb.gif')))
+        self.assertFalse(KVStore.objects.exists())
+
+    def test_young_files_kept(self):
+        """Свежие файлы не удаляются"""
+        os.makedirs(media_path('posts'), exist_ok=True)
+        with open(media_path('posts/new.gif'), 'wb') as new:
+            new.write(SMALL_GIF)
+        call_command('reclaim_media', stdout=StringIO())
+        self.assertTrue(os.path.exists(media_path('posts/new.gif')))
+
+    def test_resume_after_last_name(self):
+        """Обход идёт по возрастанию имён и продолжается после last"""
+        names = [
+            'posts/a-b/x.gif', 'posts/a.gif', 'posts/a/b/y.gif',
+            'posts/a/z.gif', 'posts/b.gif',
+        ]
+        for name in names:
+            os.makedirs(os.path.dirname(media_path(name)), exist_ok=True)
+            with open(media_path(name), 'wb') as orphan:
+                orphan.write(SMALL_GIF)
+        self.assertEqual(list(iter_media_files('posts/', 0)), names)
+        self.assertEqual(
+            list(iter_media_files('posts/', 0, after='posts/a/b/y.gif')),
+            names[3:]
+        )
+        with open(media_path('.reclaim_media.json'), 'w') as state:
+            state.write('{"last": "posts/a.gif"}')
+        call_command('reclaim_media', '--min-age', '0', stdout=StringIO())
+        for name in names[:2]:
+            self.assertTrue(os.path.exists(media_path(name)))
+        for name in names[2:]:
+            self.assertFalse(os.path.exists(media_path(name)))
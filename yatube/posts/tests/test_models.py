@@ -1,6 +1,6 @@
 from django.test import TestCase
 
-from ..models import Group, Post, User
+from ..models import EXCERPT_LENGTH, Group, Post, User, make_excerpt
 
 
 class PostModelTest(TestCase):
@@ -52,3 +52,35 @@ class PostModelTest(TestCase):
                 self.assertEqual(
                     self.post._meta.get_field(field).help_text, expected_value
                 )
+
+    def test_excerpt_maintained_on_save(self):
+        """Начало текста пересчитывается при сохранении поста"""
+        self.assertEqual(self.post.excerpt, 'Тестовый пост')
+        self.assertFalse(self.post.excerpt_truncated)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'слово ' * EXCERPT_LENGTH
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(
+            (post.excerpt, post.excerpt_truncated), make_excerpt(post.text)
+        )
+        self.assertTrue(post.excerpt_truncated)
+        self.assertLessEqual(len(post.excerpt), EXCERPT_LENGTH + 1)
+        self.assertTrue(post.excerpt.endswith('слово…'))
+
+    def test_excerpt_of_leading_whitespace(self):
+        """Пробелы в начале текста не попадают в начало и не обрезают его"""
+        post = Post.objects.create(
+            author=self.post.author,
+            text=' ' * EXCERPT_LENGTH + '\n' + 'слово ' * 10
+        )
+        self.assertEqual(post.excerpt, 'слово ' * 10)
+        self.assertFalse(post.excerpt_truncated)
+
+    def test_excerpt_truncation_stored(self):
+        """Обрезка хранится отдельно от многоточия в самом тексте"""
+        post = Post.objects.create(
+            author=self.post.author, text='Конец…'
+        )
+        self.assertEqual(post.excerpt, 'Конец…')
+        self.assertFalse(post.excerpt_truncated)
@@ -0,0 +1,115 @@
+import gzip
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.prerender import page_file, regenerate
+from ..models import ArchivedComment, ArchivedPost, Comment, Group, Post, User
+
+PRERENDER_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def read_page(path):
+    with open(page_file(path), encoding='utf-8') as page:
+        return page.read()
+
+
+@override_settings(PRERENDER={
+    'ENABLED': True, 'ROOT': PRERENDER_ROOT, 'BACKGROUND': False
+})
+class PrerenderTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+
+    def tearDown(self):
+        cache.clear()
+        shutil.rmtree(PRERENDER_ROOT, ignore_errors=True)
+
+    def test_post_regenerates_dependent_pages(self):
+        """Новый пост появляется в ленте, группе, профиле и своей странице"""
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Свежая новость'
+        )
+        for path in ('/', '/group/group/', '/profile/writer/',
+                     f'/posts/{post.pk}/'):
+            with self.subTest(path=path):
+                self.assertIn('Свежая новость', read_page(path))
+        self.assertFalse(os.path.exists(page_file('/about/author/')))
+        with gzip.open(page_file('/') + '.gz') as compressed:
+            self.assertIn('Свежая новость', compressed.read().decode())
+
+    def test_comment_and_delete_update_pages(self):
+        """Комментарий обновляет страницу поста, удаление убирает её"""
+        post = Post.objects.create(author=self.author, text='Обсуждение')
+        Comment.objects.create(post=post, author=self.author, text='Ответ')
+        self.assertIn('Ответ', read_page(f'/posts/{post.pk}/'))
+        post.delete()
+        self.assertFalse(os.path.exists(page_file(f'/posts/{post.pk}/')))
+        self.assertNotIn('Обсуждение', read_page('/'))
+
+    def test_renamed_group_removes_old_page(self):
+        """После смены slug страница со старым адресом удаляется"""
+        Post.objects.create(author=self.author, group=self.group, text='Пост')
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertFalse(os.path.exists(page_file('/group/group/')))
+        self.assertIn('Пост', read_page('/group/renamed/'))
+
+    def test_renamed_user_updates_post_pages(self):
+        """Новое имя автора появляется на страницах его постов"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.author.first_name = 'Лев'
+        self.author.last_name = 'Толстой'
+        self.author.save()
+        self.assertIn('Лев Толстой', read_page(f'/posts/{post.pk}/'))
+
+    def test_archived_delete_removes_page(self):
+        """Удаление архивного поста и комментария обновляет страницы"""
+        now = timezone.now()
+        post = ArchivedPost.objects.create(
+            id=1000, text='Архивный пост', pub_date=now, author=self.author
+        )
+        comment = ArchivedComment.objects.create(
+            id=1000, post=post, author=self.author, text='Старый ответ',
+            created=now
+        )
+        regenerate(['/posts/1000/'])
+        self.assertIn('Старый ответ', read_page('/posts/1000/'))
+        comment.delete()
+        self.assertNotIn('Старый ответ', read_page('/posts/1000/'))
+        post.delete()
+        self.assertFalse(os.path.exists(page_file('/posts/1000/')))
+
+    def test_login_does_not_regenerate(self):
+        """Обновление last_login при входе не перестраивает страницы"""
+        os.remove(page_file('/'))
+        self.author.save(update_fields=['last_login'])
+        self.assertFalse(os.path.exists(page_file('/')))
+
+    def test_unsafe_path_is_ignored(self):
+        """Путь с переходом в родительский каталог не даёт файла"""
+        self.assertIsNone(page_file('/profile/../'))
+
+    def test_command_renders_all_and_prunes(self):
+        """Команда собирает все страницы и удаляет лишние"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        stale = page_file('/posts/999/')
+        os.makedirs(os.path.dirname(stale))
+        open(stale, 'w').close()
+        call_command('prerender', prune=True, stdout=StringIO())
+        for path in ('/', '/about/author/', '/about/tech/', '/group/group/',
+                     '/profile/writer/', f'/posts/{post.pk}/'):
+            with self.subTest(path=path):
+                self.assertTrue(os.path.exists(page_file(path)))
+        self.assertFalse(os.path.exists(stale))
@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post, PostTag, Tag, User
+from ..tags import extract_tags
+from ..utils import NUMBER_OF_POST
+
+
+def tag_names(post):
+    return set(post.post_tags.values_list('tag__name', flat=True))
+
+
+class HashtagTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='tagger')
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_extract_tags(self):
+        """Хештеги приводятся к нижнему регистру и не повторяются"""
+        self.assertEqual(
+            extract_tags('#Ёлка и #ёлка, #python3! a#b &#39; ##x'),
+            ['елка', 'python3']
+        )
+
+    def test_tags_follow_post_text(self):
+        """Хештеги сохраняются с постом и обновляются при правке текста"""
+        post = Post.objects.create(author=self.user, text='#Django #sql')
+        self.assertEqual(tag_names(post), {'django', 'sql'})
+        self.assertEqual(post.post_tags.first().pub_date, post.pub_date)
+        post.text = 'Только #django'
+        post.save()
+        self.assertEqual(tag_names(post), {'django'})
+        post.save(update_fields=['image_status'])
+        self.assertEqual(tag_names(post), {'django'})
+
+    def test_tag_feed_cursor_pages(self):
+        """Лента тега листается курсором до конца"""
+        posts = [
+            Post.objects.create(author=self.user, text=f'Пост {i} #news')
+            for i in range(NUMBER_OF_POST + 2)
+        ]
+        Post.objects.create(author=self.user, text='Без тега')
+        url = reverse('posts:tag_posts', args=['NEWS'])
+        response = Client().get(url)
+        first = list(response.context['page_obj'])
+        self.assertEqual(first, posts[::-1][:NUMBER_OF_POST])
+        cursor = response.context['next_cursor']
+        response = Client().get(url, {'after': cursor})
+        self.assertEqual(
+            list(response.context['page_obj']), posts[1::-1]
+        )
+        self.assertIsNone(response.context['next_cursor'])
+        for cursor in (
+            'x', '9' * 30 + '.1', '-' + '9' * 30 + '.1', '1.' + '9' * 30
+        ):
+            with self.subTest(cursor=cursor):
+                response = Client().get(url, {'after': cursor})
+                self.assertEqual(response.status_code, 400)
+        missing = reverse('posts:tag_posts', args=['none'])
+        self.assertEqual(Client().get(missing).status_code, 404)
+
+    def test_post_detail_links_tags(self):
+        """Хештеги в тексте поста ведут на ленту тега"""
+        post = Post.objects.create(author=self.user, text='Про #Python')
+        response = Client().get(reverse('posts:post_detail', args=[post.pk]))
+        self.assertContains(response, '<a href="/tag/python/">#Python</a>')
+
+    def test_backfill_command(self):
+        """Команда заполняет хештеги постов пачками в пуле процессов"""
+        posts = [
+            Post.objects.create(author=self.user, text=f'#old{i % 2} #all')
+            for i in range(5)
+        ]
+        PostTag.objects.all().delete()
+        Tag.objects.all().delete()
+        for workers in (0, 2):
+            with self.subTest(workers=workers):
+                call_command(
+                    'backfill_tags', chunk_size=2, workers=workers,
+                    stdout=StringIO()
+                )
+                self.assertEqual(tag_names(posts[1]), {'old1', 'all'})
+                self.assertEqual(PostTag.objects.count(), 10)
@@ -1,9 +1,22 @@
+import shutil
+import tempfile
+from io import StringIO
+
 from django import forms
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Post, Group, User, Follow
+from ..models import (
+    Comment, Post, Group, GroupActivity, GroupStats, User, Follow
+)
+from ..utils import COMMENT_PREVIEWS, attach_summaries, get_page_links
 
 NUMBER_OF_POSTS: int = 1
 NEW_POSTS: int = 13
@@ -11,6 +24,15 @@ POSTS_ON_FIRST_PAGE: int = 10
 POSTS_ON_SECOND_PAGE: int = 3
 FIRST_PAGE: int = 1
 SECOND_PAGE: int = 2
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
 class PostPagesTests(TestCase):
@@ -194,6 +216,21 @@ class PaginatorViewsTest(TestCase):
                         response.context['page_obj']), posts
                     )
 
+    def test_page_links_windowed(self):
+        """Навигация показывает окно страниц вокруг текущей"""
+        self.assertEqual(get_page_links(1, 3), [1, 2, 3])
+        self.assertEqual(
+            get_page_links(50, 1000),
+            [1, None, 48, 49, 50, 51, 52, None, 1000]
+        )
+        self.assertEqual(
+            get_page_links(4, 9), [1, 2, 3, 4, 5, 6, None, 9]
+        )
+        response = self.authorized_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        )
+        self.assertEqual(response.context['page_obj'].page_links, [1, 2])
+
 
 class ViewFollowTests(TestCase):
     @classmethod
@@ -246,6 +283,20 @@ class ViewFollowTests(TestCase):
             )
         )
 
+    def test_follow_rate_limited(self):
+        """Частые подписки и отписки ограничиваются ответом 429"""
+        url = reverse('posts:profile_follow', kwargs={'username': self.user3})
+        with self.settings(RATELIMIT={
+            'ENABLED': True, 'POLICIES': {'follow': {'user': '2/m'}},
+        }):
+            statuses = [
+                self.authorized_client1.get(url).status_code
+                for _ in range(3)
+            ]
+            other = self.authorized_client2.get(url)
+        self.assertEqual(statuses, [302, 302, 429])
+        self.assertEqual(other.status_code, 302)
+
     def test_following_post_in_follower_index_context(self):
         """Новая запись пользователя появляется в ленте подписчика и
         не появляется в ленте других"""
@@ -271,3 +322,366 @@ class ViewFollowTests(TestCase):
         self.assertEqual(response.context['post'].author, post.author)
         self.assertEqual(response.context['post'].group, None)
         self.assertNotIn(post, response2.context['page_obj'])
+
+
+class PostsBulkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='bulk_user')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='bulk-slug',
+            description='Тестовое описание'
+        )
+        cls.posts = Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(NEW_POSTS)
+        )
+        cls.ids = list(
+            Post.objects.order_by('pk').values_list('pk', flat=True)
+        )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_posts_bulk_returns_posts_in_requested_order(self):
+        """Пакетный запрос возвращает посты в порядке переданных id"""
+        ids = list(reversed(self.ids)) + [self.ids[-1] + 100]
+        response = self.client.get(
+            reverse('posts:posts_bulk'),
+            {'ids': ','.join(map(str, ids))}
+        )
+        posts = response.json()['posts']
+        self.assertEqual([post['id'] for post in posts], ids[:-1])
+        self.assertEqual(posts[0]['author']['username'], 'bulk_user')
+        self.assertEqual(posts[0]['group']['slug'], 'bulk-slug')
+        self.assertEqual(posts[0]['comments_count'], 0)
+
+    def test_posts_bulk_uses_constant_number_of_queries(self):
+        """Число запросов не зависит от количества постов"""
+        ids = ','.join(map(str, self.ids))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('posts:posts_bulk'), {'ids': ids})
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:posts_bulk'), {'ids': ids})
+
+    def test_posts_bulk_cache_invalidated_on_comment(self):
+        """Новый комментарий сбрасывает кеш поста"""
+        post_id = self.ids[0]
+        url = reverse('posts:posts_bulk')
+        self.client.get(url, {'ids': post_id})
+        Comment.objects.create(
+            post_id=post_id, author=self.user, text='Комментарий'
+        )
+        response = self.client.get(url, {'ids': post_id})
+        self.assertEqual(response.json()['posts'][0]['comments_count'], 1)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostsBulkThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='thumb_user')
+        cls.ids = [
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.user,
+                image=SimpleUploadedFile(f'thumb{i}.gif', SMALL_GIF)
+            ).pk
+            for i in range(NUMBER_OF_POSTS + 9)
+        ]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_posts(self, ids):
+        return self.client.get(
+            reverse('posts:posts_bulk'), {'ids': ','.join(map(str, ids))}
+        ).json()['posts']
+
+    def test_thumbnails_use_constant_number_of_queries(self):
+        """Миниатюры всех постов ищутся одним запросом к KV-таблице"""
+        posts = self.get_posts(self.ids)
+        self.assertTrue(all(post['thumbnail'] for post in posts))
+        for ids in (self.ids[:1], self.ids):
+            cache.clear()
+            with self.subTest(posts=len(ids)), self.assertNumQueries(2):
+                self.assertEqual(
+                    [post['thumbnail'] for post in self.get_posts(ids)],
+                    [post['thumbnail'] for post in posts[:len(ids)]]
+                )
+
+
+class FeedCommentsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commentator')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.user)
+            for i in range(3)
+        ]
+        for post in cls.posts[:2]:
+            for i in range(COMMENT_PREVIEWS + 1):
+                Comment.objects.create(
+                    post=post, author=cls.user, text=f'Комментарий {i}'
+                )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_summaries_loaded_for_page_in_batch(self):
+        """Сводки комментариев и авторов страницы загружаются пакетно"""
+        posts = list(Post.objects.order_by('pk'))
+        with self.assertNumQueries(3):
+            attach_summaries(posts)
+        with self.assertNumQueries(0):
+            attach_summaries(posts)
+        self.assertEqual(
+            [post.comments_count for post in posts],
+            [COMMENT_PREVIEWS + 1, COMMENT_PREVIEWS + 1, 0]
+        )
+        self.assertEqual(
+            [comment['text'] for comment in posts[0].latest_comments],
+            ['Комментарий 3', 'Комментарий 2', 'Комментарий 1']
+        )
+        self.assertEqual(posts[2].latest_comments, [])
+
+    def test_feed_shows_excerpt_without_loading_text(self):
+        """Лента выводит начало текста и не загружает полный текст"""
+        long_post = Post.objects.create(
+            text='Длинный текст ' * 100 + 'концовка', author=self.user
+        )
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertFalse(any(
+            '"posts_post"."text"' in query['sql']
+            for query in queries.captured_queries
+        ))
+        self.assertContains(response, long_post.excerpt)
+        self.assertNotContains(response, 'концовка')
+        self.assertContains(response, 'читать полностью')
+
+    def test_new_comment_shown_in_feed(self):
+        """Новый комментарий сразу виден в ленте"""
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        self.authorized_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.posts[2].pk}),
+            data={'text': 'Свежий комментарий'}
+        )
+        response = self.authorized_client.get(url)
+        post = next(
+            post for post in response.context['page_obj']
+            if post.pk == self.posts[2].pk
+        )
+        self.assertEqual(post.comments_count, 1)
+        self.assertContains(response, 'Свежий комментарий')
+
+
+class AuthorSummaryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        Post.objects.create(text='Первый пост', author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.url = reverse('posts:profile', kwargs={'username': 'author'})
+        cache.clear()
+
+    def test_profile_reads_summary(self):
+        """Шапка профиля берётся из сводки автора"""
+        response = self.client.get(self.url)
+        summary = response.context['summary']
+        self.assertEqual(summary.display_name, 'Лев Толстой')
+        self.assertEqual(response.context['posts_count'], 1)
+        self.assertEqual(response.context['author'], self.author)
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+    def test_summary_updated_by_signals(self):
+        """Подписка и новый пост обновляют сводку автора"""
+        self.client.get(self.url)
+        self.reader_client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        Post.objects.create(text='Второй пост', author=self.author)
+        summary = self.client.get(self.url).context['summary']
+        self.assertEqual(summary.followers_count, 1)
+        self.assertEqual(summary.posts_count, 2)
+        reader = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'reader'})
+        ).context['summary']
+        self.assertEqual(reader.following_count, 1)
+
+    def test_deleted_author_not_found(self):
+        """Удалённый пользователь не остаётся в кеше сводок"""
+        url = reverse('posts:profile', kwargs={'username': 'ghost'})
+        ghost = User.objects.create_user(username='ghost')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        ghost.delete()
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_unknown_author_not_found(self):
+        """Профиль несуществующего пользователя возвращает 404"""
+        response = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'nobody'})
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class GroupDirectoryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='group_author')
+        cls.quiet = Group.objects.create(
+            title='Тихая группа', slug='quiet', description='Описание'
+        )
+        cls.busy = Group.objects.create(
+            title='Активная группа', slug='busy', description='Описание'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def stats(self, group):
+        stats = GroupStats.objects.filter(group=group).first()
+        return stats and (stats.posts_count, stats.last_post_date)
+
+    def test_stats_follow_create_edit_delete(self):
+        """Статистика групп обновляется при создании, правке и удалении"""
+        first = Post.objects.create(
+            text='Первый', author=self.user, group=self.quiet
+        )
+        second = Post.objects.create(
+            text='Второй', author=self.user, group=self.quiet
+        )
+        self.assertEqual(self.stats(self.quiet), (2, second.pub_date))
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': second.pk}),
+            data={'text': 'Второй', 'group': self.busy.pk}
+        )
+        self.assertEqual(self.stats(self.quiet), (1, first.pub_date))
+        self.assertEqual(self.stats(self.busy), (1, second.pub_date))
+        second.refresh_from_db()
+        second.delete()
+        self.assertEqual(self.stats(self.busy), (0, None))
+        self.assertEqual(
+            GroupActivity.objects.get(group=self.quiet).posts_count, 1
+        )
+
+    def test_directory_sorted_by_activity(self):
+        """Каталог групп отсортирован по активности за неделю"""
+        Post.objects.create(text='Пост', author=self.user, group=self.quiet)
+        for _ in range(2):
+            Post.objects.create(
+                text='Пост', author=self.user, group=self.busy
+            )
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('posts:group_directory'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(groups, [self.busy, self.quiet])
+        self.assertEqual(groups[0].week_posts, 2)
+
+    def test_rebuild_matches_incremental_stats(self):
+        """Пересчёт командой совпадает с инкрементальной статистикой"""
+        Post.objects.create(text='Пост', author=self.user, group=self.busy)
+        Post.objects.bulk_create([
+            Post(text='Без сигналов', author=self.user, group=self.quiet)
+        ])
+        expected = self.stats(self.busy)
+        call_command('rebuild_group_stats', stdout=StringIO())
+        self.assertEqual(self.stats(self.busy), expected)
+        self.assertEqual(self.stats(self.quiet)[0], 1)
+        self.assertEqual(
+            GroupActivity.objects.filter(group=self.quiet).get().posts_count,
+            1
+        )
+
+
+@override_settings(EVENTS={
+    **settings.EVENTS, 'MAX_AGE': 0.2, 'SHORT_MAX_AGE': 0.2
+})
+class LiveEventsTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='streamer')
+        self.reader = User.objects.create_user(username='listener')
+        self.group = Group.objects.create(
+            title='Эфир', slug='live', description='Описание'
+        )
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def tearDown(self):
+        cache.clear()
+
+    def stream(self, client, **params):
+        return client.get(reverse('posts:events'), params)
+
+    def test_new_post_and_comment_reach_subscribers(self):
+        """Новый пост и комментарий приходят в ленту группы и подписки"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        group_stream = self.stream(Client(), group='live')
+        follow_stream = self.stream(self.reader_client, follow=1)
+        self.author_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Прямой эфир', 'group': self.group.pk}
+        )
+        post = Post.objects.get()
+        self.reader_client.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': 'Ура'}
+        )
+        for response in (group_stream, follow_stream):
+            with self.subTest(response=response):
+                self.assertEqual(response['Content-Type'], 'text/event-stream')
+                content = b''.join(response.streaming_content).decode()
+                self.assertIn('event: post', content)
+                self.assertIn('Прямой эфир', content)
+                self.assertIn('event: comment', content)
+
+    def test_short_stream_under_wsgi(self):
+        """Под WSGI без EVENTS['STREAM'] поток короткий и с редким retry"""
+        with override_settings(EVENTS={
+            **settings.EVENTS, 'MAX_AGE': 3600, 'SHORT_MAX_AGE': 0.1
+        }):
+            content = b''.join(
+                self.stream(Client()).streaming_content
+            ).decode()
+        retry = settings.EVENTS['SHORT_RETRY'] * 1000
+        self.assertTrue(content.startswith(f'retry: {retry}\n'))
+        with override_settings(EVENTS={
+            **settings.EVENTS, 'MAX_AGE': 0.1, 'SHORT_MAX_AGE': 3600,
+            'STREAM': True
+        }):
+            content = b''.join(
+                self.stream(Client()).streaming_content
+            ).decode()
+        retry = settings.EVENTS['RETRY'] * 1000
+        self.assertTrue(content.startswith(f'retry: {retry}\n'))
+
+    def test_follow_stream_requires_login(self):
+        """Поток подписок недоступен анониму"""
+        self.assertEqual(self.stream(Client(), follow=1).status_code, 403)
@@ -5,9 +5,14 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('group/', views.group_directory, name='group_directory'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('tag/<str:name>/', views.tag_posts, name='tag_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:pk>/', views.post_detail, name='post_detail'),
+    path('posts/bulk/', views.posts_bulk, name='posts_bulk'),
+    path('events/', views.events, name='events'),
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
@@ -1,10 +1,309 @@
+from django.core.cache import cache
 from django.core.paginator import Paginator
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Post, User
+)
 
 NUMBER_OF_POST = 10
+MAX_BULK_POSTS = 300
+POST_CACHE_KEY = 'post_bulk:{}'
+POST_CACHE_TIMEOUT = 60 * 15
+COMMENTS_CACHE_KEY = 'post_comments:{}'
+COMMENT_PREVIEWS = 3
+AUTHOR_CACHE_KEY = 'author_summary:{}'
+AUTHOR_USERNAME_CACHE_KEY = 'author_summary:username:{}'
+THUMBNAIL_GEOMETRY = '960x339'
+PAGE_LINKS_AROUND = 2
+
+
+def get_page_links(number, num_pages, around=PAGE_LINKS_AROUND):
+    """Номера страниц для навигации, None обозначает пропуск.
+
+    Показываются первая, последняя и around страниц вокруг текущей.
+    Пропуск ровно одной страницы заменяется её номером, поэтому число
+    ссылок не превышает 2 * around + 5 при любом числе страниц.
+    """
+    shown = sorted({1, num_pages} | set(range(
+        max(1, number - around), min(num_pages, number + around) + 1
+    )))
+    links = []
+    for page in shown:
+        if links and page - links[-1] == 2:
+            links.append(page - 1)
+        elif links and page - links[-1] > 2:
+            links.append(None)
+        links.append(page)
+    return links
+
+
+def paginate(queryset, request, per_page):
+    page_obj = Paginator(queryset, per_page).get_page(request.GET.get('page'))
+    page_obj.page_links = get_page_links(
+        page_obj.number, page_obj.paginator.num_pages
+    )
+    return page_obj
 
 
 def get_paginator_obj(queryset, request):
-    paginator = Paginator(queryset, NUMBER_OF_POST)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(queryset, request, NUMBER_OF_POST)
+    page_obj.object_list = attach_summaries(list(page_obj.object_list))
     return page_obj
+
+
+class AuthorSummary:
+    """Сведения об авторе для профиля, поста и карточек ленты."""
+
+    def __init__(self, pk, username, first_name, last_name, posts_count,
+                 followers_count, following_count, last_post_date,
+                 is_active=True):
+        self.pk = pk
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+        self.posts_count = posts_count
+        self.followers_count = followers_count
+        self.following_count = following_count
+        self.last_post_date = last_post_date
+        self.is_active = is_active
+
+    def __str__(self):
+        return self.username
+
+    @property
+    def full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    @property
+    def display_name(self):
+        return self.full_name or self.username
+
+    @property
+    def user(self):
+        """Пользователь, собранный из сводки без запроса к базе."""
+        return User(
+            pk=self.pk, username=self.username,
+            first_name=self.first_name, last_name=self.last_name
+        )
+
+
+def count_related(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(count=Count('pk')).values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def latest_pub_date(queryset):
+    return Subquery(
+        queryset.filter(author=OuterRef('pk')).order_by(
+            '-pub_date'
+        ).values('pub_date')[:1]
+    )
+
+
+def load_authors(ids):
+    """Сводки авторов одним запросом с подзапросами вместо JOIN."""
+    rows = User.objects.filter(pk__in=ids).annotate(
+        posts_count=(
+            count_related(Post.objects, 'author')
+            + count_related(ArchivedPost.objects, 'author')
+        ),
+        followers_count=count_related(Follow.objects, 'author'),
+        following_count=count_related(Follow.objects, 'user'),
+        last_post_date=Coalesce(
+            latest_pub_date(Post.objects),
+            latest_pub_date(ArchivedPost.objects)
+        ),
+    ).values(
+        'pk', 'username', 'first_name', 'last_name', 'posts_count',
+        'followers_count', 'following_count', 'last_post_date', 'is_active'
+    )
+    return {row['pk']: row for row in rows}
+
+
+def get_cached_many(keys, loader, cached=None):
+    """Значения по ключам кеша, недостающие загружаются одним loader.
+
+    keys сопоставляет идентификаторы ключам кеша; cached позволяет
+    передать результат уже выполненного get_many.
+    """
+    if cached is None:
+        cached = cache.get_many(keys.values())
+    found = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in keys if pk not in found]
+    if missing:
+        fresh = loader(missing)
+        cache.set_many(
+            {keys[pk]: value for pk, value in fresh.items()},
+            POST_CACHE_TIMEOUT
+        )
+        found.update(fresh)
+    return found
+
+
+def get_author_summaries(ids, cached=None):
+    keys = {pk: AUTHOR_CACHE_KEY.format(pk) for pk in ids}
+    return {
+        pk: AuthorSummary(**data)
+        for pk, data in get_cached_many(keys, load_authors, cached).items()
+    }
+
+
+def get_author_summary(username):
+    """Сводка автора по имени пользователя или None.
+
+    Идентификатор по имени тоже кешируется; имя в сводке сверяется, чтобы
+    переименование пользователя не давало чужой профиль.
+    """
+    username_key = AUTHOR_USERNAME_CACHE_KEY.format(username)
+    pk = cache.get(username_key)
+    if pk is not None:
+        summary = get_author_summaries([pk]).get(pk)
+        if summary is not None and summary.username == username:
+            return summary
+    pk = User.objects.filter(username=username).values_list(
+        'pk', flat=True
+    ).first()
+    if pk is None:
+        return None
+    cache.set(username_key, pk, POST_CACHE_TIMEOUT)
+    return get_author_summaries([pk]).get(pk)
+
+
+def load_comments(ids, model=Comment):
+    """Число комментариев и последние COMMENT_PREVIEWS комментариев постов.
+
+    Два запроса на любое число постов: подсчёт с группировкой и выборка
+    последних комментариев через коррелированный подзапрос.
+    """
+    summaries = {pk: {'count': 0, 'latest': []} for pk in ids}
+    counts = model.objects.filter(post_id__in=ids).order_by().values(
+        'post_id'
+    ).annotate(count=Count('pk')).values_list('post_id', 'count')
+    for post_id, count in counts:
+        summaries[post_id]['count'] = count
+    latest = model.objects.filter(
+        post_id__in=ids,
+        pk__in=Subquery(
+            model.objects.filter(post_id=OuterRef('post_id')).order_by(
+                '-created', '-pk'
+            ).values('pk')[:COMMENT_PREVIEWS]
+        )
+    ).order_by('-created', '-pk').values_list(
+        'post_id', 'author__username', 'text', 'created'
+    )
+    for post_id, username, text, created in latest:
+        summaries[post_id]['latest'].append(
+            {'author': username, 'text': text, 'created': created}
+        )
+    return summaries
+
+
+def attach_summaries(posts):
+    """Добавляет постам comments_count, latest_comments и author_summary.
+
+    Сводки комментариев и авторов всей страницы читаются одним get_many,
+    недостающие загружаются пакетно.
+    """
+    comment_keys = {
+        post.pk: COMMENTS_CACHE_KEY.format(post.pk)
+        for post in posts if isinstance(post, Post)
+    }
+    archived_keys = {
+        post.pk: COMMENTS_CACHE_KEY.format(post.pk)
+        for post in posts if isinstance(post, ArchivedPost)
+    }
+    author_keys = {
+        post.author_id: AUTHOR_CACHE_KEY.format(post.author_id)
+        for post in posts
+    }
+    cached = cache.get_many([
+        *comment_keys.values(), *archived_keys.values(),
+        *author_keys.values()
+    ])
+    comments = get_cached_many(comment_keys, load_comments, cached)
+    if archived_keys:
+        comments.update(get_cached_many(
+            archived_keys,
+            lambda ids: load_comments(ids, ArchivedComment),
+            cached
+        ))
+    authors = get_author_summaries(author_keys, cached)
+    for post in posts:
+        post.comments_count = comments[post.pk]['count']
+        post.latest_comments = comments[post.pk]['latest']
+        post.author_summary = authors[post.author_id]
+    return posts
+
+
+def get_thumbnail_urls(images):
+    from core.thumbnail import get_thumbnail_urls
+    return get_thumbnail_urls(
+        images, THUMBNAIL_GEOMETRY, crop='center', upscale=True
+    )
+
+
+def serialize_post(post, thumbnail):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date.isoformat(),
+        'author': {
+            'username': post.author.username,
+            'full_name': post.author.get_full_name(),
+        },
+        'group': post.group and {
+            'slug': post.group.slug,
+            'title': post.group.title,
+        },
+        'comments_count': post.comments_count,
+        'thumbnail': thumbnail,
+        'image_status': post.image_status,
+    }
+
+
+def load_posts(ids):
+    posts = Post.objects.filter(
+        pk__in=ids, author__is_active=True
+    ).select_related('author', 'group').annotate(
+        comments_count=Count('comments')
+    )
+    thumbnails = get_thumbnail_urls([post.image for post in posts])
+    return {
+        post.pk: serialize_post(post, thumbnail)
+        for post, thumbnail in zip(posts, thumbnails)
+    }
+
+
+def get_posts_bulk(ids):
+    """Возвращает словари постов в порядке ids, пропуская отсутствующие.
+
+    Закешированные посты берутся одним get_many, остальные - одним
+    запросом вместе с автором, группой и числом комментариев; миниатюры
+    всех картинок ищутся одним запросом к KV-таблице sorl.
+    """
+    ids = list(dict.fromkeys(ids))[:MAX_BULK_POSTS]
+    found = get_cached_many(
+        {pk: POST_CACHE_KEY.format(pk) for pk in ids}, load_posts
+    )
+    return [found[pk] for pk in ids if pk in found]
+
+
+def invalidate_post_cache(post_id):
+    cache.delete(POST_CACHE_KEY.format(post_id))
+
+
+def invalidate_comments_cache(post_id):
+    cache.delete(COMMENTS_CACHE_KEY.format(post_id))
+
+
+def invalidate_author_cache(*user_ids):
+    cache.delete_many([AUTHOR_CACHE_KEY.format(pk) for pk in user_ids])
@@ -1,18 +1,34 @@
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
 
+from core.cache import cache_page_swr
+from core.events import event_stream, streams_allowed
+from core.ratelimit import ratelimit
+
+from .archive import TieredPosts, get_post_or_archived
+from .autocomplete import search
+from .events import get_channels, publish_comment, publish_post
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Comment, Follow
-from .utils import get_paginator_obj
+from .group_stats import groups_by_activity
+from .images import queue_image
+from .models import ArchivedPost, Post, Group, Tag, User, Follow
+from .tags import get_tag_page, normalize_tag
+from .utils import (
+    MAX_BULK_POSTS, NUMBER_OF_POST, attach_summaries, get_author_summaries,
+    get_author_summary, get_paginator_obj, get_posts_bulk, paginate
+)
 
 TITLE_COUNT_SYMBOL: int = 30
+GROUPS_ON_PAGE: int = 20
 
 
-@cache_page(20, key_prefix='index_page')
+@cache_page_swr(20, key_prefix='index_page')
 def index(request):
-    post_list = Post.objects.select_related('author', 'group')
+    post_list = Post.objects.filter(author__is_active=True).select_related(
+        'author', 'group'
+    ).defer('text')
     page_obj = get_paginator_obj(post_list, request)
     context = {
         'page_obj': page_obj,
@@ -21,8 +37,10 @@ def index(request):
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('group', 'author')
+    group = get_object_or_404(Group, slug=slug, is_active=True)
+    post_list = group.posts.filter(author__is_active=True).select_related(
+        'group', 'author'
+    ).defer('text')
     page_obj = get_paginator_obj(post_list, request)
     context = {
         'group': group,
@@ -32,46 +50,108 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=normalize_tag(name))
+    try:
+        posts, next_cursor = get_tag_page(
+            tag, NUMBER_OF_POST, request.GET.get('after')
+        )
+    except ValueError:
+        return HttpResponseBadRequest('Неверный курсор страницы')
+    context = {
+        'tag': tag,
+        'page_obj': attach_summaries(posts),
+        'next_cursor': next_cursor,
+        'is_first_page': 'after' not in request.GET,
+    }
+    return render(request, 'posts/tag_list.html', context)
+
+
+def group_directory(request):
+    context = {
+        'page_obj': paginate(
+            groups_by_activity(Group.objects.filter(is_active=True)),
+            request,
+            GROUPS_ON_PAGE
+        ),
+    }
+    return render(request, 'posts/group_directory.html', context)
+
+
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    user_posts = author.posts.select_related(
-        'author',
-        'group'
+    summary = get_author_summary(username)
+    if summary is None or not summary.is_active:
+        raise Http404
+    user_posts = TieredPosts(
+        Post.objects.filter(author_id=summary.pk).select_related(
+            'author',
+            'group'
+        ).defer('text'),
+        ArchivedPost.objects.filter(author_id=summary.pk).select_related(
+            'author',
+            'group'
+        ).defer('text'),
     )
-    posts_count = Post.objects.filter(author=author).count()
     page_obj = get_paginator_obj(user_posts, request)
     following = request.user.is_authenticated \
         and request.user.follower.filter(
-            author=author
+            author_id=summary.pk
         ).exists()
     context = {
         'following': following,
         'page_obj': page_obj,
-        'posts_count': posts_count,
-        'author': author,
+        'posts_count': summary.posts_count,
+        'author': summary.user,
+        'summary': summary,
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, pk):
-    post = get_object_or_404(Post, pk=pk)
-    author_post = Post.objects.select_related('author')
-    post_count = author_post.count()
+    post = get_post_or_archived(pk)
+    if post is None:
+        raise Http404
+    summary = get_author_summaries([post.author_id])[post.author_id]
+    if not summary.is_active:
+        raise Http404
     title = post.text[:TITLE_COUNT_SYMBOL]
-    comments = Comment.objects.filter(post=post)
+    comments = post.comments.select_related('author')
     form = CommentForm(request.POST or None)
     context = {
         'title': title,
         'post': post,
-        'post_count': post_count,
-        'author_post': author_post,
+        'archived': isinstance(post, ArchivedPost),
+        'post_count': summary.posts_count,
+        'summary': summary,
         'form': form,
         'comments': comments
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def posts_bulk(request):
+    try:
+        ids = [int(pk) for pk in request.GET.get('ids', '').split(',') if pk]
+    except ValueError:
+        return HttpResponseBadRequest('ids должны быть числами')
+    if len(ids) > MAX_BULK_POSTS:
+        return HttpResponseBadRequest(
+            f'Можно запросить не более {MAX_BULK_POSTS} постов'
+        )
+    return JsonResponse({'posts': get_posts_bulk(ids)})
+
+
+def autocomplete(request):
+    limit = request.GET.get('limit', '10')
+    if not limit.isdigit():
+        return HttpResponseBadRequest('limit должен быть числом')
+    return JsonResponse({
+        'results': search(request.GET.get('q', ''), int(limit))
+    })
+
+
 @login_required
+@ratelimit('post_create')
 def post_create(request):
     user = get_object_or_404(User, id=request.user.pk)
     form = PostForm(
@@ -82,6 +162,8 @@ def post_create(request):
         new_post = form.save(commit=False)
         new_post.author = request.user
         new_post.save()
+        queue_image(new_post, form.cleaned_data['image'])
+        publish_post(new_post)
         return redirect(reverse('posts:profile', args=[user]))
     return render(
         request,
@@ -99,7 +181,7 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
+        queue_image(form.save(), form.cleaned_data['image'])
         return redirect(reverse('posts:post_detail', args=[post_id]))
     context = {
         'is_edit': is_edit,
@@ -110,6 +192,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@ratelimit('add_comment')
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -118,12 +201,22 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        publish_comment(comment)
     return redirect('posts:post_detail', pk=post_id)
 
 
+def events(request):
+    return event_stream(
+        get_channels(request), request.META.get('HTTP_LAST_EVENT_ID'),
+        streams_allowed(request)
+    )
+
+
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = Post.objects.filter(
+        author__following__user=request.user, author__is_active=True
+    ).select_related('author', 'group').defer('text')
     page_obj = get_paginator_obj(posts, request)
     context = {
         'page_obj': page_obj
@@ -132,6 +225,7 @@ def follow_index(request):
 
 
 @login_required
+@ratelimit('follow', methods=('GET', 'POST'))
 def profile_follow(request, username):
     author = User.objects.get(username=username)
     if author != request.user:
@@ -143,6 +237,7 @@ def profile_follow(request, username):
 
 
 @login_required
+@ratelimit('follow', methods=('GET', 'POST'))
 def profile_unfollow(request, username):
     author = User.objects.get(username=username)
     Follow.objects.filter(user=request.user, author=author).delete()
@@ -0,0 +1,34 @@
+// Подсказки авторов и сообществ; выбранная подсказка открывает страницу.
+document.querySelectorAll('[data-autocomplete-url]').forEach(function (form) {
+  var input = form.querySelector('input');
+  var list = form.querySelector('datalist');
+  var urls = {};
+  input.addEventListener('input', function () {
+    if (urls[input.value]) {
+      window.location = urls[input.value];
+      return;
+    }
+    var query = input.value.trim();
+    if (!query) {
+      return;
+    }
+    fetch(form.dataset.autocompleteUrl + '?q=' + encodeURIComponent(query))
+      .then(function (response) { return response.json(); })
+      .then(function (data) {
+        list.innerHTML = '';
+        urls = {};
+        data.results.forEach(function (result) {
+          var option = document.createElement('option');
+          option.value = result.label;
+          urls[result.label] = result.url;
+          list.appendChild(option);
+        });
+      });
+  });
+  form.addEventListener('submit', function (event) {
+    event.preventDefault();
+    if (urls[input.value]) {
+      window.location = urls[input.value];
+    }
+  });
+});
@@ -0,0 +1,14 @@
+// Показывает число новых записей и комментариев из потока событий.
+document.querySelectorAll('[data-live-url]').forEach(function (banner) {
+  if (!window.EventSource) {
+    return;
+  }
+  var source = new EventSource(banner.dataset.liveUrl);
+  ['post', 'comment'].forEach(function (kind) {
+    var counter = banner.querySelector('[data-live="' + kind + '"]');
+    source.addEventListener(kind, function () {
+      counter.textContent = Number(counter.textContent) + 1;
+      banner.hidden = false;
+    });
+  });
+});
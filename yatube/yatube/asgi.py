@@ -0,0 +1,18 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Django 2.2 has no async views, so requests are run by the WSGI handler in a
+thread pool whose size is set by the ``ASGI_THREADS`` environment variable.
+"""
+
+import os
+
+from core.asgi import DEFAULT_THREADS, ThreadPoolASGIHandler
+
+from .wsgi import application as wsgi_application
+
+application = ThreadPoolASGIHandler(
+    wsgi_application,
+    threads=int(os.environ.get('ASGI_THREADS', DEFAULT_THREADS))
+)
@@ -0,0 +1,16 @@
+"""
+Settings profile is chosen by the DJANGO_ENV environment variable
+(dev, test or prod; dev by default). A profile can also be selected
+directly with DJANGO_SETTINGS_MODULE=yatube.settings.<profile>.
+"""
+
+import os
+
+DJANGO_ENV = os.environ.get('DJANGO_ENV', 'dev')
+
+if DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif DJANGO_ENV == 'test':
+    from .test import *  # noqa: F401,F403
+else:
+    from .dev import *  # noqa: F401,F403
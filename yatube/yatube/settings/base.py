@@ -1,5 +1,5 @@
 """
-Django settings for yatube project.
+Django settings for yatube project shared by all profiles.
 
 Generated by 'django-admin startproject' using Django 2.2.19.
 
@@ -13,16 +13,20 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 import os
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'lyl82k6=h=f0pdbqc-0qa2ysjz-wue0t)++yh*(ajox#*(cns7'
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY', 'lyl82k6=h=f0pdbqc-0qa2ysjz-wue0t)++yh*(ajox#*(cns7'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = False
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -40,7 +44,6 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-    'debug_toolbar',
     'posts.apps.PostsConfig',
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
@@ -49,14 +52,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.MemoryProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -65,7 +70,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -138,6 +143,76 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+SERVE_FILES = False
+
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+IMAGE_PROCESSING = {
+    'WORKERS': 2,
+    'TIMEOUT': 30,
+    'MAX_DIMENSION': 2048,
+    'TEMP_DIR': None,
+}
+
+ARCHIVE = {
+    'AFTER_DAYS': 365 * 2,
+    'BATCH_SIZE': 500,
+}
+
+DELETION = {
+    'BATCH_SIZE': 200,
+    # Выполняемое задание без отметок дольше стольких секунд забирает
+    # другой обработчик.
+    'STALE_AFTER': 300,
+}
+
+AUTOCOMPLETE = {
+    'SCAN_LIMIT': 500,
+    'REBUILD_INTERVAL': 60 * 10,
+    'BACKGROUND': True,
+}
+
+VIEW_CACHE = {
+    'STALE': 60 * 5,
+    'LOCK_TIMEOUT': 10,
+    'WAIT': 1,
+    'BETA': 1,
+}
+
+EVENTS = {
+    'BACKEND': 'local',
+    'POLL_INTERVAL': 1,
+    'KEEPALIVE': 15,
+    'MAX_AGE': 300,
+    'RETRY': 3,
+    'RETENTION': 60 * 60,
+    'QUEUE_SIZE': 100,
+    # Долгие потоки под WSGI; под ThreadPoolASGIHandler они включены всегда.
+    'STREAM': False,
+    'SHORT_MAX_AGE': 5,
+    'SHORT_RETRY': 30,
+}
+
+PRERENDER = {
+    'ENABLED': False,
+    'ROOT': os.path.join(BASE_DIR, 'prerendered'),
+    'BACKGROUND': True,
+}
+
+RATELIMIT = {
+    'ENABLED': True,
+    'POLICIES': {
+        'post_create': {'user': '10/m', 'ip': '30/m'},
+        'add_comment': {'user': '20/m', 'ip': '60/m'},
+        'follow': {'user': '30/m', 'ip': '90/m'},
+    },
+}
+
+# Адреса и сети прокси, которым доверяются X-Forwarded-For и X-Real-IP.
+TRUSTED_PROXIES = []
+
 # LOGOUT_REDIRECT_URL = 'users:logout'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
@@ -148,9 +223,46 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
     }
 }
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
+
+# Токен для сборщика метрик; без него /metrics/ доступен только staff.
+METRICS_TOKEN = None
+
+THUMBNAIL_BACKEND = 'core.thumbnail.InstrumentedThumbnailBackend'
+
+MEMORY_PROFILING = {
+    'ENABLED': False,
+    'SAMPLE_RATE': 0.01,
+    'FRAMES': 10,
+    'TOP': 25,
+    'SIGNAL': 'SIGUSR2',
+    'DIRECTORY': os.path.join(BASE_DIR, 'profiles', 'memory'),
+}
+
+PROFILING = {
+    'ENABLED': False,
+    'INTERVAL': 0.005,
+    'SAMPLE_RATE': 0,
+    'DEFAULT_THRESHOLD': None,
+    'THRESHOLDS': {
+        'posts:post_detail': 0.5,
+        'posts:follow_index': 0.5,
+    },
+    'DIRECTORY': os.path.join(BASE_DIR, 'profiles'),
+    'MAX_FILES': 500,
+}
+
+IMPORT_TIME_BUDGET = {
+    'TOTAL_MS': 1000,
+    'DEFERRED_MODULES': [
+        'PIL',
+        'sorl.thumbnail.engines.pil_engine',
+        'sorl.thumbnail.templatetags.thumbnail',
+    ],
+}
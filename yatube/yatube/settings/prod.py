@@ -0,0 +1,80 @@
+import copy
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import (
+    BASE_DIR, DATABASES, EVENTS, MIDDLEWARE, PRERENDER, TEMPLATES
+)
+
+DEBUG = False
+
+SECRET_KEY = os.environ.get('SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured('Задайте переменную окружения SECRET_KEY')
+
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', 'localhost').split(',')
+
+DATABASES = copy.deepcopy(DATABASES)
+DATABASES['default']['NAME'] = os.environ.get(
+    'SQLITE_PATH', DATABASES['default']['NAME']
+)
+DATABASES['default']['CONN_MAX_AGE'] = int(
+    os.environ.get('CONN_MAX_AGE', 600)
+)
+
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+MIDDLEWARE = [
+    MIDDLEWARE[0],
+    'core.middleware.CompressionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+] + MIDDLEWARE[1:]
+
+STATIC_ROOT = os.environ.get(
+    'STATIC_ROOT', os.path.join(BASE_DIR, 'collected_static')
+)
+
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+TRUSTED_PROXIES = [
+    proxy for proxy in os.environ.get('TRUSTED_PROXIES', '').split(',')
+    if proxy
+]
+
+SERVE_FILES = os.environ.get('SERVE_FILES', '1') == '1'
+
+EVENTS = {
+    **EVENTS,
+    'BACKEND': os.environ.get('EVENTS_BACKEND', 'database'),
+    'STREAM': os.environ.get('EVENTS_STREAM', '0') == '1',
+}
+
+PRERENDER = {
+    **PRERENDER,
+    'ENABLED': os.environ.get('PRERENDER', '0') == '1',
+    'ROOT': os.environ.get('PRERENDER_ROOT', PRERENDER['ROOT']),
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND', 'core.cache.InstrumentedFileBasedCache'
+        ),
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache')
+        ),
+    }
+}
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
@@ -0,0 +1,14 @@
+from .base import *  # noqa: F401,F403
+from .base import AUTOCOMPLETE, IMAGE_PROCESSING, PRERENDER
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+IMAGE_PROCESSING = {**IMAGE_PROCESSING, 'WORKERS': 0}
+
+PRERENDER = {**PRERENDER, 'BACKGROUND': False}
+
+AUTOCOMPLETE = {**AUTOCOMPLETE, 'BACKGROUND': False}
@@ -2,6 +2,9 @@
 WSGI config for yatube project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Set ``YATUBE_PRELOAD=1`` to warm the process up before workers are forked
+(see gunicorn.conf.py). With ``SERVE_FILES`` on, static and media files are
+served by core.static.StaticFilesMiddleware in front of Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
@@ -9,8 +12,19 @@ https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.SERVE_FILES:
+    from core.static import StaticFilesMiddleware
+
+    application = StaticFilesMiddleware(application)
+
+if os.environ.get('YATUBE_PRELOAD') == '1':
+    from core.preload import preload
+
+    preload()